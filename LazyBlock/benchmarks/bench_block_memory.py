@@ -0,0 +1,110 @@
+"""Measure the memory a loaded library costs per block.
+
+Blocks are built from freshly decoded JSON, as a folder load does, once with
+the previous ``@dataclass`` layout and once with the current ``Block``.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_block_memory --blocks 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable
+
+from core.blocks_model import Block
+
+
+@dataclass
+class LegacyBlock:
+    """``Block`` before it was slotted: a ``__dict__`` and a list of inputs."""
+
+    name: str
+    display_text: str
+    input_template: str
+    output_template: str
+    inputs: list[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.inputs = sorted(dict.fromkeys(self.inputs))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LegacyBlock":
+        return cls(
+            name=data["name"],
+            display_text=data["display_text"],
+            input_template=data["input_template"],
+            output_template=data["output_template"],
+            inputs=list(data.get("inputs", [])),
+        )
+
+
+def _library_json(count: int, distinct_templates: int) -> list[str]:
+    """``block.json`` payloads; templates repeat the way real libraries reuse them."""
+    rng = random.Random(0)
+    templates = [
+        (
+            f"範本 {i} {{輸入文字(1)}} 與 {{輸入文字(2)}}",
+            f"Template {i}: {{輸入文字(1)}} -> {{輸入文字(2)}}\n第二段 {i}",
+        )
+        for i in range(distinct_templates)
+    ]
+    payloads = []
+    for i in range(count):
+        input_template, output_template = rng.choice(templates)
+        payloads.append(
+            json.dumps(
+                {
+                    "name": f"block_{i:06d}",
+                    "display_text": f"方塊 {i}",
+                    "input_template": input_template,
+                    "output_template": output_template,
+                    "inputs": [1, 2],
+                },
+                ensure_ascii=False,
+            )
+        )
+    return payloads
+
+
+def _measure(payloads: list[str], build: Callable[[dict], object]) -> tuple[int, list[object]]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    blocks = [build(json.loads(payload)) for payload in payloads]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, blocks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=100_000)
+    parser.add_argument("--templates", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = _library_json(args.blocks, args.templates)
+    legacy_bytes, legacy = _measure(payloads, LegacyBlock.from_dict)
+    del legacy
+    compact_bytes, compact = _measure(payloads, Block.from_dict)
+    del compact
+
+    legacy_per_block = legacy_bytes / args.blocks
+    compact_per_block = compact_bytes / args.blocks
+    print(f"blocks={args.blocks} distinct templates={args.templates}")
+    print(f"legacy dataclass : {legacy_per_block:7.0f} bytes/block  ({legacy_bytes / 1e6:6.1f} MB)")
+    print(
+        f"slotted Block    : {compact_per_block:7.0f} bytes/block  ({compact_bytes / 1e6:6.1f} MB)"
+        f"  {legacy_per_block / compact_per_block:4.1f}x smaller"
+    )
+
+
+if __name__ == "__main__":
+    main()
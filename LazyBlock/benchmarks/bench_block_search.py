@@ -0,0 +1,61 @@
+"""Time as-you-type queries against ``BlockSearchIndex``.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_block_search --blocks 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from core.block_search import BlockSearchIndex
+from core.blocks_model import Block
+
+_CHARACTERS = "升級問候測試方塊文字輸入輸出範例資料夾名稱快速片語組合複製清空設定美術主要功能其他天地玄黃宇宙洪荒日月"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    blocks = [
+        Block(
+            name=f"block_{i:06d}",
+            display_text="".join(rng.choices(_CHARACTERS, k=rng.randint(3, 8))),
+            input_template="",
+            output_template="",
+            inputs=[],
+        )
+        for i in range(args.blocks)
+    ]
+
+    start = time.perf_counter()
+    index = BlockSearchIndex(blocks)
+    index.search("x")
+    build = time.perf_counter() - start
+    print(f"blocks={args.blocks}  build: {build * 1000:.0f} ms")
+
+    # Typing a query one character at a time, the way the search box sees it.
+    for word in ("block_0042", "升級問", "天地玄黃"):
+        for end in range(1, len(word) + 1):
+            query = word[:end]
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                results = index.search(query)
+            elapsed = (time.perf_counter() - start) / args.repeats
+            print(f"{query!r:14} {len(results):4} hits  {elapsed * 1000:6.3f} ms")
+
+    start = time.perf_counter()
+    index.add(Block(name="extra", display_text="升級問候", input_template="", output_template="", inputs=[]))
+    index.remove(blocks[0].name)
+    print(f"add + remove : {(time.perf_counter() - start) * 1000:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
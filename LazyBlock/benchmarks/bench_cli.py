@@ -0,0 +1,72 @@
+"""Startup time and throughput of the headless ``python -m lazy_block`` CLI.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_cli --megabytes 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core.blocks_model import Block
+from core.blocks_storage import save_block
+
+_LINE = "訂單 [BLOCK:greeting] 已處理，狀態 [升級] 0123456789 abcdefghij\n"
+
+
+def _run(args: list[str], stdin: Path | None = None) -> float:
+    start = time.perf_counter()
+    with open(stdin or os.devnull, "rb") as source:
+        subprocess.run(
+            [sys.executable, "-m", "lazy_block", *args],
+            stdin=source,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=1000)
+    parser.add_argument("--megabytes", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        library = Path(temp) / "library"
+        save_block(Block("greeting", "問候", "", "Hello {輸入文字(1)}!"), library / "greeting")
+        save_block(Block("upgrade", "升級", "", "Upgrade!"), library / "upgrade")
+        for i in range(args.blocks - 2):
+            save_block(Block(f"block_{i}", f"方塊{i}", "", f"output {i}"), library / f"block_{i}")
+        command = ["transform", "--library", str(library)]
+        _run(command)  # builds the folder index once
+
+        startups = sorted(_run(command) for _ in range(args.runs))
+        print(f"library={args.blocks} blocks")
+        print(
+            f"startup (empty input)  median {startups[len(startups) // 2] * 1000:6.1f} ms"
+            f"  best {startups[0] * 1000:6.1f} ms"
+        )
+        helps = sorted(_run(["--help"]) for _ in range(args.runs))
+        print(f"startup (--help only)  median {helps[len(helps) // 2] * 1000:6.1f} ms")
+
+        source = Path(temp) / "input.txt"
+        repeats = args.megabytes * 1024 * 1024 // len(_LINE.encode("utf-8"))
+        with source.open("w", encoding="utf-8") as file:
+            for _ in range(0, repeats, 10_000):
+                file.write(_LINE * 10_000)
+        size = source.stat().st_size
+        elapsed = _run(command, stdin=source)
+        print(f"throughput             {size / elapsed / 1e6:6.1f} MB/s  ({size / 1e6:.0f} MB in {elapsed:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
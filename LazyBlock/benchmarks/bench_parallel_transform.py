@@ -0,0 +1,76 @@
+"""Scaling of the process-parallel document transform.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_parallel_transform --mb 256 --blocks 1000
+
+Streams a generated document through the transform with 1, 2, 4, … worker
+processes (up to the CPUs available) and prints throughput and speedup over
+the in-process run.  Every run's output is checked against the first one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import filecmp
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.generators import make_blocks, make_document
+from core.document_transformer import DocumentTransformer
+from core.large_document import stream_transform_chunks
+from core.parallel_transform import default_workers, parallel_transform
+
+
+def _worker_counts(limit: int) -> list[int]:
+    counts = [1]
+    while counts[-1] * 2 <= limit:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != limit:
+        counts.append(limit)
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=int, default=64, help="document size in millions of characters")
+    parser.add_argument("--blocks", type=int, default=1000)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    parser.add_argument("--max-workers", type=int, default=default_workers())
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    cut = DocumentTransformer(blocks).safe_cut
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "document.txt"
+        source.write_text(make_document(args.mb * 1_000_000, blocks), encoding="utf-8")
+        size_mb = source.stat().st_size / 1e6
+        print(f"document={size_mb:.0f} MB blocks={args.blocks} cpus={default_workers()}")
+
+        reference: Path | None = None
+        serial_s = 0.0
+        for workers in _worker_counts(args.max_workers):
+            target = Path(tmp) / f"out_{workers}.txt"
+            start = time.perf_counter()
+            stream_transform_chunks(
+                source,
+                target,
+                lambda texts: parallel_transform(texts, blocks, workers=workers),
+                chunk_bytes=args.chunk_kb * 1024,
+                cut=cut,
+            )
+            elapsed = time.perf_counter() - start
+            if reference is None:
+                reference, serial_s = target, elapsed
+            else:
+                assert filecmp.cmp(reference, target, shallow=False), f"{workers} workers differ"
+                target.unlink()
+            print(
+                f"workers={workers:<3d}: {elapsed:7.2f} s  {size_mb / elapsed:7.1f} MB/s"
+                f"  ({serial_s / elapsed:4.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare looping ``render_template`` with the columnar ``render_many``.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_render_many --rows 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import time
+
+from core.blocks_model import Block
+from core.transform_engine import render_block_for_output, render_many
+
+_LEGACY_PATTERN = re.compile(r"\{輸入文字\((\d+)\)\}")
+
+
+def _legacy_render(template: str, values: dict[int, str]) -> str:
+    """The per-call regex substitution ``render_template`` used to perform."""
+
+    def replace(match: re.Match[str]) -> str:
+        return values.get(int(match.group(1)), "")
+
+    return _LEGACY_PATTERN.sub(replace, template)
+
+
+def _best_of(repeats: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    block = Block(
+        name="customer",
+        display_text="客戶",
+        input_template="{輸入文字(1)}",
+        output_template="親愛的 {輸入文字(1)} 您好，您的訂單 {輸入文字(2)} 已於 {輸入文字(3)} 出貨。",
+        inputs=[1, 2, 3],
+    )
+    columns = {
+        1: [f"客戶{i}" for i in range(args.rows)],
+        2: [f"#{i:08d}" for i in range(args.rows)],
+        3: ["2026-10-17"] * args.rows,
+    }
+    rows = [{idx: column[i] for idx, column in columns.items()} for i in range(args.rows)]
+
+    legacy = _best_of(args.repeats, lambda: [_legacy_render(block.output_template, r) for r in rows])
+    looped = _best_of(args.repeats, lambda: [render_block_for_output(block, r) for r in rows])
+    batched = _best_of(args.repeats, lambda: render_many(block, columns))
+    streamed = _best_of(args.repeats, lambda: render_many(block, columns, sink=io.StringIO().write))
+
+    expected = [render_block_for_output(block, r) for r in rows]
+    assert render_many(block, columns) == expected
+    buffer = io.StringIO()
+    render_many(block, columns, sink=buffer.write)
+    assert buffer.getvalue() == "".join(row + "\n" for row in expected)
+    print(f"rows={args.rows}")
+    print(f"regex sub loop      : {legacy * 1000:8.1f} ms")
+    print(f"render_block loop   : {looped * 1000:8.1f} ms  ({legacy / looped:4.1f}x)")
+    print(f"render_many (list)  : {batched * 1000:8.1f} ms  ({legacy / batched:4.1f}x)")
+    print(f"render_many (sink)  : {streamed * 1000:8.1f} ms  ({legacy / streamed:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Cold start of the Tk app: import time and time to first frame.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.bench_startup --runs 10
+
+Each run starts a fresh interpreter.  Time to first frame is measured from
+launching the process until ``main`` reports that the window has been drawn;
+it needs a display and is skipped without one.  The exit status is 1 when
+the median first frame (or, without a display, the import) misses the target.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+TARGET_MS = 300.0
+
+_FIRST_FRAME_CHILD = """
+from lazy_block.main import main
+
+def first_frame(root):
+    print("first-frame", flush=True)
+    root.after_idle(root.destroy)
+
+main(on_first_frame=first_frame)
+"""
+_IMPORT_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+lazy_block\.main$")
+
+
+def _import_ms() -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import lazy_block.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line.strip())
+        if match:
+            return int(match.group(1)) / 1000
+    raise RuntimeError("lazy_block.main missing from -X importtime output")
+
+
+def _first_frame_ms() -> float:
+    start = time.perf_counter()
+    with subprocess.Popen(
+        [sys.executable, "-c", _FIRST_FRAME_CHILD], stdout=subprocess.PIPE, text=True
+    ) as child:
+        assert child.stdout is not None
+        for line in child.stdout:
+            if line.strip() == "first-frame":
+                elapsed = time.perf_counter() - start
+                break
+        else:
+            raise RuntimeError(f"app exited with {child.wait()} before drawing a frame")
+        child.wait()
+    return elapsed * 1000
+
+
+def _has_display() -> bool:
+    if sys.platform.startswith(("win", "darwin")):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def _median(values: list[float]) -> float:
+    return sorted(values)[len(values) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS)
+    args = parser.parse_args()
+
+    imports = [_import_ms() for _ in range(args.runs)]
+    print(f"import lazy_block.main  median {_median(imports):6.1f} ms  best {min(imports):6.1f} ms")
+    measured = _median(imports)
+    if _has_display():
+        frames = [_first_frame_ms() for _ in range(args.runs)]
+        measured = _median(frames)
+        print(f"time to first frame     median {measured:6.1f} ms  best {min(frames):6.1f} ms")
+    else:
+        print("time to first frame     skipped (no display)")
+    verdict = "ok" if measured <= args.target_ms else "OVER TARGET"
+    print(f"target                  {args.target_ms:6.1f} ms  {verdict}")
+    if measured > args.target_ms:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
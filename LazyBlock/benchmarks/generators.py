@@ -0,0 +1,88 @@
+"""Synthetic, seeded block libraries and B documents for the benchmarks.
+
+The same ``seed`` always produces the same blocks and text, so numbers from
+different runs (and different commits) measure the same work.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+from core.blocks_model import Block
+from core.blocks_storage import commit_block_files, write_block_file
+
+LIBRARY_SIZES = (10, 1_000, 100_000)
+DOCUMENT_SIZES = (1_000, 1_000_000, 100_000_000)
+
+# Blocks written per sync round.
+_WRITE_BATCH = 1_000
+_WORDS = ("訂單", "客戶", "出貨", "升級", "狀態", "備註", "order", "status", "ship", "note")
+
+
+def make_block(index: int, rng: random.Random) -> Block:
+    inputs = sorted(rng.sample(range(1, 6), rng.randint(0, 3)))
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 12)))
+    placeholders = " ".join(f"{{輸入文字({idx})}}" for idx in inputs)
+    return Block(
+        name=f"block_{index:06d}",
+        display_text=f"方塊{index}",
+        input_template=f"{words} {placeholders}".strip(),
+        output_template=f"{words.upper()} -> {placeholders} #{index}".strip(),
+        inputs=inputs,
+    )
+
+
+def make_blocks(count: int, seed: int = 0) -> list[Block]:
+    rng = random.Random(seed)
+    return [make_block(index, rng) for index in range(count)]
+
+
+def write_library(root: Path, count: int, seed: int = 0) -> Path:
+    """Save ``count`` generated blocks under ``root`` in the folder layout."""
+    root.mkdir(parents=True, exist_ok=True)
+    blocks = make_blocks(count, seed)
+    for start in range(0, count, _WRITE_BATCH):
+        commit_block_files(
+            [write_block_file(block, root / block.name) for block in blocks[start : start + _WRITE_BATCH]]
+        )
+    return root
+
+
+def make_document(size: int, blocks: list[Block], seed: int = 0) -> str:
+    """B text of about ``size`` characters; roughly one line in three uses a block token."""
+    rng = random.Random(seed)
+    lines: list[str] = []
+    length = 0
+    while length < size:
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(2, 10)))
+        if blocks and rng.random() < 0.33:
+            block = rng.choice(blocks)
+            token = f"[BLOCK:{block.name}]" if rng.random() < 0.5 else f"[{block.display_text}]"
+            words = f"{words} {token}"
+        lines.append(words)
+        length += len(words) + 1
+    return "\n".join(lines)[:size]
+
+
+def make_template(size: int, seed: int = 0) -> str:
+    """A template of about ``size`` characters with a placeholder every few words."""
+    rng = random.Random(seed)
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        part = rng.choice(_WORDS) if rng.random() < 0.8 else f"{{輸入文字({rng.randint(1, 5)})}}"
+        parts.append(part)
+        length += len(part) + 1
+    return " ".join(parts)
+
+
+__all__ = [
+    "DOCUMENT_SIZES",
+    "LIBRARY_SIZES",
+    "make_block",
+    "make_blocks",
+    "make_document",
+    "make_template",
+    "write_library",
+]
@@ -0,0 +1,409 @@
+"""Benchmark suite for the core engine, block storage and UI refresh paths.
+
+Run from the ``LazyBlock`` directory::
+
+    python -m benchmarks.suite --quick --json results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+
+Cases are parametrised over the generated libraries (10 / 1k / 100k blocks)
+and documents (1 KB to 100 MB); ``--quick`` leaves out the largest of each.
+The ``ui.*`` cases need a display: without one the suite starts ``Xvfb`` if
+it is installed and skips them otherwise.
+
+With ``--baseline`` every case is compared to the stored result by median
+time per call, and the exit status is 1 if any case got slower by more than
+``--threshold`` (a fraction, 0.25 = 25 %).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from core.block_lint import lint_block
+from core.blocks_model import Block
+from core.blocks_storage import (
+    list_block_folder_entries,
+    list_block_handles,
+    rename_block_folder,
+    save_block,
+)
+from core.document_transformer import DocumentTransformer
+from core.storage_backend import FolderBlockStorage
+from core.transform_engine import render_block_for_output, render_template
+
+from .generators import (
+    DOCUMENT_SIZES,
+    LIBRARY_SIZES,
+    make_blocks,
+    make_document,
+    make_template,
+    write_library,
+)
+
+# A case is timed until it has run this long (and at least _MIN_SAMPLES times).
+_MIN_TIME_S = 0.5
+_MIN_SAMPLES = 3
+# Inner loop length is raised until one sample takes at least this long.
+_SAMPLE_TIME_S = 0.01
+# Tk text widgets are not meant for 100 MB; UI cases stop at this size.
+_UI_MAX_DOCUMENT = 1_000_000
+
+Bench = Callable[[], object]
+
+
+@dataclass(frozen=True)
+class Result:
+    median_s: float
+    min_s: float
+    samples: int
+    number: int
+
+
+class Workspace:
+    """Generated inputs, built once per run and shared by the cases."""
+
+    def __init__(self, root: Path, *, quick: bool) -> None:
+        self.root = root
+        self.library_sizes = LIBRARY_SIZES[:-1] if quick else LIBRARY_SIZES
+        self.document_sizes = DOCUMENT_SIZES[:-1] if quick else DOCUMENT_SIZES
+        self._blocks: dict[int, list[Block]] = {}
+        self._libraries: dict[int, Path] = {}
+        self._documents: dict[int, str] = {}
+
+    def blocks(self, count: int) -> list[Block]:
+        if count not in self._blocks:
+            self._blocks[count] = make_blocks(count)
+        return self._blocks[count]
+
+    def library(self, count: int) -> Path:
+        if count not in self._libraries:
+            self._libraries[count] = write_library(self.root / f"library_{count}", count)
+        return self._libraries[count]
+
+    def document(self, size: int) -> str:
+        if size not in self._documents:
+            self._documents[size] = make_document(size, self.blocks(1_000))
+        return self._documents[size]
+
+
+_CASES: list[tuple[str, Callable[[Workspace], Iterator[tuple[str, Bench]]]]] = []
+
+
+def case(name: str):
+    """Register a generator yielding ``(parameter, zero-argument callable)`` pairs."""
+
+    def register(func: Callable[[Workspace], Iterator[tuple[str, Bench]]]):
+        _CASES.append((name, func))
+        return func
+
+    return register
+
+
+def _size_label(size: int) -> str:
+    for unit, scale in (("MB", 1_000_000), ("KB", 1_000)):
+        if size >= scale:
+            return f"{size // scale}{unit}"
+    return str(size)
+
+
+# -- core ------------------------------------------------------------------
+
+
+@case("core.render_template")
+def _render_template(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    values = {idx: f"值{idx}" for idx in range(1, 6)}
+    for size in ws.document_sizes:
+        template = make_template(size)
+        yield _size_label(size), lambda template=template: render_template(template, values)
+
+
+@case("core.render_block_for_output")
+def _render_block_for_output(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    values = {idx: f"值{idx}" for idx in range(1, 6)}
+    for count in ws.library_sizes:
+        blocks = ws.blocks(count)
+        yield str(count), lambda blocks=blocks: [render_block_for_output(b, values) for b in blocks]
+
+
+@case("core.validate_inputs")
+def _validate_inputs(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    for count in ws.library_sizes:
+        blocks = ws.blocks(count)
+        yield str(count), lambda blocks=blocks: [block.validate_inputs() for block in blocks]
+
+
+@case("core.lint_block")
+def _lint_block(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    for count in ws.library_sizes:
+        blocks = ws.blocks(count)
+        yield str(count), lambda blocks=blocks: [lint_block(block) for block in blocks]
+
+
+@case("core.document_transform")
+def _document_transform(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    transformer = DocumentTransformer(ws.blocks(1_000))
+    for size in ws.document_sizes:
+        document = ws.document(size)
+        yield _size_label(size), lambda document=document: transformer.transform(document)
+
+
+# -- storage ---------------------------------------------------------------
+
+
+@case("storage.list_block_folder_entries")
+def _list_entries(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    for count in ws.library_sizes:
+        library = ws.library(count)
+        yield str(count), lambda library=library: list_block_folder_entries(library)
+
+
+@case("storage.list_block_handles")
+def _list_handles(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    for count in ws.library_sizes:
+        library = ws.library(count)
+        list_block_handles(library)  # writes the folder index the timed runs use
+        yield str(count), lambda library=library: list_block_handles(library)
+
+
+@case("storage.save_block")
+def _save_block(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    folder = ws.root / "save"
+    block = ws.blocks(10)[0]
+    yield "1", lambda: save_block(block, folder / block.name)
+
+
+@case("storage.save_many")
+def _save_many(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    storage = FolderBlockStorage(ws.root / "save_many")
+    for count in (1, 100):
+        items = [(block, block.name) for block in ws.blocks(count)]
+        yield str(count), lambda items=items: storage.save_many(items)
+
+
+@case("storage.rename_block_folder")
+def _rename_block_folder(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    folder = ws.root / "rename"
+    block = ws.blocks(10)[0]
+    save_block(block, folder / "a")
+    current = [folder / "a"]
+
+    def rename() -> None:
+        current[0] = rename_block_folder(current[0], "b" if current[0].name == "a" else "a")
+
+    yield "1", rename
+
+
+# -- ui --------------------------------------------------------------------
+
+
+@case("ui.blocks_panel.set_blocks")
+def _blocks_panel_set_blocks(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    from ui.panel_blocks import BlocksPanel
+
+    root = _tk_root()
+    panel = BlocksPanel(root, on_folder_changed=lambda _path: None, on_block_clicked=lambda _b: None)
+    panel.pack(fill="both", expand=True)
+    for count in ws.library_sizes:
+        blocks = ws.blocks(count)
+
+        # Alternate with an empty library so every run refreshes the panel.
+        def refresh(blocks=blocks) -> None:
+            panel.set_blocks(blocks)
+            root.update_idletasks()
+            panel.set_blocks([])
+
+        yield str(count), refresh
+
+
+@case("ui.output_panel.set_text")
+def _output_panel_set_text(ws: Workspace) -> Iterator[tuple[str, Bench]]:
+    from ui.panel_output import OutputPanel
+
+    root = _tk_root()
+    panel = OutputPanel(root)
+    panel.pack(fill="both", expand=True)
+    for size in ws.document_sizes:
+        if size > _UI_MAX_DOCUMENT:
+            continue
+        text = ws.document(size)
+        # A typical refresh: the same document with one line edited.
+        middle = text.find("\n", len(text) // 2) + 1
+        edited = text[:middle] + "已修改 " + text[middle:]
+        state = [text]
+
+        def refresh(text=text, edited=edited, state=state) -> None:
+            state[0] = edited if state[0] is text else text
+            panel.set_text(state[0])
+            root.update_idletasks()
+
+        panel.set_text(text)
+        yield _size_label(size), refresh
+
+
+_ROOT = None
+
+
+def _tk_root():
+    global _ROOT
+    if _ROOT is None:
+        from lazy_block.ttk_compat import ttk
+
+        _ROOT = ttk.Window()
+        _ROOT.geometry("1200x720")
+    return _ROOT
+
+
+@contextlib.contextmanager
+def _display() -> Iterator[bool]:
+    """Make sure Tk has a display; start ``Xvfb`` when there is none."""
+    if sys.platform.startswith(("win", "darwin")) or os.environ.get("DISPLAY"):
+        yield True
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield False
+        return
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(
+        [xvfb, "-displayfd", str(write_fd), "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+        pass_fds=(write_fd,),
+        stderr=subprocess.DEVNULL,
+    )
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        number = pipe.readline().strip()
+    if not number:
+        server.kill()
+        server.wait()
+        yield False
+        return
+    os.environ["DISPLAY"] = f":{number}"
+    try:
+        yield True
+    finally:
+        del os.environ["DISPLAY"]
+        server.terminate()
+        server.wait()
+
+
+# -- running ---------------------------------------------------------------
+
+
+def measure(func: Bench, min_time: float = _MIN_TIME_S) -> Result:
+    """Median and best time per call, timeit-style with an adaptive loop count."""
+    func()  # warm-up: caches, compiled templates, page cache
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= _SAMPLE_TIME_S or number >= 1 << 20:
+            break
+        number *= 2
+    samples = [elapsed / number]
+    deadline = time.perf_counter() + min_time
+    while len(samples) < _MIN_SAMPLES or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return Result(statistics.median(samples), min(samples), len(samples), number)
+
+
+def run(ws: Workspace, pattern: str, *, ui: bool) -> dict[str, Result]:
+    results: dict[str, Result] = {}
+    for name, generate in _CASES:
+        if name.startswith("ui.") and not ui:
+            continue
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        for param, func in generate(ws):
+            key = f"{name}[{param}]"
+            results[key] = result = measure(func)
+            print(f"{key:48} {result.median_s * 1000:12.4f} ms  ({result.samples} x {result.number})", flush=True)
+    return results
+
+
+def compare(results: dict[str, Result], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Print the change against ``baseline``; return the keys that regressed."""
+    regressions: list[str] = []
+    print(f"\n{'case':48} {'baseline ms':>12} {'now ms':>12} {'change':>8}")
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key:48} {'-':>12} {result.median_s * 1000:12.4f} {'new':>8}")
+            continue
+        change = result.median_s / previous["median_s"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:48} {previous['median_s'] * 1000:12.4f} {result.median_s * 1000:12.4f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def _report(results: dict[str, Result], quick: bool) -> dict:
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": quick,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": {key: asdict(result) for key, result in results.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="skip the 100k library and 100 MB document")
+    parser.add_argument("--only", default="*", help="glob over case names, e.g. 'storage.*'")
+    parser.add_argument("--no-ui", action="store_true", help="skip the Tk cases")
+    parser.add_argument("--json", type=Path, help="write the results here as JSON")
+    parser.add_argument("--save-baseline", type=Path, help="write the results as the new baseline")
+    parser.add_argument("--baseline", type=Path, help="compare against this stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (default 0.25)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+
+    with tempfile.TemporaryDirectory(prefix="lazy-block-bench-") as temp, _display() as has_display:
+        ui = has_display and not args.no_ui
+        if not ui and not args.no_ui:
+            print("ui.* skipped: no display and no Xvfb")
+        results = run(Workspace(Path(temp), quick=args.quick), args.only, ui=ui)
+        if _ROOT is not None:
+            _ROOT.destroy()
+
+    report = _report(results, args.quick)
+    for path in (args.json, args.save_baseline):
+        if path is not None:
+            path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Blocks inside blocks: templates that reference other blocks by name.
+
+A template may contain ``{方塊(name)}``; rendering it inserts the named
+block's template for the same side (input or output), rendered with the same
+``{輸入文字(n)}`` values.  References form a graph that must stay acyclic:
+rendering a block that reaches itself raises :class:`BlockCycleError`.
+References to blocks that are not in the library are left as written.
+
+Each template is split at its references once (the pieces in between are
+ordinary compiled templates), and a render expands every distinct child
+once per input set, so shared children of a deep composition cost nothing
+extra and a render takes time linear in its output.  Rendered results are
+also kept in a small LRU keyed by the values a block actually (transitively)
+uses.  Changing a block invalidates only that block and its dependents.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+from .blocks_model import Block
+from .blocks_storage import BlockEntry, resolve_block
+from .template_compiler import CompiledTemplate, compile_template
+
+
+BLOCK_REFERENCE_PATTERN = re.compile(r"\{方塊\(([^(){}\n]+)\)\}")
+SIDES = ("input", "output")
+
+_RENDER_CACHE_SIZE = 1024
+
+
+class BlockCycleError(ValueError):
+    """A block reaches itself through ``{方塊(name)}`` references."""
+
+    def __init__(self, cycle: list[str]) -> None:
+        self.cycle = cycle
+        super().__init__(f"方塊引用形成循環: {' → '.join(cycle)}")
+
+
+def block_references(template: str) -> tuple[str, ...]:
+    """Names referenced by ``template``, in order of first appearance."""
+    return tuple(dict.fromkeys(BLOCK_REFERENCE_PATTERN.findall(template or "")))
+
+
+@dataclass(frozen=True)
+class _Plan:
+    """One side of one block, split at its references.
+
+    ``parts`` alternates compiled text and child names and always starts and
+    ends with text.
+    """
+
+    parts: tuple[CompiledTemplate | str, ...]
+    children: tuple[str, ...]
+
+
+def _template(block: Block, side: str) -> str:
+    return block.input_template if side == "input" else block.output_template
+
+
+def _build_plan(template: str) -> _Plan:
+    pieces = BLOCK_REFERENCE_PATTERN.split(template or "")
+    parts: list[CompiledTemplate | str] = []
+    for position, piece in enumerate(pieces):
+        parts.append(compile_template(piece) if position % 2 == 0 else piece)
+    return _Plan(tuple(parts), tuple(dict.fromkeys(pieces[1::2])))
+
+
+class BlockGraph:
+    """A library of blocks with their ``{方塊(name)}`` references resolved.
+
+    Blocks may be :class:`~core.blocks_storage.BlockHandle` entries; a block
+    is loaded and split into a plan the first time it is rendered, which is
+    also when its edges join the graph.
+    """
+
+    def __init__(
+        self, blocks: Iterable[BlockEntry] = (), *, cache_size: int = _RENDER_CACHE_SIZE
+    ) -> None:
+        self._blocks: dict[str, BlockEntry] = {}
+        self._plans: dict[tuple[str, str], _Plan] = {}
+        # child name -> blocks whose plans reference it (the child may be missing)
+        self._dependents: dict[str, set[str]] = {}
+        self._inputs: dict[tuple[str, str], tuple[int, ...]] = {}
+        self._rendered: OrderedDict[tuple, str] = OrderedDict()
+        self._cache_size = cache_size
+        for block in blocks:
+            self.add_block(block)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._blocks
+
+    # -- library changes ---------------------------------------------------
+
+    def add_block(self, block: BlockEntry) -> set[str]:
+        """Register or replace ``block``; return the names whose output may have changed."""
+        affected = self.invalidate(block.name)
+        self._blocks[block.name] = block
+        return affected
+
+    def remove_block(self, name: str) -> set[str]:
+        if name not in self._blocks:
+            return set()
+        affected = self.invalidate(name)
+        del self._blocks[name]
+        return affected
+
+    def dependents(self, name: str) -> set[str]:
+        """Every block whose expansion includes ``name``, directly or not."""
+        found: set[str] = set()
+        pending = [name]
+        while pending:
+            for parent in self._dependents.get(pending.pop(), ()):
+                if parent not in found:
+                    found.add(parent)
+                    pending.append(parent)
+        return found
+
+    def invalidate(self, name: str) -> set[str]:
+        """Forget everything derived from ``name``; return it and its dependents."""
+        affected = self.dependents(name)
+        affected.add(name)
+        children: set[str] = set()
+        for side in SIDES:
+            plan = self._plans.pop((name, side), None)
+            if plan is not None:
+                children.update(plan.children)
+        for child in children:
+            parents = self._dependents.get(child)
+            if parents is not None:
+                parents.discard(name)
+                if not parents:
+                    del self._dependents[child]
+        for affected_name in affected:
+            for side in SIDES:
+                self._inputs.pop((affected_name, side), None)
+        if self._rendered:
+            stale = [key for key in self._rendered if key[0] in affected]
+            for key in stale:
+                del self._rendered[key]
+        return affected
+
+    # -- plans -------------------------------------------------------------
+
+    def _plan(self, name: str, side: str) -> _Plan:
+        plan = self._plans.get((name, side))
+        if plan is None:
+            plan = _build_plan(_template(resolve_block(self._blocks[name]), side))
+            self._plans[(name, side)] = plan
+            for child in plan.children:
+                self._dependents.setdefault(child, set()).add(name)
+        return plan
+
+    def _post_order(self, name: str, side: str, done: set[str]) -> list[str]:
+        """``name`` and the library blocks it reaches, children first.
+
+        Blocks in ``done`` are treated as already handled.  Raises
+        :class:`BlockCycleError` when a reference leads back onto the path.
+        """
+        order: list[str] = []
+        path: list[str] = [name]
+        on_path = {name}
+        stack = [iter(self._plan(name, side).children)]
+        while stack:
+            for child in stack[-1]:
+                if child in done or child not in self._blocks:
+                    continue
+                if child in on_path:
+                    raise BlockCycleError(path[path.index(child) :] + [child])
+                path.append(child)
+                on_path.add(child)
+                stack.append(iter(self._plan(child, side).children))
+                break
+            else:
+                stack.pop()
+                finished = path.pop()
+                on_path.discard(finished)
+                done.add(finished)
+                order.append(finished)
+        return order
+
+    def find_cycle(self, name: str) -> list[str] | None:
+        """The first reference cycle reachable from ``name``, or ``None``."""
+        try:
+            for side in SIDES:
+                self._post_order(name, side, set())
+        except BlockCycleError as exc:
+            return exc.cycle
+        return None
+
+    def used_inputs(self, name: str, side: str | None = None) -> tuple[int, ...]:
+        """Sorted input ids the block needs, including those of the blocks it references."""
+        if side is None:
+            ids = set(self.used_inputs(name, "input"))
+            ids.update(self.used_inputs(name, "output"))
+            return tuple(sorted(ids))
+        cached = self._inputs.get((name, side))
+        if cached is not None:
+            return cached
+        done = {key[0] for key in self._inputs if key[1] == side}
+        for block_name in self._post_order(name, side, done):
+            plan = self._plans[(block_name, side)]
+            ids: set[int] = set()
+            for position, part in enumerate(plan.parts):
+                if position % 2 == 0:
+                    ids.update(part.input_ids)  # type: ignore[union-attr]
+                elif part in self._blocks:
+                    ids.update(self._inputs[(part, side)])  # type: ignore[index]
+            self._inputs[(block_name, side)] = tuple(sorted(ids))
+        return self._inputs[(name, side)]
+
+    # -- rendering ---------------------------------------------------------
+
+    def render(
+        self, name: str, values: dict[int, str], *, side: str = "output", memoize: bool = True
+    ) -> str:
+        """Render block ``name`` with every reference expanded.
+
+        Each distinct block is expanded once per call.  With ``memoize`` the
+        result (and those of the blocks it references) is also kept for later
+        calls with the same relevant values.
+        """
+        if memoize:
+            key = self._render_key(name, side, values)
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+                return cached
+        rendered: dict[str, str] = {}
+        for block_name in self._post_order(name, side, set()):
+            block_key = self._render_key(block_name, side, values) if memoize else None
+            result = self._rendered.get(block_key) if block_key is not None else None
+            if result is None:
+                pieces: list[str] = []
+                for position, part in enumerate(self._plans[(block_name, side)].parts):
+                    if position % 2 == 0:
+                        pieces.append(part.render(values))  # type: ignore[union-attr]
+                    elif part in rendered:
+                        pieces.append(rendered[part])  # type: ignore[index]
+                    else:
+                        pieces.append(f"{{方塊({part})}}")
+                result = "".join(pieces)
+                if block_key is not None:
+                    self._remember(block_key, result)
+            rendered[block_name] = result
+        return rendered[name]
+
+    def _remember(self, key: tuple, result: str) -> None:
+        self._rendered[key] = result
+        if len(self._rendered) > self._cache_size:
+            self._rendered.popitem(last=False)
+
+    def _render_key(self, name: str, side: str, values: dict[int, str]) -> tuple:
+        ids = self.used_inputs(name, side)
+        return (name, side, tuple(values.get(idx, "") for idx in ids))
+
+
+__all__ = [
+    "BLOCK_REFERENCE_PATTERN",
+    "BlockCycleError",
+    "BlockGraph",
+    "block_references",
+]
@@ -0,0 +1,405 @@
+"""Check every block of a library for mistakes, off the UI thread.
+
+:func:`lint_block` looks at one block: inputs the templates use but do not
+declare (and the reverse), placeholders that are almost but not quite
+``{輸入文字(n)}`` or ``{方塊(name)}``, and empty templates.
+:class:`LibraryLint` adds the one library-wide check, duplicate block names,
+and keeps the findings of a whole folder up to date one block at a time.
+
+A :class:`LintJob` checks a folder in batches on a thread pool, mostly
+reading ``block.json`` files.  Findings are cached by a hash of the block's
+content, and for folders the cache (``.lazy_block_lint.json``) also maps each
+file's mtime and size to that hash, so reopening a folder reads only the
+blocks that changed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .block_graph import BLOCK_REFERENCE_PATTERN
+from .blocks_model import Block
+from .blocks_storage import BlockEntry, BlockHandle, load_block
+from .template_compiler import INPUT_PATTERN
+
+_CACHE_FILE_NAME = ".lazy_block_lint.json"
+_CACHE_VERSION = 1
+_MAX_MALFORMED = 3
+
+_VALID_PLACEHOLDER = re.compile(f"{INPUT_PATTERN.pattern}|{BLOCK_REFERENCE_PATTERN.pattern}")
+# What is left of a placeholder once the valid ones are gone: wrong or
+# full-width brackets, a missing brace, a non-numeric index.
+# A near-miss placeholder has a brace on at least one side; without one,
+# "輸入文字(...)" is ordinary prose.
+_SUSPECT_PLACEHOLDER = re.compile(
+    r"\{\s*輸入文字\s*[(（][^)）}\n]{0,20}[)）]?\s*\}?"
+    r"|輸入文字\s*[(（][^)）}\n]{0,20}[)）]\s*\}"
+    r"|\{\s*方塊\s*[(（][^)）}\n]{0,40}[)）]?\s*\}?"
+)
+
+
+@dataclass(frozen=True)
+class LintFinding:
+    """One problem with a block; ``code`` is stable, ``message`` is for people."""
+
+    code: str
+    message: str
+
+
+def content_digest(block: Block) -> str:
+    """Hash of everything :func:`lint_block` looks at (not the name or display text)."""
+    content = json.dumps(
+        [block.input_template, block.output_template, list(block.inputs)], ensure_ascii=False
+    )
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _format_ids(ids: list[int]) -> str:
+    return ", ".join(str(idx) for idx in ids)
+
+
+def _malformed_placeholders(template: str) -> list[str]:
+    if "輸入文字" not in template and "方塊" not in template:
+        return []
+    remainder = _VALID_PLACEHOLDER.sub("\0", template)
+    return [match.group(0).strip() for match in _SUSPECT_PLACEHOLDER.finditer(remainder)]
+
+
+def lint_block(block: Block) -> tuple[LintFinding, ...]:
+    """Problems found in ``block`` on its own."""
+    findings: list[LintFinding] = []
+    validation = block.validate_inputs()
+    if validation.missing_inputs:
+        findings.append(
+            LintFinding(
+                "missing_input", f"模板使用了未宣告的輸入：{_format_ids(validation.missing_inputs)}"
+            )
+        )
+    if validation.unused_inputs:
+        findings.append(
+            LintFinding(
+                "unused_input", f"宣告了未使用的輸入：{_format_ids(validation.unused_inputs)}"
+            )
+        )
+    malformed = _malformed_placeholders(block.input_template)
+    malformed += _malformed_placeholders(block.output_template)
+    for text in list(dict.fromkeys(malformed))[:_MAX_MALFORMED]:
+        findings.append(LintFinding("malformed_placeholder", f"格式錯誤的佔位符：{text}"))
+    if not block.input_template.strip():
+        findings.append(LintFinding("empty_template", "顯示內容 (B 區) 是空的"))
+    if not block.output_template.strip():
+        findings.append(LintFinding("empty_template", "轉換內容 (C 區) 是空的"))
+    return tuple(findings)
+
+
+class LintCache:
+    """Findings by content hash, plus (for folders) each file's mtime and size → hash."""
+
+    def __init__(
+        self,
+        root_folder: Path | None = None,
+        files: dict[str, list] | None = None,
+        findings: dict[str, tuple[LintFinding, ...]] | None = None,
+    ) -> None:
+        self.root_folder = root_folder
+        self._files: dict[str, list] = files or {}
+        self._findings: dict[str, tuple[LintFinding, ...]] = findings or {}
+        self._dirty = False
+        # Writers lock; lookups from worker threads are plain dict reads.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root_folder: Path) -> "LintCache":
+        try:
+            with (root_folder / _CACHE_FILE_NAME).open("r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != _CACHE_VERSION:
+                return cls(root_folder)
+            findings = {
+                digest: tuple(LintFinding(code, message) for code, message in items)
+                for digest, items in data["findings"].items()
+            }
+            return cls(root_folder, dict(data["files"]), findings)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(root_folder)
+
+    def lookup_file(self, handle: BlockHandle) -> tuple[LintFinding, ...] | None:
+        """Findings for an unchanged ``block.json``, without reading it."""
+        entry = self._files.get(handle.entry_name)
+        if entry is None or entry[0] != handle.mtime_ns or entry[1] != handle.size:
+            return None
+        return self._findings.get(entry[2])
+
+    def lookup(self, digest: str) -> tuple[LintFinding, ...] | None:
+        return self._findings.get(digest)
+
+    def store(
+        self, digest: str, findings: tuple[LintFinding, ...], handle: BlockHandle | None = None
+    ) -> None:
+        with self._lock:
+            self._findings[digest] = findings
+            if handle is not None:
+                self._files[handle.entry_name] = [handle.mtime_ns, handle.size, digest]
+            self._dirty = True
+
+    def retain(self, entry_names: set[str], cancelled: threading.Event | None = None) -> bool:
+        """Forget files that are gone and findings no file uses any more.
+
+        Does nothing and returns ``False`` once ``cancelled`` is set: the
+        check is made under the lock, so a newer job sharing the cache never
+        loses its entries to an older job's view of the folder.
+        """
+        with self._lock:
+            if cancelled is not None and cancelled.is_set():
+                return False
+            stale = [name for name in self._files if name not in entry_names]
+            for name in stale:
+                del self._files[name]
+            if self.root_folder is None:
+                return True
+            used = {entry[2] for entry in self._files.values()}
+            unused = [digest for digest in self._findings if digest not in used]
+            for digest in unused:
+                del self._findings[digest]
+            self._dirty = self._dirty or bool(stale) or bool(unused)
+        return True
+
+    def save(self) -> None:
+        """Write the cache back if it changed; read-only folders are tolerated."""
+        if self.root_folder is None or not self._dirty:
+            return
+        path = self.root_folder / _CACHE_FILE_NAME
+        temp_path = path.with_suffix(".tmp")
+        with self._lock:
+            payload = {
+                "version": _CACHE_VERSION,
+                "files": dict(self._files),
+                "findings": {
+                    digest: [[finding.code, finding.message] for finding in findings]
+                    for digest, findings in self._findings.items()
+                },
+            }
+        try:
+            with temp_path.open("w", encoding="utf-8") as file:
+                json.dump(payload, file, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temp_path, path)
+        except OSError:
+            # Read-only folders are fine; a half-written temp file is not.
+            with contextlib.suppress(OSError):
+                temp_path.unlink()
+            return
+        self._dirty = False
+
+
+class LibraryLint:
+    """Findings for every entry of a library, updated as blocks change.
+
+    Keyed by entry name (the folder), reported by block name, which is what
+    the blocks panel shows; entries sharing a name are reported together
+    along with a ``duplicate_name`` finding.
+    """
+
+    def __init__(self) -> None:
+        self._findings: dict[str, tuple[LintFinding, ...]] = {}
+        self._names: dict[str, str] = {}
+        self._entries_by_name: dict[str, set[str]] = {}
+
+    def clear(self) -> None:
+        self._findings.clear()
+        self._names.clear()
+        self._entries_by_name.clear()
+
+    def update(self, entry_name: str, name: str, findings: tuple[LintFinding, ...]) -> set[str]:
+        """Record an entry's findings; return the block names whose findings changed."""
+        changed = self.remove(entry_name)
+        self._findings[entry_name] = findings
+        self._names[entry_name] = name
+        entries = self._entries_by_name.setdefault(name, set())
+        entries.add(entry_name)
+        if findings or len(entries) > 1:
+            changed.add(name)
+        return changed
+
+    def remove(self, entry_name: str) -> set[str]:
+        name = self._names.pop(entry_name, None)
+        if name is None:
+            return set()
+        findings = self._findings.pop(entry_name, ())
+        entries = self._entries_by_name[name]
+        entries.discard(entry_name)
+        if not entries:
+            del self._entries_by_name[name]
+        return {name} if findings or entries else set()
+
+    def findings(self, name: str) -> list[LintFinding]:
+        entries = sorted(self._entries_by_name.get(name, ()))
+        found: list[LintFinding] = []
+        if len(entries) > 1:
+            found.append(
+                LintFinding("duplicate_name", f"名稱重複：{len(entries)} 個資料夾使用「{name}」")
+            )
+        for entry_name in entries:
+            found.extend(self._findings[entry_name])
+        return list(dict.fromkeys(found))
+
+    def problem_count(self) -> int:
+        return sum(1 for name in self._entries_by_name if self.findings(name))
+
+
+@dataclass(frozen=True)
+class LintBatch:
+    """Findings for some entries, as ``(entry_name, block_name, findings)``."""
+
+    results: list[tuple[str, str, tuple[LintFinding, ...]]] = field(default_factory=list)
+    done: bool = False
+    error: Exception | None = None
+
+
+# One checked entry as a batch returns it: entry name, block name, findings,
+# plus the digest and handle to store when the cache did not know it.
+_Checked = tuple[str, str, tuple[LintFinding, ...], str | None, BlockHandle | None]
+
+
+class LintJob:
+    """One in-flight library check; poll :meth:`drain` from the UI thread."""
+
+    def __init__(
+        self,
+        entries: list[tuple[str, BlockEntry]],
+        cache: LintCache,
+        executor: ThreadPoolExecutor,
+        batch_size: int,
+    ) -> None:
+        self._entries = entries
+        self._cache = cache
+        self._executor = executor
+        self._batch_size = batch_size
+        self._cancelled = threading.Event()
+        self._results: queue.SimpleQueue[LintBatch] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="lazy-block-lint", daemon=True)
+
+    def start(self) -> "LintJob":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def drain(self) -> list[LintBatch]:
+        batches: list[LintBatch] = []
+        while True:
+            try:
+                batches.append(self._results.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def _run(self) -> None:
+        try:
+            self._check()
+        except Exception as exc:  # surfaced to the UI through the last batch
+            self._results.put(LintBatch(done=True, error=exc))
+
+    def _check(self) -> None:
+        chunks: list[Future[list[_Checked]]] = [
+            self._executor.submit(self._check_chunk, self._entries[start : start + self._batch_size])
+            for start in range(0, len(self._entries), self._batch_size)
+        ]
+        for chunk in chunks:
+            if self._cancelled.is_set():
+                for pending in chunks:
+                    pending.cancel()
+                return
+            results = []
+            # The cache is only written here, on the job's own thread.
+            for entry_name, name, findings, digest, handle in chunk.result():
+                if digest is not None:
+                    self._cache.store(digest, findings, handle)
+                results.append((entry_name, name, findings))
+            self._results.put(LintBatch(results))
+        if not self._cache.retain(
+            {entry_name for entry_name, _entry in self._entries}, self._cancelled
+        ):
+            return
+        self._cache.save()
+        self._results.put(LintBatch(done=True))
+
+    def _check_chunk(self, entries: list[tuple[str, BlockEntry]]) -> list[_Checked]:
+        checked: list[_Checked] = []
+        for entry_name, entry in entries:
+            if self._cancelled.is_set():
+                return []
+            handle = entry if isinstance(entry, BlockHandle) else None
+            if handle is not None:
+                findings = self._cache.lookup_file(handle)
+                if findings is not None:
+                    checked.append((entry_name, entry.name, findings, None, None))
+                    continue
+                try:
+                    # Straight from disk: a library-wide pass would only
+                    # churn the shared block cache.
+                    block = load_block(handle.folder)
+                except (OSError, ValueError, KeyError, TypeError) as exc:
+                    finding = LintFinding("unreadable", f"無法讀取方塊：{exc}")
+                    checked.append((entry_name, entry.name, (finding,), None, None))
+                    continue
+            else:
+                block = entry  # type: ignore[assignment]
+            digest = content_digest(block)
+            findings = self._cache.lookup(digest)
+            if findings is None:
+                findings = lint_block(block)
+            checked.append((entry_name, entry.name, findings, digest, handle))
+        return checked
+
+
+class BlockLinter:
+    """Owns the worker pool and makes sure only the latest check stays alive."""
+
+    def __init__(self, *, max_workers: int = 4, batch_size: int = 256) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="lazy-block-lint"
+        )
+        self._batch_size = batch_size
+        self._current: LintJob | None = None
+        self._caches: dict[Path | None, LintCache] = {}
+
+    def check(self, entries: list[tuple[str, BlockEntry]], root_folder: Path | None) -> LintJob:
+        """Check ``entries``, cancelling any check still running.
+
+        With ``root_folder`` the cache is kept in that folder; without, it
+        lives for the session only.
+        """
+        if self._current is not None:
+            self._current.cancel()
+        cache = self._caches.get(root_folder)
+        if cache is None:
+            cache = LintCache.load(root_folder) if root_folder is not None else LintCache()
+            self._caches = {root_folder: cache}
+        self._current = LintJob(entries, cache, self._executor, self._batch_size).start()
+        return self._current
+
+    def shutdown(self) -> None:
+        if self._current is not None:
+            self._current.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = [
+    "BlockLinter",
+    "LibraryLint",
+    "LintBatch",
+    "LintCache",
+    "LintFinding",
+    "LintJob",
+    "content_digest",
+    "lint_block",
+]
@@ -0,0 +1,172 @@
+"""In-memory search over block names and display texts.
+
+Two structures answer a query:
+
+* a prefix index, a sorted array of ``(key, name)`` pairs searched with
+  ``bisect``, for queries that start a name or display text;
+* an n-gram index mapping every character and character bigram of a
+  display text to the blocks containing it, for substrings anywhere (CJK
+  display texts have no word boundaries to index on).  Names are ASCII-ish
+  folder names and only get the prefix index.
+
+Keys are case folded.  Both structures are updated per block, so adding or
+removing one block does not rebuild anything.
+"""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, insort
+from typing import Iterable
+
+from .blocks_storage import BlockEntry
+
+
+# Substring candidates are verified and ranked up to this many times the
+# result limit, which keeps very common n-grams from scanning the library.
+_CANDIDATE_FACTOR = 4
+
+
+def _search_keys(block: BlockEntry) -> tuple[str, ...]:
+    # The last key is the display text (or the name when there is none) and
+    # is the one the n-gram index covers.
+    name = block.name.casefold()
+    display = block.display_text.casefold()
+    return (name,) if display == name or not display else (name, display)
+
+
+def _grams(text: str) -> set[str]:
+    grams = set(text)
+    grams.update(text[i : i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class BlockSearchIndex:
+    """Rank blocks for an as-you-type query.
+
+    Exact matches come first, then keys starting with the query (in key
+    order), then keys containing it, earliest and shortest match first.
+    """
+
+    def __init__(self, blocks: Iterable[BlockEntry] = ()) -> None:
+        self._keys: dict[str, tuple[str, ...]] = {}
+        self._prefix: list[tuple[str, str]] = []
+        self._prefix_sorted = True
+        self._postings: dict[str, set[str]] = {}
+        self.update(blocks)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._keys
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._prefix.clear()
+        self._prefix_sorted = True
+        self._postings.clear()
+
+    def add(self, block: BlockEntry) -> None:
+        """Index ``block``, replacing an earlier block with the same name."""
+        self._add(block, bulk=False)
+
+    def update(self, blocks: Iterable[BlockEntry]) -> None:
+        """Index many blocks; the prefix array is sorted once, on the next query."""
+        for block in blocks:
+            self._add(block, bulk=True)
+
+    def _add(self, block: BlockEntry, *, bulk: bool) -> None:
+        keys = _search_keys(block)
+        if self._keys.get(block.name) == keys:
+            return
+        self.remove(block.name)
+        self._keys[block.name] = keys
+        for key in keys:
+            if bulk or not self._prefix_sorted:
+                self._prefix.append((key, block.name))
+                self._prefix_sorted = False
+            else:
+                insort(self._prefix, (key, block.name))
+        postings = self._postings
+        for gram in _grams(keys[-1]):
+            names = postings.get(gram)
+            if names is None:
+                postings[gram] = {block.name}
+            else:
+                names.add(block.name)
+
+    def remove(self, name: str) -> bool:
+        keys = self._keys.pop(name, None)
+        if keys is None:
+            return False
+        self._ensure_sorted()
+        for key in keys:
+            position = bisect_left(self._prefix, (key, name))
+            if position < len(self._prefix) and self._prefix[position] == (key, name):
+                del self._prefix[position]
+        for gram in _grams(keys[-1]):
+            names = self._postings.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._postings[gram]
+        return True
+
+    def search(self, query: str, limit: int = 200) -> list[str]:
+        """Return the names of up to ``limit`` matching blocks, best first."""
+        needle = query.strip().casefold()
+        if not needle or limit <= 0:
+            return []
+        results: dict[str, None] = {}
+        self._collect_prefix(needle, limit, results)
+        if len(results) < limit:
+            self._collect_substring(needle, limit, results)
+        return list(results)
+
+    def _ensure_sorted(self) -> None:
+        if not self._prefix_sorted:
+            self._prefix.sort()
+            self._prefix_sorted = True
+
+    def _collect_prefix(self, needle: str, limit: int, results: dict[str, None]) -> None:
+        self._ensure_sorted()
+        prefix = self._prefix
+        position = bisect_left(prefix, (needle, ""))
+        while position < len(prefix) and len(results) < limit:
+            key, name = prefix[position]
+            if not key.startswith(needle):
+                break
+            results[name] = None
+            position += 1
+
+    def _collect_substring(self, needle: str, limit: int, results: dict[str, None]) -> None:
+        grams = [needle] if len(needle) <= 2 else [
+            needle[i : i + 2] for i in range(len(needle) - 1)
+        ]
+        postings = [self._postings.get(gram) for gram in grams]
+        if not all(postings):
+            return
+        postings.sort(key=len)
+        candidates = postings[0]
+        if len(postings) > 1:
+            candidates = candidates.intersection(*postings[1:])
+        # Longer queries only share every bigram with a candidate, so each
+        # candidate is confirmed with a plain ``find`` while ranking it.
+        budget = (limit - len(results)) * _CANDIDATE_FACTOR
+        ranked: list[tuple[int, int, str]] = []
+        for name in candidates:
+            if name in results:
+                continue
+            display = self._keys[name][-1]
+            at = display.find(needle)
+            if at < 0:
+                continue
+            ranked.append((at, len(display), name))
+            if len(ranked) >= budget:
+                break
+        for _at, _length, name in heapq.nsmallest(limit - len(results), ranked):
+            results[name] = None
+
+
+__all__ = ["BlockSearchIndex"]
@@ -0,0 +1,169 @@
+"""Load block folders off the UI thread and hand results over in batches."""
+
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .blocks_storage import (
+    BlockFileStat,
+    BlockFolderIndex,
+    BlockHandle,
+    load_indexed_handles,
+    scan_block_files,
+)
+from .blocks_watcher import BlockFolderWatcher
+
+
+@dataclass(frozen=True)
+class LoadBatch:
+    """Progress report from a :class:`FolderLoadJob`.
+
+    ``total`` is ``None`` until the folder scan finished.  The final batch has
+    ``done`` set and carries ``error`` if loading failed.
+    """
+
+    entries: list[BlockHandle] = field(default_factory=list)
+    loaded: int = 0
+    total: int | None = None
+    done: bool = False
+    error: Exception | None = None
+
+
+class FolderLoadJob:
+    """One in-flight folder load; poll :meth:`drain` from the UI thread.
+
+    With ``watch`` set the job also starts a :class:`BlockFolderWatcher` from
+    its own scan, so changes made while the folder loads are not lost.  Claim
+    it with :meth:`take_watcher` once the last batch arrived; a cancelled job
+    closes its watcher itself.
+    """
+
+    def __init__(
+        self,
+        root_folder: Path,
+        executor: ThreadPoolExecutor,
+        batch_size: int,
+        *,
+        watch: bool = False,
+    ) -> None:
+        self.root_folder = root_folder
+        self.stats: list[BlockFileStat] = []
+        self._executor = executor
+        self._batch_size = batch_size
+        self._watch = watch
+        self._watcher: BlockFolderWatcher | None = None
+        self._watcher_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._results: queue.SimpleQueue[LoadBatch] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name=f"lazy-block-load:{root_folder.name}", daemon=True
+        )
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> "FolderLoadJob":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        with self._watcher_lock:
+            self._cancelled.set()
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+    def take_watcher(self) -> BlockFolderWatcher | None:
+        with self._watcher_lock:
+            watcher, self._watcher = self._watcher, None
+        return watcher
+
+    def drain(self, limit: int | None = None) -> list[LoadBatch]:
+        """Return up to ``limit`` batches that are ready, without blocking."""
+        batches: list[LoadBatch] = []
+        while limit is None or len(batches) < limit:
+            try:
+                batches.append(self._results.get_nowait())
+            except queue.Empty:
+                break
+        return batches
+
+    def _run(self) -> None:
+        try:
+            self._load()
+        except Exception as exc:  # surfaced to the UI through the last batch
+            self._results.put(LoadBatch(done=True, error=exc))
+
+    def _load(self) -> None:
+        if not self.root_folder.exists():
+            self._results.put(LoadBatch(total=0, done=True))
+            return
+        index = BlockFolderIndex.load(self.root_folder)
+        stats = scan_block_files(self.root_folder)
+        self.stats = stats
+        if self._watch:
+            watcher = BlockFolderWatcher(self.root_folder, initial_stats=stats)
+            with self._watcher_lock:
+                if self.cancelled:
+                    watcher.close()
+                else:
+                    self._watcher = watcher
+        total = len(stats)
+        chunks: list[Future[list[BlockHandle]]] = [
+            self._executor.submit(
+                self._load_chunk, index, stats[start : start + self._batch_size]
+            )
+            for start in range(0, total, self._batch_size)
+        ]
+        loaded = 0
+        for chunk in chunks:
+            if self.cancelled:
+                for pending in chunks:
+                    pending.cancel()
+                return
+            entries = chunk.result()
+            loaded += len(entries)
+            self._results.put(LoadBatch(entries=entries, loaded=loaded, total=total))
+        index.retain({stat.entry_name for stat in stats})
+        index.save()
+        self._results.put(LoadBatch(loaded=loaded, total=total, done=True))
+
+    def _load_chunk(
+        self, index: BlockFolderIndex, stats: list[BlockFileStat]
+    ) -> list[BlockHandle]:
+        if self.cancelled:
+            return []
+        return load_indexed_handles(index, stats)
+
+
+class FolderLoader:
+    """Owns the worker pool and makes sure only the latest load stays alive."""
+
+    def __init__(self, *, max_workers: int = 4, batch_size: int = 256) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="lazy-block-io"
+        )
+        self._batch_size = batch_size
+        self._current: FolderLoadJob | None = None
+
+    def load(self, root_folder: Path, *, watch: bool = False) -> FolderLoadJob:
+        """Start loading ``root_folder``, cancelling any load still running."""
+        if self._current is not None:
+            self._current.cancel()
+        self._current = FolderLoadJob(
+            root_folder, self._executor, self._batch_size, watch=watch
+        ).start()
+        return self._current
+
+    def shutdown(self) -> None:
+        if self._current is not None:
+            self._current.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["FolderLoadJob", "FolderLoader", "LoadBatch"]
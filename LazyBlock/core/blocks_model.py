@@ -1,10 +1,30 @@
 from __future__ import annotations
 
-import re
+import sys
 from dataclasses import dataclass, field
+from typing import Iterable
 
+from .template_compiler import CompiledTemplate, compile_template
 
-_INPUT_PATTERN = re.compile(r"\{輸入文字\((\d+)\)\}")
+
+# Blocks mostly declare the same few input lists; share one tuple per list.
+# Starting over once the table is full keeps odd libraries from growing it
+# without bound; blocks keep the tuples they already have.
+_SHARED_INPUTS: dict[tuple[int, ...], tuple[int, ...]] = {}
+_SHARED_INPUTS_LIMIT = 4096
+
+_TEXT_FIELDS = ("name", "display_text", "input_template", "output_template")
+
+
+def _shared_inputs(values: Iterable[int]) -> tuple[int, ...]:
+    inputs = tuple(sorted(set(values)))
+    shared = _SHARED_INPUTS.get(inputs)
+    if shared is not None:
+        return shared
+    if len(_SHARED_INPUTS) >= _SHARED_INPUTS_LIMIT:
+        _SHARED_INPUTS.clear()
+    _SHARED_INPUTS[inputs] = inputs
+    return inputs
 
 
 @dataclass(frozen=True)
@@ -19,26 +39,61 @@ class BlockValidation:
         return not self.missing_inputs and not self.unused_inputs
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Block:
+    """One block definition.
+
+    Blocks are immutable and slotted so large libraries stay small: strings
+    are interned (libraries repeat the same templates a lot), ``inputs`` is a
+    sorted, shared tuple, and the inputs the templates use are computed on first
+    access.  Use :func:`dataclasses.replace` to derive a changed block.
+    """
+
     name: str
     display_text: str
     input_template: str
     output_template: str
-    inputs: list[int] = field(default_factory=list)
-
-    def __post_init__(self) -> None:
-        # Keep the inputs list deterministic and deduplicated.
-        self.inputs = sorted(dict.fromkeys(self.inputs))
+    inputs: tuple[int, ...] = ()
+    _used_inputs: tuple[int, ...] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __init__(
+        self,
+        name: str,
+        display_text: str,
+        input_template: str,
+        output_template: str,
+        inputs: Iterable[int] = (),
+    ) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, "name", sys.intern(name))
+        setattr_(self, "display_text", sys.intern(display_text))
+        setattr_(self, "input_template", sys.intern(input_template))
+        setattr_(self, "output_template", sys.intern(output_template))
+        # Keep the inputs deterministic and deduplicated.
+        setattr_(self, "inputs", _shared_inputs(inputs))
+        setattr_(self, "_used_inputs", None)
 
     @classmethod
     def from_dict(cls, data: dict) -> "Block":
+        """Build a block from its JSON form; ``ValueError`` names a bad field."""
+        if not isinstance(data, dict):
+            raise ValueError("方塊資料格式錯誤")
+        for key in _TEXT_FIELDS:
+            if not isinstance(data.get(key), str):
+                raise ValueError(f"方塊欄位格式錯誤: {key}")
+        inputs = data.get("inputs", ())
+        if not isinstance(inputs, (list, tuple)) or not all(
+            isinstance(value, int) and not isinstance(value, bool) for value in inputs
+        ):
+            raise ValueError("方塊欄位格式錯誤: inputs")
         return cls(
             name=data["name"],
             display_text=data["display_text"],
             input_template=data["input_template"],
             output_template=data["output_template"],
-            inputs=list(data.get("inputs", [])),
+            inputs=inputs,
         )
 
     def to_dict(self) -> dict:
@@ -50,16 +105,34 @@ class Block:
             "inputs": list(self.inputs),
         }
 
+    @property
+    def compiled_input_template(self) -> CompiledTemplate:
+        return compile_template(self.input_template or "")
+
+    @property
+    def compiled_output_template(self) -> CompiledTemplate:
+        return compile_template(self.output_template or "")
+
+    @property
+    def used_inputs(self) -> tuple[int, ...]:
+        """Sorted input ids referenced by either template, cached per block."""
+        used = self._used_inputs
+        if used is None:
+            values = set(self.compiled_input_template.input_ids)
+            values.update(self.compiled_output_template.input_ids)
+            used = _shared_inputs(values)
+            object.__setattr__(self, "_used_inputs", used)
+        return used
+
     def get_used_inputs_from_templates(self) -> list[int]:
-        values = set(_INPUT_PATTERN.findall(self.input_template))
-        values.update(_INPUT_PATTERN.findall(self.output_template))
-        return sorted(int(v) for v in values)
+        return list(self.used_inputs)
 
     def validate_inputs(self) -> BlockValidation:
-        required = self.get_used_inputs_from_templates()
-        declared = list(self.inputs)
+        required = self.used_inputs
+        declared = set(self.inputs)
+        required_set = set(required)
         missing = [idx for idx in required if idx not in declared]
-        unused = [idx for idx in declared if idx not in required]
+        unused = [idx for idx in self.inputs if idx not in required_set]
         return BlockValidation(missing_inputs=missing, unused_inputs=unused)
 
 
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import contextlib
 import json
+import os
 import shutil
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from pathlib import Path
 
+from . import perf
 from .blocks_model import Block
 
 
 _BLOCK_FILE_NAME = "block.json"
+_INDEX_FILE_NAME = ".lazy_block_index.json"
+_INDEX_VERSION = 3
+_BLOCK_CACHE_BYTES = 32 * 1024 * 1024
 
 
+@perf.timed("storage.load_block")
 def load_block(block_folder: Path) -> Block:
     """Read a block definition from ``block.json`` inside the folder."""
     block_file = block_folder / _BLOCK_FILE_NAME
@@ -18,12 +28,49 @@ def load_block(block_folder: Path) -> Block:
     return Block.from_dict(data)
 
 
-def save_block(block: Block, block_folder: Path) -> None:
-    """Persist the block definition to its folder."""
+def write_block_file(block: Block, block_folder: Path) -> Path:
+    """Write ``block`` next to its ``block.json`` without syncing; return the temp file.
+
+    Nothing is visible to readers until :func:`commit_block_files` moves the
+    temp file into place.
+    """
     block_folder.mkdir(parents=True, exist_ok=True)
-    block_file = block_folder / _BLOCK_FILE_NAME
-    with block_file.open("w", encoding="utf-8") as file:
+    temp_path = block_folder / (_BLOCK_FILE_NAME + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as file:
         json.dump(block.to_dict(), file, ensure_ascii=False, indent=2)
+    return temp_path
+
+
+def _fsync_path(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY if path.is_dir() else os.O_RDWR)
+    except OSError:
+        # Windows cannot open directories; their entries are durable anyway.
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def commit_block_files(temp_paths: list[Path]) -> None:
+    """Make temp files from :func:`write_block_file` durable and move them into place.
+
+    All files are synced before the first rename, and each folder once after
+    the last, so a batch pays for one round of syncs.  A crash leaves every
+    ``block.json`` either old or new, never truncated.
+    """
+    for temp_path in temp_paths:
+        _fsync_path(temp_path)
+    for temp_path in temp_paths:
+        os.replace(temp_path, temp_path.with_name(_BLOCK_FILE_NAME))
+    for folder in dict.fromkeys(temp_path.parent for temp_path in temp_paths):
+        _fsync_path(folder)
+
+
+def save_block(block: Block, block_folder: Path) -> None:
+    """Persist the block definition to its folder, atomically."""
+    commit_block_files([write_block_file(block, block_folder)])
 
 
 def delete_block(block_folder: Path) -> None:
@@ -39,26 +86,282 @@ def rename_block_folder(block_folder: Path, new_name: str) -> Path:
     new_folder = block_folder.with_name(new_name)
     if new_folder.exists():
         raise FileExistsError(f"目標資料夾已存在: {new_folder}")
-    shutil.move(str(block_folder), str(new_folder))
-    block = load_block(new_folder)
-    block.name = new_name
+    block = replace(load_block(block_folder), name=new_name)
+    # A sibling rename is atomic, unlike shutil.move's copy fallback.
+    os.rename(block_folder, new_folder)
     save_block(block, new_folder)
     return new_folder
 
 
-def list_block_folder_entries(root_folder: Path) -> list[tuple[Block, Path]]:
-    """Enumerate blocks with their backing folders."""
+@dataclass(frozen=True, slots=True)
+class BlockFileStat:
+    """Identity of one ``block.json`` as seen by a folder scan."""
+
+    entry_name: str
+    root_folder: Path
+    mtime_ns: int
+    size: int
+
+    @property
+    def folder(self) -> Path:
+        return self.root_folder / self.entry_name
+
+
+def stat_block_file(root_folder: Path, entry_name: str) -> BlockFileStat | None:
+    """Stat one block folder's ``block.json``; ``None`` if it is gone."""
+    try:
+        info = os.stat(root_folder / entry_name / _BLOCK_FILE_NAME)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return BlockFileStat(entry_name, root_folder, info.st_mtime_ns, info.st_size)
+
+
+@perf.timed("storage.scan_block_files")
+def scan_block_files(root_folder: Path) -> list[BlockFileStat]:
+    """List block folders with one ``scandir`` pass and a ``stat`` per block file.
+
+    The stat is what notices a ``block.json`` rewritten in place, which
+    leaves every directory mtime alone; it is also most of the cost, so the
+    loop builds no :class:`~pathlib.Path` objects.
+    """
+    stats: list[BlockFileStat] = []
+    try:
+        iterator = os.scandir(root_folder)
+    except FileNotFoundError:
+        return stats
+    suffix = os.sep + _BLOCK_FILE_NAME
+    append = stats.append
+    with iterator:
+        for entry in iterator:
+            if not entry.is_dir():
+                continue
+            try:
+                info = os.stat(entry.path + suffix)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            append(BlockFileStat(entry.name, root_folder, info.st_mtime_ns, info.st_size))
+    return stats
+
+
+@dataclass(frozen=True, slots=True)
+class BlockHandle:
+    """Name and display text of a block whose templates stay on disk.
+
+    Listing a folder only needs these two strings; :meth:`load` reads the
+    full block when something actually renders it, through the shared
+    :data:`block_cache`.
+    """
+
+    name: str
+    display_text: str
+    root_folder: Path
+    entry_name: str
+    mtime_ns: int
+    size: int
+
+    @property
+    def folder(self) -> Path:
+        return self.root_folder / self.entry_name
+
+    def load(self) -> Block:
+        return block_cache.get(self)
+
+
+BlockEntry = Block | BlockHandle
+
+
+def resolve_block(entry: BlockEntry) -> Block:
+    """Return the full block behind ``entry``, loading a handle's templates."""
+    return entry.load() if isinstance(entry, BlockHandle) else entry
+
+
+def block_revision(entry: BlockEntry) -> tuple:
+    """Cheap value that changes whenever the block behind ``entry`` changes."""
+    if isinstance(entry, BlockHandle):
+        return (entry.display_text, entry.mtime_ns, entry.size)
+    return (entry.display_text, entry.input_template, entry.output_template, entry.inputs)
+
+
+class BlockCache:
+    """Bounded LRU of fully loaded blocks, weighted by ``block.json`` size."""
+
+    def __init__(self, max_bytes: int = _BLOCK_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._blocks: OrderedDict[tuple[Path, str, int, int], Block] = OrderedDict()
+        self._sizes: dict[tuple[Path, str, int, int], int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def get(self, handle: BlockHandle) -> Block:
+        key = (handle.root_folder, handle.entry_name, handle.mtime_ns, handle.size)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+        block = load_block(handle.folder)
+        with self._lock:
+            if key not in self._blocks:
+                self._blocks[key] = block
+                self._sizes[key] = handle.size
+                self._bytes += handle.size
+            while self._bytes > self.max_bytes and len(self._blocks) > 1:
+                evicted, _block = self._blocks.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+        return block
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+
+block_cache = BlockCache()
+
+
+def read_block_handle(stat: BlockFileStat) -> BlockHandle:
+    """Parse ``block.json`` once and keep only what a listing needs."""
+    block = load_block(stat.folder)
+    return BlockHandle(
+        block.name,
+        block.display_text,
+        stat.root_folder,
+        stat.entry_name,
+        stat.mtime_ns,
+        stat.size,
+    )
+
+
+class BlockFolderIndex:
+    """On-disk cache of block names and display texts for one block folder.
+
+    Entries are keyed by folder name and trusted only while the block file's
+    mtime and size still match, so edits made outside the app are re-read.
+    Templates are not cached here; they can be large and are loaded on demand.
+    Each entry is a ``[mtime_ns, size, name, display_text]`` list, which
+    parses faster than an object per block.
+    """
+
+    def __init__(self, root_folder: Path, entries: dict[str, list] | None = None) -> None:
+        self.root_folder = root_folder
+        self._entries: dict[str, list] = entries or {}
+        self._dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self.root_folder / _INDEX_FILE_NAME
+
+    @classmethod
+    def load(cls, root_folder: Path) -> "BlockFolderIndex":
+        try:
+            with (root_folder / _INDEX_FILE_NAME).open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(root_folder)
+        if not isinstance(data, dict) or data.get("version") != _INDEX_VERSION:
+            return cls(root_folder)
+        return cls(root_folder, dict(data.get("entries", {})))
+
+    def lookup(self, stat: BlockFileStat) -> BlockHandle | None:
+        """Return a handle for the cached entry if ``stat`` still matches, else ``None``."""
+        try:
+            mtime_ns, size, name, display_text = self._entries[stat.entry_name]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if mtime_ns != stat.mtime_ns or size != stat.size:
+            return None
+        if not isinstance(name, str) or not isinstance(display_text, str):
+            return None
+        return BlockHandle(name, display_text, stat.root_folder, stat.entry_name, mtime_ns, size)
+
+    def store(self, handle: BlockHandle) -> None:
+        self._entries[handle.entry_name] = [
+            handle.mtime_ns,
+            handle.size,
+            handle.name,
+            handle.display_text,
+        ]
+        self._dirty = True
+
+    def retain(self, entry_names: set[str]) -> None:
+        """Drop entries for block folders that no longer exist."""
+        stale = [name for name in self._entries if name not in entry_names]
+        for name in stale:
+            del self._entries[name]
+        self._dirty = self._dirty or bool(stale)
+
+    def save(self) -> None:
+        """Write the index back if it changed; read-only folders are tolerated."""
+        if not self._dirty:
+            return
+        temp_path = self.path.with_suffix(".tmp")
+        try:
+            with temp_path.open("w", encoding="utf-8") as file:
+                json.dump(
+                    {"version": _INDEX_VERSION, "entries": self._entries},
+                    file,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+            os.replace(temp_path, self.path)
+        except OSError:
+            # Read-only folders are fine; a half-written temp file is not.
+            with contextlib.suppress(OSError):
+                temp_path.unlink()
+            return
+        self._dirty = False
+
+
+def load_indexed_handles(index: BlockFolderIndex, stats: list[BlockFileStat]) -> list[BlockHandle]:
+    """Resolve scanned block files, parsing only those the index cannot vouch for."""
+    handles: list[BlockHandle] = []
+    misses = 0
+    for stat in stats:
+        handle = index.lookup(stat)
+        if handle is None:
+            handle = read_block_handle(stat)
+            index.store(handle)
+            misses += 1
+        handles.append(handle)
+    perf.count("storage.index_hits", len(stats) - misses)
+    perf.count("storage.index_misses", misses)
+    return handles
+
+
+@perf.timed("storage.list_block_handles")
+def list_block_handles(root_folder: Path) -> list[BlockHandle]:
+    """Enumerate a folder's blocks without loading their templates.
+
+    Unchanged blocks come from the folder's index; only new or modified
+    ``block.json`` files are parsed.
+    """
     if not root_folder.exists():
         return []
 
-    entries: list[tuple[Block, Path]] = []
-    for child in root_folder.iterdir():
-        if not child.is_dir():
-            continue
-        block_file = child / _BLOCK_FILE_NAME
-        if block_file.is_file():
-            entries.append((load_block(child), child))
-    return entries
+    index = BlockFolderIndex.load(root_folder)
+    stats = scan_block_files(root_folder)
+    handles = load_indexed_handles(index, stats)
+    index.retain({stat.entry_name for stat in stats})
+    index.save()
+    return handles
+
+
+def list_block_folder_entries(root_folder: Path) -> list[tuple[Block, Path]]:
+    """Enumerate fully loaded blocks with their backing folders.
+
+    The listing goes through the folder index like :func:`list_block_handles`;
+    templates come from :data:`block_cache`, so a block is parsed once per
+    change rather than once per call.
+    """
+    return [(block_cache.get(handle), handle.folder) for handle in list_block_handles(root_folder)]
 
 
 def list_blocks_in_folder(root_folder: Path) -> list[Block]:
@@ -67,8 +370,23 @@ def list_blocks_in_folder(root_folder: Path) -> list[Block]:
 
 
 __all__ = [
+    "BlockCache",
+    "BlockEntry",
+    "BlockFileStat",
+    "BlockFolderIndex",
+    "BlockHandle",
+    "block_cache",
+    "block_revision",
+    "list_block_handles",
+    "load_indexed_handles",
+    "read_block_handle",
+    "resolve_block",
+    "scan_block_files",
+    "stat_block_file",
     "load_block",
     "save_block",
+    "write_block_file",
+    "commit_block_files",
     "delete_block",
     "rename_block_folder",
     "list_block_folder_entries",
@@ -0,0 +1,222 @@
+"""Change notifications for a block folder.
+
+On Linux the watcher asks inotify which block folders were touched and only
+re-checks those.  Elsewhere, or when inotify is unavailable or runs out of
+watches, it falls back to comparing ``scan_block_files`` snapshots.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from .blocks_storage import (
+    BlockEntry,
+    BlockFileStat,
+    read_block_handle,
+    scan_block_files,
+    stat_block_file,
+)
+
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_ENTRY_MASK = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+_ROOT_MASK = _ENTRY_MASK | _IN_DELETE_SELF | _IN_MOVE_SELF
+_BLOCK_MASK = _ENTRY_MASK | _IN_CLOSE_WRITE | _IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class BlockChange:
+    """One block folder that appeared, disappeared or changed on disk.
+
+    ``folder`` is ``None`` for changes to a library that is not a folder.
+    """
+
+    kind: str
+    entry_name: str
+    folder: Path | None
+    block: BlockEntry | None = None
+
+
+class _Inotify:
+    """Minimal ctypes binding; raises ``OSError`` when inotify is unusable."""
+
+    def __init__(self) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        return wd
+
+    def read(self) -> list[tuple[int, int, str]]:
+        events: list[tuple[int, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class BlockFolderWatcher:
+    """Report ``added``/``removed``/``modified`` block folders under ``root_folder``.
+
+    Nothing runs in the background: call :meth:`poll` periodically (the UI
+    does so through ``after()``) and apply the returned changes.
+    """
+
+    def __init__(
+        self,
+        root_folder: Path,
+        *,
+        use_inotify: bool = True,
+        initial_stats: Iterable[BlockFileStat] | None = None,
+    ) -> None:
+        """``initial_stats`` reuses a scan the caller already made."""
+        self.root_folder = root_folder
+        if initial_stats is None:
+            initial_stats = scan_block_files(root_folder)
+        self._snapshot = {stat.entry_name: stat for stat in initial_stats}
+        self._inotify: _Inotify | None = None
+        self._watched: dict[int, str] = {}
+        self._pending: set[str] = set()
+        if use_inotify:
+            try:
+                self._start_inotify()
+            except OSError:
+                self._stop_inotify()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    @property
+    def poll_interval_ms(self) -> int:
+        return 250 if self._inotify is not None else 2000
+
+    def _start_inotify(self) -> None:
+        self._inotify = _Inotify()
+        self._root_wd = self._inotify.add_watch(self.root_folder, _ROOT_MASK | _IN_ONLYDIR)
+        for entry_name in self._snapshot:
+            self._watch_block_folder(entry_name)
+
+    def _stop_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._watched.clear()
+
+    def _watch_block_folder(self, entry_name: str) -> None:
+        assert self._inotify is not None
+        try:
+            wd = self._inotify.add_watch(self.root_folder / entry_name, _BLOCK_MASK | _IN_ONLYDIR)
+        except FileNotFoundError:
+            return
+        self._watched[wd] = entry_name
+
+    def close(self) -> None:
+        self._stop_inotify()
+
+    def poll(self) -> list[BlockChange]:
+        """Return the changes since the previous call."""
+        if self._inotify is None:
+            return self._rescan()
+        touched = set(self._pending)
+        self._pending.clear()
+        for wd, mask, name in self._inotify.read():
+            if mask & _IN_Q_OVERFLOW:
+                return self._rescan()
+            if wd == self._root_wd:
+                if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                    self._stop_inotify()
+                    return self._rescan()
+                if mask & _IN_ISDIR:
+                    touched.add(name)
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        try:
+                            self._watch_block_folder(name)
+                        except OSError:
+                            # Out of watches: keep going by polling instead.
+                            self._stop_inotify()
+                            return self._rescan()
+            elif mask & _IN_IGNORED:
+                self._watched.pop(wd, None)
+            elif wd in self._watched:
+                touched.add(self._watched[wd])
+        return self._check(touched)
+
+    def _check(self, entry_names: set[str]) -> list[BlockChange]:
+        return self._diff(
+            {name: stat_block_file(self.root_folder, name) for name in entry_names}
+        )
+
+    def _rescan(self) -> list[BlockChange]:
+        self._pending.clear()
+        current = {stat.entry_name: stat for stat in scan_block_files(self.root_folder)}
+        candidates: dict[str, BlockFileStat | None] = dict.fromkeys(self._snapshot)
+        candidates.update(current)
+        return self._diff(candidates)
+
+    def _diff(self, candidates: dict[str, BlockFileStat | None]) -> list[BlockChange]:
+        changes: list[BlockChange] = []
+        for entry_name, stat in sorted(candidates.items()):
+            previous = self._snapshot.get(entry_name)
+            if stat is None:
+                if previous is not None:
+                    del self._snapshot[entry_name]
+                    changes.append(BlockChange("removed", entry_name, previous.folder))
+                continue
+            if previous is not None and (previous.mtime_ns, previous.size) == (
+                stat.mtime_ns,
+                stat.size,
+            ):
+                continue
+            try:
+                block = read_block_handle(stat)
+            except (OSError, ValueError, KeyError):
+                # Most likely caught mid-write; look again on the next poll.
+                self._pending.add(entry_name)
+                continue
+            self._snapshot[entry_name] = stat
+            kind = "added" if previous is None else "modified"
+            changes.append(BlockChange(kind, entry_name, stat.folder, block))
+        return changes
+
+
+__all__ = ["BlockChange", "BlockFolderWatcher"]
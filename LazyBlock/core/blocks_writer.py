@@ -0,0 +1,187 @@
+"""Apply block saves, renames and deletes on a background thread.
+
+The UI queues an operation, updates itself at once and checks the returned
+future later.  Operations run in the order they were queued, with two
+shortcuts: a save replaces a still-queued save of the same entry (nothing
+in between touched that entry), and consecutive saves are written as one
+batch through :meth:`BlockStorage.save_many
+<core.storage_backend.BlockStorage.save_many>`, so a burst of edits costs
+one round of syncs.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from . import perf
+from .blocks_model import Block
+from .storage_backend import BlockStorage
+
+# How long a write waits for more writes to join its batch.
+_BATCH_DELAY_S = 0.05
+
+
+@dataclass
+class _Operation:
+    kind: str  # "save", "rename" or "delete"
+    entry_name: str
+    block: Block | None = None
+    new_name: str | None = None
+    future: Future = field(default_factory=Future)
+
+
+class BlockWriter:
+    """Single writer thread in front of a :class:`~core.storage_backend.BlockStorage`."""
+
+    def __init__(self, storage: BlockStorage, *, batch_delay_s: float = _BATCH_DELAY_S) -> None:
+        self.storage = storage
+        self._batch_delay_s = batch_delay_s
+        self._queue: deque[_Operation] = deque()
+        # Queued saves that a later save of the same entry may still replace.
+        self._open_saves: dict[str, _Operation] = {}
+        # Entries with queued or running operations, and how many.
+        self._busy: dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="lazy-block-writer", daemon=True)
+        self._thread.start()
+
+    def save(self, block: Block, entry_name: str | None = None) -> Future[str]:
+        """Queue writing ``block``; the future gives its entry name."""
+        entry_name = entry_name or block.name
+        with self._condition:
+            queued = self._open_saves.get(entry_name)
+            if queued is not None:
+                queued.block = block
+                perf.count("storage.writes_coalesced")
+                return queued.future
+            operation = self._enqueue(_Operation("save", entry_name, block))
+            self._open_saves[entry_name] = operation
+            return operation.future
+
+    def rename(self, entry_name: str, new_name: str) -> Future[str]:
+        """Queue renaming an entry; the future gives the new entry name."""
+        with self._condition:
+            self._open_saves.pop(entry_name, None)
+            self._open_saves.pop(new_name, None)
+            return self._enqueue(_Operation("rename", entry_name, new_name=new_name)).future
+
+    def delete(self, entry_name: str) -> Future[None]:
+        with self._condition:
+            self._open_saves.pop(entry_name, None)
+            return self._enqueue(_Operation("delete", entry_name)).future
+
+    def is_pending(self, entry_name: str) -> bool:
+        """Whether an operation on ``entry_name`` has not finished yet."""
+        with self._condition:
+            return entry_name in self._busy
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued operation finished; ``False`` on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._busy, timeout)
+
+    def close(self) -> None:
+        """Finish the queued operations and stop the thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _enqueue(self, operation: _Operation) -> _Operation:
+        if self._closed:
+            raise RuntimeError("BlockWriter is closed")
+        for name in self._names(operation):
+            self._busy[name] = self._busy.get(name, 0) + 1
+        self._queue.append(operation)
+        self._condition.notify_all()
+        return operation
+
+    @staticmethod
+    def _names(operation: _Operation) -> tuple[str, ...]:
+        if operation.new_name is None:
+            return (operation.entry_name,)
+        return (operation.entry_name, operation.new_name)
+
+    def _take(self) -> list[_Operation] | None:
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue or self._closed)
+            if not self._queue:
+                return None
+            # Let a burst of edits finish so it coalesces into one write.
+            deadline = time.monotonic() + self._batch_delay_s
+            while not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            operations = list(self._queue)
+            self._queue.clear()
+            for operation in operations:
+                if self._open_saves.get(operation.entry_name) is operation:
+                    del self._open_saves[operation.entry_name]
+            return operations
+
+    def _run(self) -> None:
+        while True:
+            operations = self._take()
+            if operations is None:
+                return
+            saves: list[_Operation] = []
+            for operation in operations:
+                if operation.kind == "save":
+                    saves.append(operation)
+                    continue
+                self._save(saves)
+                saves = []
+                self._apply(operation)
+            self._save(saves)
+
+    def _save(self, saves: list[_Operation]) -> None:
+        if not saves:
+            return
+        try:
+            with perf.span("storage.write_batch"):
+                self.storage.save_many(
+                    [(operation.block, operation.entry_name) for operation in saves]  # type: ignore[misc]
+                )
+        except Exception as exc:
+            for operation in saves:
+                self._finish(operation, error=exc)
+            return
+        for operation in saves:
+            self._finish(operation, result=operation.entry_name)
+
+    def _apply(self, operation: _Operation) -> None:
+        try:
+            if operation.kind == "rename":
+                result = self.storage.rename(operation.entry_name, operation.new_name)  # type: ignore[arg-type]
+            else:
+                result = self.storage.delete(operation.entry_name)
+        except Exception as exc:
+            self._finish(operation, error=exc)
+            return
+        self._finish(operation, result=result)
+
+    def _finish(
+        self, operation: _Operation, *, result: object = None, error: Exception | None = None
+    ) -> None:
+        if error is not None:
+            operation.future.set_exception(error)
+        else:
+            operation.future.set_result(result)
+        with self._condition:
+            for name in self._names(operation):
+                remaining = self._busy[name] - 1
+                if remaining:
+                    self._busy[name] = remaining
+                else:
+                    del self._busy[name]
+            self._condition.notify_all()
+
+
+__all__ = ["BlockWriter"]
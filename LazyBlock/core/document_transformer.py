@@ -0,0 +1,302 @@
+"""Convert a whole B document into C text in a single pass.
+
+Every block contributes two tokens: ``[BLOCK:<name>]`` as inserted by the
+editor and ``[<display_text>]`` as typed by hand.  All tokens of a library are
+kept in one Aho–Corasick automaton so a document is scanned once no matter how
+many blocks the folder holds.
+
+Blocks may be given as :class:`~core.blocks_storage.BlockHandle`; a handle's
+templates are only loaded the first time one of its tokens is replaced.
+Replacements expand ``{方塊(name)}`` references through the transformer's
+:class:`~core.block_graph.BlockGraph`.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from . import perf
+from .block_graph import BlockCycleError, BlockGraph
+from .blocks_storage import BlockEntry, block_revision
+
+
+def block_tokens(block: BlockEntry) -> tuple[str, ...]:
+    """Return the tokens that stand for ``block`` inside B text."""
+    tokens = [f"[BLOCK:{block.name}]"]
+    if block.display_text:
+        tokens.append(f"[{block.display_text}]")
+    return tuple(tokens)
+
+
+class DocumentTransformer:
+    """Aho–Corasick automaton over the tokens of every block in a library.
+
+    Adding or removing a block only touches the trie paths of its own tokens;
+    failure links are recomputed lazily, once, before the next
+    :meth:`transform`, so a burst of library changes costs a single relink.
+    """
+
+    def __init__(self, blocks: Iterable[BlockEntry] = ()) -> None:
+        self._blocks: dict[str, BlockEntry] = {}
+        self._replacements: dict[str, str] = {}
+        self._owners: dict[str, list[str]] = {}
+        self.graph = BlockGraph()
+        self._reset_trie()
+        for block in blocks:
+            self.add_block(block)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._blocks
+
+    def _reset_trie(self) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._term: list[str | None] = [None]
+        self._fail: list[int] = [0]
+        self._out: list[int] = [0]
+        self._pattern_chars = 0
+        # Depth of the deepest trie node; set by ``_link``.
+        self._depth = 0
+        self._dirty = True
+        self._start_pattern: re.Pattern[str] | None = None
+
+    def add_block(self, block: BlockEntry) -> None:
+        """Register ``block``, replacing any block with the same name."""
+        if block.name in self._blocks:
+            self.remove_block(block.name)
+        self._blocks[block.name] = block
+        self._forget_replacements(self.graph.add_block(block))
+        for token in block_tokens(block):
+            owners = self._owners.setdefault(token, [])
+            if not owners:
+                self._insert(token)
+            owners.append(block.name)
+
+    def remove_block(self, name: str) -> bool:
+        """Forget the block called ``name``; return ``False`` if unknown."""
+        block = self._blocks.pop(name, None)
+        if block is None:
+            return False
+        self._forget_replacements(self.graph.remove_block(name))
+        for token in block_tokens(block):
+            owners = self._owners.get(token)
+            if not owners:
+                continue
+            owners.remove(name)
+            if not owners:
+                del self._owners[token]
+                self._discard(token)
+        return True
+
+    def blocks(self) -> list[BlockEntry]:
+        """The blocks this transformer replaces, e.g. to hand to worker processes."""
+        return list(self._blocks.values())
+
+    def copy(self) -> "DocumentTransformer":
+        """An independent transformer over the same blocks, e.g. for a worker thread."""
+        clone = DocumentTransformer(self._blocks.values())
+        clone._replacements.update(self._replacements)
+        return clone
+
+    def rename_block(self, old_name: str, block: BlockEntry) -> None:
+        """Move the tokens of ``old_name`` to the renamed ``block``."""
+        self.remove_block(old_name)
+        self.add_block(block)
+
+    def sync(self, blocks: Iterable[BlockEntry]) -> None:
+        """Bring the library in line with ``blocks``, touching only differences."""
+        incoming = {block.name: block for block in blocks}
+        for name in [name for name in self._blocks if name not in incoming]:
+            self.remove_block(name)
+        for name, block in incoming.items():
+            current = self._blocks.get(name)
+            if current is None or block_revision(current) != block_revision(block):
+                self.add_block(block)
+
+    def _forget_replacements(self, names: set[str]) -> None:
+        # A changed block also changes every block that references it.
+        for name in names:
+            self._replacements.pop(name, None)
+
+    def _replacement(self, name: str) -> str:
+        replacement = self._replacements.get(name)
+        if replacement is None:
+            try:
+                replacement = self.graph.render(name, {}, memoize=False)
+            except BlockCycleError as exc:
+                replacement = f"[{exc}]"
+            except (OSError, ValueError, KeyError) as exc:
+                # The block file vanished or broke since it was listed; the
+                # watcher's next change for it clears this placeholder.
+                replacement = f"[讀取方塊失敗: {exc}]"
+            self._replacements[name] = replacement
+        return replacement
+
+    def _insert(self, token: str) -> None:
+        state = 0
+        for char in token:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._term.append(None)
+                self._fail.append(0)
+                self._out.append(0)
+            state = next_state
+        self._term[state] = token
+        self._pattern_chars += len(token)
+        self._dirty = True
+
+    def _discard(self, token: str) -> None:
+        state = 0
+        for char in token:
+            state = self._goto[state][char]
+        self._term[state] = None
+        self._pattern_chars -= len(token)
+        self._dirty = True
+        # Removed tokens leave dead trie nodes behind; compact once they
+        # outnumber the live ones.
+        if len(self._goto) > 2 * self._pattern_chars + 64:
+            tokens = list(self._owners)
+            self._reset_trie()
+            for live in tokens:
+                self._insert(live)
+
+    def _link(self) -> None:
+        goto, fail, out, term = self._goto, self._fail, self._out, self._term
+        depth = [0] * len(goto)
+        queue: list[int] = []
+        for state in goto[0].values():
+            fail[state] = 0
+            out[state] = state if term[state] is not None else 0
+            depth[state] = 1
+            queue.append(state)
+        for state in queue:
+            for char, child in goto[state].items():
+                depth[child] = depth[state] + 1
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[child] = goto[link].get(char, 0)
+                out[child] = child if term[child] is not None else out[fail[child]]
+                queue.append(child)
+        self._depth = max(depth)
+
+        first_chars = [char for char, state in goto[0].items() if self._reaches_token(state)]
+        self._start_pattern = (
+            re.compile("[" + "".join(re.escape(char) for char in first_chars) + "]")
+            if first_chars
+            else None
+        )
+        self._dirty = False
+
+    def _reaches_token(self, state: int) -> bool:
+        stack = [state]
+        while stack:
+            current = stack.pop()
+            if self._term[current] is not None:
+                return True
+            stack.extend(self._goto[current].values())
+        return False
+
+    def _find_matches(self, text: str) -> list[tuple[int, int, str]]:
+        if self._dirty:
+            self._link()
+        start_pattern = self._start_pattern
+        if start_pattern is None:
+            return []
+
+        goto, fail, out, term = self._goto, self._fail, self._out, self._term
+        search = start_pattern.search
+        matches: list[tuple[int, int, str]] = []
+        length = len(text)
+        state = 0
+        index = 0
+        while index < length:
+            if not state:
+                # Nothing is pending: jump straight to the next character
+                # that can begin a token.
+                found = search(text, index)
+                if found is None:
+                    break
+                index = found.start()
+            char = text[index]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            node = out[state]
+            while node:
+                token = term[node]
+                matches.append((index + 1 - len(token), index + 1, token))
+                node = out[fail[node]]
+            index += 1
+        return matches
+
+    def safe_cut(self, text: str) -> int:
+        """Last offset in ``text`` where no token can be under way, or ``-1``.
+
+        A document cut there transforms to the same text in two pieces as in
+        one.  ``text`` may start anywhere in a document: the automaton only
+        knows its true state once it has read as many characters as the
+        longest token, so earlier offsets are never returned.
+        """
+        if self._dirty:
+            self._link()
+        start_pattern = self._start_pattern
+        if start_pattern is None:
+            return len(text)
+
+        goto, fail = self._goto, self._fail
+        search = start_pattern.search
+        trusted = self._depth
+        length = len(text)
+        last = -1
+        state = 0
+        index = 0
+        while index < length:
+            if not state:
+                # The automaton stays at its root up to the next character
+                # that can begin a token.
+                found = search(text, index)
+                if found is None:
+                    return length if length >= trusted else last
+                index = found.start()
+                if index >= trusted:
+                    last = index
+            char = text[index]
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            index += 1
+        if not state and length >= trusted:
+            last = length
+        return last
+
+    @perf.timed("transform.document")
+    def transform(self, text: str) -> str:
+        """Replace every block token in ``text`` with the block's output.
+
+        Overlapping tokens resolve leftmost-longest, like a reader would.
+        """
+        matches = self._find_matches(text)
+        if not matches:
+            return text
+        matches.sort(key=lambda match: (match[0], -match[1]))
+
+        pieces: list[str] = []
+        position = 0
+        for start, end, token in matches:
+            if start < position:
+                continue
+            pieces.append(text[position:start])
+            pieces.append(self._replacement(self._owners[token][-1]))
+            position = end
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+
+__all__ = ["DocumentTransformer", "block_tokens"]
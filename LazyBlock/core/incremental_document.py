@@ -0,0 +1,76 @@
+"""Line-addressed B→C document that re-transforms only edited lines."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+
+@dataclass(frozen=True)
+class OutputPatch:
+    """Replacement for output lines ``[start_line, end_line)``.
+
+    ``text`` carries no trailing newline.  ``at_end`` is set when the range
+    runs to the end of the output, where there is no newline to keep.
+    """
+
+    start_line: int
+    end_line: int
+    text: str
+    at_end: bool
+
+
+class IncrementalDocument:
+    """Keep the transformed output of every source line.
+
+    Block tokens never span lines, so each source line transforms on its own
+    and an edit only needs the lines it touched re-transformed.  A source line
+    may expand to several output lines; ``_heights`` tracks how many so edits
+    can be mapped to output line ranges.
+    """
+
+    def __init__(self, transform: Callable[[str], str], text: str = "") -> None:
+        self._transform = transform
+        self._rendered: list[str] = []
+        self._heights: list[int] = []
+        self.reset(text)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._rendered)
+
+    def reset(self, text: str) -> str:
+        """Transform ``text`` from scratch and return the whole output."""
+        self._rendered = [self._transform(line) for line in text.split("\n")]
+        self._heights = [chunk.count("\n") + 1 for chunk in self._rendered]
+        return self.output_text()
+
+    def output_text(self) -> str:
+        return "\n".join(self._rendered)
+
+    def replace_lines(self, start: int, end: int, lines: Sequence[str]) -> OutputPatch:
+        """Swap source lines ``[start, end)`` for ``lines`` and describe the output change.
+
+        ``lines`` must hold at least one line; a text widget never has fewer.
+        """
+        if not lines:
+            raise ValueError("替換內容至少需要一行。")
+        if not 0 <= start <= end <= len(self._rendered):
+            raise IndexError(f"行範圍超出文件: {start}-{end} / {len(self._rendered)}")
+        at_end = end == len(self._rendered)
+        rendered = [self._transform(line) for line in lines]
+        heights = [chunk.count("\n") + 1 for chunk in rendered]
+
+        out_start = sum(self._heights[:start])
+        out_end = out_start + sum(self._heights[start:end])
+        self._rendered[start:end] = rendered
+        self._heights[start:end] = heights
+        return OutputPatch(
+            start_line=out_start,
+            end_line=out_end,
+            text="\n".join(rendered),
+            at_end=at_end,
+        )
+
+
+__all__ = ["IncrementalDocument", "OutputPatch"]
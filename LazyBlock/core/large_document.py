@@ -0,0 +1,195 @@
+"""Read and transform documents too large to hold comfortably in memory.
+
+:class:`MappedDocument` maps a file and hands it out as decoded chunks that
+end on a line break, so each chunk can be transformed on its own: block
+tokens never span lines (panel B's live sync relies on the same rule).  A
+line longer than a chunk is only cut where the caller's ``cut`` function
+(:meth:`DocumentTransformer.safe_cut
+<core.document_transformer.DocumentTransformer.safe_cut>`) shows that no
+token is under way; without one it stays whole.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+# A long line is first searched for a cut in this many bytes before the
+# limit, then in twice as many, and so on.
+_CUT_WINDOW_BYTES = 64 * 1024
+
+# Given the text before a prospective chunk end, the last offset at which the
+# chunk may end, or ``-1``.
+Cut = Callable[[str], int]
+
+
+class MappedDocument:
+    """A UTF-8 text file mapped read-only."""
+
+    def __init__(self, path: Path, *, encoding: str = "utf-8") -> None:
+        self.path = path
+        self.encoding = encoding
+        self._file = path.open("rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be mapped; they simply have no chunks.
+        self._map: mmap.mmap | None = None
+        if self.size:
+            try:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except Exception:
+                self._file.close()
+                raise
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                # Chunks are read front to back; let the kernel read ahead
+                # and drop pages behind us.
+                self._map.madvise(mmap.MADV_SEQUENTIAL)
+
+    def __enter__(self) -> "MappedDocument":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def _cut(self, start: int, limit: int, cut: Cut | None) -> int:
+        """End of the chunk starting at ``start``: after the last newline before ``limit``.
+
+        A line running past ``limit`` ends where ``cut`` allows, or else at
+        its own end.
+        """
+        assert self._map is not None
+        if limit >= self.size:
+            return self.size
+        newline = self._map.rfind(b"\n", start, limit)
+        if newline >= 0:
+            return newline + 1
+        if cut is not None:
+            end = self._cut_in_line(start, limit, cut)
+            if end > start:
+                return end
+        newline = self._map.find(b"\n", limit)
+        return self.size if newline < 0 else newline + 1
+
+    def _char_boundary(self, start: int, end: int) -> int:
+        assert self._map is not None
+        while end > start and self._map[end] & 0xC0 == 0x80:
+            end -= 1
+        return end
+
+    def _cut_in_line(self, start: int, limit: int, cut: Cut) -> int:
+        limit = self._char_boundary(start, limit)
+        window_bytes = _CUT_WINDOW_BYTES
+        while True:
+            window_start = self._char_boundary(start, max(start, limit - window_bytes))
+            try:
+                window = self._map[window_start:limit].decode(self.encoding)  # type: ignore[index]
+            except UnicodeDecodeError:
+                return -1
+            offset = cut(window)
+            if offset > 0:
+                return window_start + len(window[:offset].encode(self.encoding))
+            if window_start == start:
+                return -1
+            window_bytes *= 2
+
+    def iter_chunks(
+        self, chunk_bytes: int = DEFAULT_CHUNK_BYTES, *, cut: Cut | None = None
+    ) -> Iterator[tuple[str, int]]:
+        """Yield ``(text, end offset)`` pairs covering the whole file in order.
+
+        Chunks end on a line break.  A line longer than ``chunk_bytes`` is
+        split only where ``cut`` allows; ``cut=len`` allows any character
+        boundary, for text that is shown rather than transformed.
+        """
+        if self._map is None:
+            return
+        start = 0
+        while start < self.size:
+            end = self._cut(start, start + chunk_bytes, cut)
+            yield self._map[start:end].decode(self.encoding, errors="replace"), end
+            start = end
+
+    def read_window(self, start: int, max_bytes: int) -> tuple[str, int]:
+        """Return whole lines from ``start`` up to ``max_bytes`` and where they end."""
+        if self._map is None or start >= self.size:
+            return "", self.size
+        end = self._cut(start, start + max_bytes, len)
+        return self._map[start:end].decode(self.encoding, errors="replace"), end
+
+
+def stream_transform(
+    source: Path,
+    destination: Path,
+    transform: Callable[[str], str],
+    *,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    cut: Cut | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """Transform ``source`` into ``destination`` one chunk at a time.
+
+    Memory stays around a few chunks whatever the file size, provided
+    ``cut`` can split lines longer than ``chunk_bytes`` (see
+    :meth:`MappedDocument.iter_chunks`).  The output is written to a
+    temporary file and moved into place at the end, so readers never see a
+    half-written result.  Returns the number of bytes written.
+    """
+    return stream_transform_chunks(
+        source,
+        destination,
+        lambda texts: map(transform, texts),
+        chunk_bytes=chunk_bytes,
+        cut=cut,
+        on_progress=on_progress,
+    )
+
+
+def stream_transform_chunks(
+    source: Path,
+    destination: Path,
+    transform_chunks: Callable[[Iterator[str]], Iterable[str]],
+    *,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    cut: Cut | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> int:
+    """:func:`stream_transform` for a transform that maps the whole chunk stream.
+
+    ``transform_chunks`` gets an iterator over the source chunks and must
+    yield one result per chunk, in order; it may read ahead (for example
+    :func:`~core.parallel_transform.parallel_transform`).
+    """
+    temp_path = destination.with_name(destination.name + ".tmp")
+    written = 0
+    try:
+        with MappedDocument(source) as document, temp_path.open("wb") as output:
+            # End offsets of chunks handed out but not yet written.
+            offsets: deque[int] = deque()
+
+            def texts() -> Iterator[str]:
+                for text, offset in document.iter_chunks(chunk_bytes, cut=cut):
+                    offsets.append(offset)
+                    yield text
+
+            for result in transform_chunks(texts()):
+                written += output.write(result.encode(document.encoding))
+                offset = offsets.popleft()
+                if on_progress is not None:
+                    on_progress(offset, document.size)
+        os.replace(temp_path, destination)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return written
+
+
+__all__ = ["DEFAULT_CHUNK_BYTES", "MappedDocument", "stream_transform", "stream_transform_chunks"]
@@ -0,0 +1,183 @@
+"""Single-file block library with memory-mapped, lazily decoded records.
+
+Layout (little endian)::
+
+    header   magic "LZBPACK\\0", version u32, count u32, index offset u64
+    records  raw ``block.json`` bytes, one after another
+    index    count x (record offset u64, record length u32,
+                      name offset u32, name length u32), sorted by name bytes
+    names    UTF-8 folder names, concatenated
+
+Records keep the exact bytes of each ``block.json`` so packing a folder and
+unpacking it again is lossless.  Because the index is sorted, looking a block
+up by name is a binary search over the mapped index with no upfront decoding.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .blocks_model import Block
+from .blocks_storage import scan_block_files
+
+
+PACK_SUFFIX = ".lzbpack"
+
+_MAGIC = b"LZBPACK\0"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+_INDEX_ENTRY = struct.Struct("<QIII")
+_BLOCK_FILE_NAME = "block.json"
+
+
+def write_packed_library(pack_path: Path, records: Iterable[tuple[str, bytes]]) -> int:
+    """Write ``(folder name, block.json bytes)`` records; return how many were packed."""
+    temp_path = pack_path.with_name(pack_path.name + ".tmp")
+    index: list[tuple[int, int, bytes]] = []
+    with temp_path.open("wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, 0, 0))
+        offset = _HEADER.size
+        for entry_name, payload in records:
+            file.write(payload)
+            index.append((offset, len(payload), entry_name.encode("utf-8")))
+            offset += len(payload)
+        index_offset = offset
+        index.sort(key=lambda entry: entry[2])
+        name_offset = 0
+        for record_offset, length, name in index:
+            file.write(_INDEX_ENTRY.pack(record_offset, length, name_offset, len(name)))
+            name_offset += len(name)
+        for _offset, _length, name in index:
+            file.write(name)
+        file.seek(0)
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(index), index_offset))
+    os.replace(temp_path, pack_path)
+    return len(index)
+
+
+def pack_block_folder(root_folder: Path, pack_path: Path) -> int:
+    """Pack every ``<root_folder>/<name>/block.json`` into ``pack_path``."""
+
+    def records() -> Iterator[tuple[str, bytes]]:
+        for stat in sorted(scan_block_files(root_folder), key=lambda s: s.entry_name):
+            yield stat.entry_name, (stat.folder / _BLOCK_FILE_NAME).read_bytes()
+
+    return write_packed_library(pack_path, records())
+
+
+def unpack_to_block_folder(pack_path: Path, root_folder: Path) -> int:
+    """Recreate the folder layout from a packed library; return the block count."""
+    with PackedLibrary(pack_path) as library:
+        for entry_name in library.entry_names():
+            if "/" in entry_name or "\\" in entry_name or entry_name in ("", ".", ".."):
+                raise ValueError(f"方塊資料夾名稱無效: {entry_name!r}")
+            block_folder = root_folder / entry_name
+            block_folder.mkdir(parents=True, exist_ok=True)
+            (block_folder / _BLOCK_FILE_NAME).write_bytes(library.read_raw(entry_name))
+        return len(library)
+
+
+class PackedLibrary:
+    """Read-only view over a packed library.
+
+    Opening maps the file and reads the index only; a block's JSON is decoded
+    the first time :meth:`load` asks for it.
+    """
+
+    def __init__(self, pack_path: Path) -> None:
+        self.path = pack_path
+        self._file = pack_path.open("rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            self._file.close()
+            raise ValueError(f"不是有效的方塊庫檔案: {pack_path}") from None
+        except Exception:
+            self._file.close()
+            raise
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"不是有效的方塊庫檔案: {pack_path}")
+        magic, version, count, index_offset = _HEADER.unpack_from(self._map, 0)
+        names_offset = index_offset + count * _INDEX_ENTRY.size
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"不是有效的方塊庫檔案: {pack_path}")
+        if not _HEADER.size <= index_offset <= names_offset <= len(self._map):
+            self.close()
+            raise ValueError(f"方塊庫檔案不完整: {pack_path}")
+        self._count = count
+        self._index_offset = index_offset
+        self._names_offset = names_offset
+
+    def __enter__(self) -> "PackedLibrary":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, entry_name: object) -> bool:
+        return isinstance(entry_name, str) and self._find(entry_name) is not None
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def _entry(self, position: int) -> tuple[int, int, bytes]:
+        offset, length, name_offset, name_length = _INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + position * _INDEX_ENTRY.size
+        )
+        start = self._names_offset + name_offset
+        return offset, length, self._map[start : start + name_length]
+
+    def _find(self, entry_name: str) -> tuple[int, int] | None:
+        target = entry_name.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, name = self._entry(middle)
+            if name == target:
+                return offset, length
+            if name < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def entry_names(self) -> list[str]:
+        return [self._entry(position)[2].decode("utf-8") for position in range(self._count)]
+
+    def read_raw(self, entry_name: str) -> bytes:
+        found = self._find(entry_name)
+        if found is None:
+            raise KeyError(entry_name)
+        offset, length = found
+        return self._map[offset : offset + length]
+
+    def load(self, entry_name: str) -> Block:
+        return Block.from_dict(json.loads(self.read_raw(entry_name)))
+
+    def iter_blocks(self) -> Iterator[tuple[str, Block]]:
+        for position in range(self._count):
+            offset, length, name = self._entry(position)
+            data = json.loads(self._map[offset : offset + length])
+            yield name.decode("utf-8"), Block.from_dict(data)
+
+
+__all__ = [
+    "PACK_SUFFIX",
+    "PackedLibrary",
+    "pack_block_folder",
+    "unpack_to_block_folder",
+    "write_packed_library",
+]
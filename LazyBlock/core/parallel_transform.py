@@ -0,0 +1,136 @@
+"""Spread large transforms and batch renders over several processes.
+
+Work is cut into independent chunks: B text where no block token spans the
+cut, value rows in batches.  Each worker process receives the block library
+once, through the pool initializer, and builds its own
+:class:`~core.document_transformer.DocumentTransformer`; after that only
+chunk text crosses the process boundary.  Results are yielded in input
+order as soon as the chunk at the head of the queue is done, with a bounded
+number of chunks in flight, so memory stays flat however large the input.
+
+Workers are started with ``spawn`` everywhere: forking a process that runs
+Tk and helper threads is not safe.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Mapping, Sequence
+
+from .blocks_storage import BlockEntry
+from .document_transformer import DocumentTransformer
+from .transform_engine import render_template_many
+
+# Chunks in flight per worker: enough to keep every worker busy while the
+# consumer writes out the head of the queue.
+_PREFETCH_PER_WORKER = 2
+
+_worker_transformer: DocumentTransformer | None = None
+
+
+def default_workers() -> int:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def _init_transform_worker(blocks: list[BlockEntry]) -> None:
+    global _worker_transformer
+    _worker_transformer = DocumentTransformer(blocks)
+
+
+def _transform_chunk(text: str) -> str:
+    assert _worker_transformer is not None
+    return _worker_transformer.transform(text)
+
+
+def _render_batch(template: str, columns: Mapping[int, Sequence[str]], separator: str) -> str:
+    pieces: list[str] = []
+    render_template_many(template, columns, sink=pieces.append, separator=separator)
+    return "".join(pieces)
+
+
+def _process_pool(
+    workers: int, initializer: Callable | None = None, initargs: tuple = ()
+) -> Executor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def _ordered(
+    executor: Executor, submit: Callable[[object], Future], items: Iterable, workers: int
+) -> Iterator[str]:
+    pending: deque[Future] = deque()
+    limit = workers * _PREFETCH_PER_WORKER
+    try:
+        for item in items:
+            pending.append(submit(item))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def parallel_transform(
+    chunks: Iterable[str], blocks: Iterable[BlockEntry], *, workers: int | None = None
+) -> Iterator[str]:
+    """Transform B text ``chunks`` in worker processes, yielding C text in order.
+
+    No block token may span two chunks, which holds for
+    :func:`iter_line_batches <lazy_block.cli.iter_line_batches>` and for
+    :meth:`MappedDocument.iter_chunks
+    <core.large_document.MappedDocument.iter_chunks>` given the library's
+    :meth:`~core.document_transformer.DocumentTransformer.safe_cut`.  With a
+    single worker the chunks are transformed in this process.
+    """
+    workers = workers or default_workers()
+    library = list(blocks)
+    if workers <= 1:
+        transformer = DocumentTransformer(library)
+        yield from map(transformer.transform, chunks)
+        return
+    with _process_pool(workers, _init_transform_worker, (library,)) as executor:
+        yield from _ordered(
+            executor, lambda text: executor.submit(_transform_chunk, text), chunks, workers
+        )
+
+
+def parallel_render_many(
+    template: str,
+    batches: Iterable[Mapping[int, Sequence[str]]],
+    *,
+    workers: int | None = None,
+    separator: str = "\n",
+) -> Iterator[str]:
+    """Render ``template`` for column batches in worker processes, in order.
+
+    Each batch maps input ids to equally long value columns, as for
+    :func:`~core.transform_engine.render_template_many`; each yielded string
+    holds one batch's rows, every row followed by ``separator``.
+    """
+    workers = workers or default_workers()
+    if workers <= 1:
+        for columns in batches:
+            yield _render_batch(template, columns, separator)
+        return
+    with _process_pool(workers) as executor:
+        yield from _ordered(
+            executor,
+            lambda columns: executor.submit(_render_batch, template, columns, separator),
+            batches,
+            workers,
+        )
+
+
+__all__ = ["default_workers", "parallel_render_many", "parallel_transform"]
@@ -0,0 +1,232 @@
+"""Lightweight timers and counters for seeing where a session spends its time.
+
+Recording is off by default, and then a :func:`timed` function or a
+:func:`span` costs one flag check.  Turn it on with ``LAZY_BLOCK_PERF=1`` or
+:func:`enable`.  Every timer keeps its last ``_WINDOW`` durations for rolling
+percentiles, and spans are also kept (up to ``_MAX_TRACE_EVENTS``) for
+:func:`dump_trace`, which writes the Chrome trace format that Perfetto and
+``chrome://tracing`` open.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, ContextManager, TypeVar
+
+_WINDOW = 1024
+_MAX_TRACE_EVENTS = 200_000
+
+_enabled = os.environ.get("LAZY_BLOCK_PERF", "") not in ("", "0")
+_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+_NULL_SPAN = nullcontext()
+
+F = TypeVar("F", bound=Callable)
+
+
+@dataclass(frozen=True)
+class TimerStats:
+    name: str
+    count: int
+    p50_ms: float
+    p99_ms: float
+    total_ms: float
+
+
+@dataclass(frozen=True)
+class MemoryUsage:
+    """Resident set size now and at its peak; ``None`` where the OS won't say."""
+
+    rss_bytes: int | None
+    peak_bytes: int | None
+
+
+class _Timer:
+    __slots__ = ("count", "total_ns", "recent")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ns = 0
+        self.recent: deque[int] = deque(maxlen=_WINDOW)
+
+
+_timers: dict[str, _Timer] = {}
+_counters: dict[str, int] = {}
+# (name, start ns, duration ns, thread id)
+_trace: deque[tuple[str, int, int, int]] = deque(maxlen=_MAX_TRACE_EVENTS)
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _trace.clear()
+
+
+def record(name: str, start_ns: int, end_ns: int | None = None) -> None:
+    """Record one timed interval that started at ``start_ns`` (``perf_counter_ns``)."""
+    if not _enabled:
+        return
+    if end_ns is None:
+        end_ns = time.perf_counter_ns()
+    duration = end_ns - start_ns
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            timer = _timers[name] = _Timer()
+        timer.count += 1
+        timer.total_ns += duration
+        timer.recent.append(duration)
+        _trace.append((name, start_ns, duration, threading.get_ident()))
+
+
+def count(name: str, amount: int = 1) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _Span:
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._start = 0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, *_exc: object) -> None:
+        record(self._name, self._start)
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time a ``with`` block under ``name``."""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator timing every call of the function under ``name``."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def _percentile(ordered: list[int], fraction: float) -> int:
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def snapshot() -> tuple[list[TimerStats], dict[str, int]]:
+    """Timer statistics (percentiles over the recent window) and counters."""
+    with _lock:
+        timers = [(name, t.count, t.total_ns, sorted(t.recent)) for name, t in _timers.items()]
+        counters = dict(_counters)
+    stats = [
+        TimerStats(
+            name,
+            calls,
+            _percentile(recent, 0.5) / 1e6,
+            _percentile(recent, 0.99) / 1e6,
+            total_ns / 1e6,
+        )
+        for name, calls, total_ns, recent in sorted(timers)
+        if recent
+    ]
+    return stats, counters
+
+
+def memory_usage() -> MemoryUsage:
+    rss = peak = None
+    try:
+        with open("/proc/self/statm", "rb") as file:
+            rss = int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return MemoryUsage(rss, peak)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    peak = max_rss if sys.platform == "darwin" else max_rss * 1024
+    return MemoryUsage(rss, peak if rss is None else max(peak, rss))
+
+
+def dump_trace(path: Path) -> int:
+    """Write the recorded spans as a Chrome trace file; return the event count."""
+    with _lock:
+        events = list(_trace)
+        counters = dict(_counters)
+    pid = os.getpid()
+    memory = memory_usage()
+    payload = {
+        "traceEvents": [
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start - _origin_ns) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, duration, tid in events
+        ],
+        "displayTimeUnit": "ms",
+        "otherData": {
+            "counters": counters,
+            "rss_bytes": memory.rss_bytes,
+            "peak_rss_bytes": memory.peak_bytes,
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+        },
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    return len(events)
+
+
+__all__ = [
+    "MemoryUsage",
+    "TimerStats",
+    "count",
+    "dump_trace",
+    "enable",
+    "is_enabled",
+    "memory_usage",
+    "record",
+    "reset",
+    "snapshot",
+    "span",
+    "timed",
+]
@@ -0,0 +1,195 @@
+"""SQLite block storage with FTS5 search."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from .blocks_model import Block
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    entry_name TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    display_text TEXT NOT NULL,
+    input_template TEXT NOT NULL,
+    output_template TEXT NOT NULL,
+    inputs TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS blocks_by_name ON blocks(name);
+"""
+
+# The trigram tokenizer gives substring matches for CJK text, which the
+# default unicode61 tokenizer would treat as one long word.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+    display_text, input_template, output_template,
+    content='blocks', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS blocks_fts_insert AFTER INSERT ON blocks BEGIN
+    INSERT INTO blocks_fts(rowid, display_text, input_template, output_template)
+    VALUES (new.rowid, new.display_text, new.input_template, new.output_template);
+END;
+CREATE TRIGGER IF NOT EXISTS blocks_fts_delete AFTER DELETE ON blocks BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, display_text, input_template, output_template)
+    VALUES ('delete', old.rowid, old.display_text, old.input_template, old.output_template);
+END;
+CREATE TRIGGER IF NOT EXISTS blocks_fts_update AFTER UPDATE ON blocks BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, display_text, input_template, output_template)
+    VALUES ('delete', old.rowid, old.display_text, old.input_template, old.output_template);
+    INSERT INTO blocks_fts(rowid, display_text, input_template, output_template)
+    VALUES (new.rowid, new.display_text, new.input_template, new.output_template);
+END;
+"""
+
+_COLUMNS = "name, display_text, input_template, output_template, inputs, entry_name"
+_JOINED_COLUMNS = ", ".join(f"b.{column}" for column in _COLUMNS.split(", "))
+_TRIGRAM_LENGTH = 3
+_UPSERT = (
+    "INSERT INTO blocks (entry_name, name, display_text, input_template,"
+    " output_template, inputs) VALUES (?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(entry_name) DO UPDATE SET name = excluded.name,"
+    " display_text = excluded.display_text,"
+    " input_template = excluded.input_template,"
+    " output_template = excluded.output_template, inputs = excluded.inputs"
+)
+
+
+def _row_to_entry(row: tuple) -> tuple[Block, str]:
+    name, display_text, input_template, output_template, inputs, entry_name = row
+    block = Block(
+        name=name,
+        display_text=display_text,
+        input_template=input_template,
+        output_template=output_template,
+        inputs=json.loads(inputs),
+    )
+    return block, entry_name
+
+
+def _block_row(block: Block, entry_name: str) -> tuple:
+    return (
+        entry_name,
+        block.name,
+        block.display_text,
+        block.input_template,
+        block.output_template,
+        json.dumps(list(block.inputs)),
+    )
+
+
+class SqliteBlockStorage:
+    """Blocks as rows of one WAL-mode database; renames and deletes are single statements.
+
+    The connection is shared between the UI thread and the background block
+    writer, one statement or transaction at a time.
+    """
+
+    def __init__(self, db_path: Path, *, root_folder: Path | None = None) -> None:
+        self.location = db_path
+        self.root_folder = root_folder or db_path.parent
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        try:
+            self._connection.executescript(_FTS_SCHEMA)
+            self._has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or without the trigram tokenizer.
+            self._has_fts = False
+
+    def list_entries(self) -> list[tuple[Block, str]]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM blocks ORDER BY entry_name"
+            ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def load(self, entry_name: str) -> Block:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM blocks WHERE entry_name = ?", (entry_name,)
+            ).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"找不到方塊: {entry_name}")
+        return _row_to_entry(row)[0]
+
+    def load_by_name(self, name: str) -> Block | None:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {_COLUMNS} FROM blocks WHERE name = ? LIMIT 1", (name,)
+            ).fetchone()
+        return None if row is None else _row_to_entry(row)[0]
+
+    def exists(self, entry_name: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM blocks WHERE entry_name = ?", (entry_name,)
+            ).fetchone()
+        return row is not None
+
+    def save(self, block: Block, entry_name: str | None = None) -> str:
+        return self.save_many([(block, entry_name or block.name)])[0]
+
+    def save_many(self, items: list[tuple[Block, str]]) -> list[str]:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                _UPSERT, [_block_row(block, entry_name) for block, entry_name in items]
+            )
+        return [entry_name for _block, entry_name in items]
+
+    def delete(self, entry_name: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM blocks WHERE entry_name = ?", (entry_name,))
+
+    def rename(self, entry_name: str, new_name: str) -> str:
+        if "/" in new_name or "\\" in new_name:
+            raise ValueError("資料夾名稱不可包含路徑符號。")
+        with self._lock, self._connection:
+            if self.exists(new_name):
+                raise FileExistsError(f"目標方塊已存在: {new_name}")
+            cursor = self._connection.execute(
+                "UPDATE blocks SET entry_name = ?, name = ? WHERE entry_name = ?",
+                (new_name, new_name, entry_name),
+            )
+            if cursor.rowcount == 0:
+                raise FileNotFoundError(f"找不到方塊: {entry_name}")
+        return new_name
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[Block, str]]:
+        query = query.strip()
+        if not query:
+            return []
+        if self._has_fts and len(query) >= _TRIGRAM_LENGTH:
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = (
+                f"SELECT {_JOINED_COLUMNS}"
+                " FROM blocks_fts JOIN blocks AS b ON b.rowid = blocks_fts.rowid"
+                " WHERE blocks_fts MATCH ? ORDER BY rank LIMIT ?"
+            )
+            parameters: tuple = (phrase, limit)
+        else:
+            # Too short for trigrams: fall back to a scan.
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            sql = (
+                f"SELECT {_COLUMNS} FROM blocks WHERE display_text LIKE ?1 ESCAPE '\\'"
+                " OR input_template LIKE ?1 ESCAPE '\\' OR output_template LIKE ?1 ESCAPE '\\'"
+                " LIMIT ?2"
+            )
+            parameters = (pattern, limit)
+        with self._lock:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+__all__ = ["SqliteBlockStorage"]
@@ -0,0 +1,130 @@
+"""Pluggable block storage.
+
+Every backend addresses blocks by *entry name*: the folder name in the
+filesystem layout, the primary key in SQLite.  It is usually the block's own
+``name``.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Protocol, runtime_checkable
+
+from .blocks_model import Block
+from .blocks_storage import (
+    commit_block_files,
+    delete_block,
+    list_block_folder_entries,
+    load_block,
+    rename_block_folder,
+    save_block,
+    write_block_file,
+)
+
+
+STORAGE_BACKENDS = ("folder", "sqlite")
+SQLITE_FILE_NAME = "blocks.sqlite3"
+
+
+@runtime_checkable
+class BlockStorage(Protocol):
+    """What the app needs from a block library.
+
+    ``location`` is where the blocks live (the folder, or the database file);
+    ``root_folder`` is the folder the library was opened for.
+    """
+
+    location: Path
+    root_folder: Path
+
+    def list_entries(self) -> list[tuple[Block, str]]: ...
+
+    def load(self, entry_name: str) -> Block: ...
+
+    def exists(self, entry_name: str) -> bool: ...
+
+    def save(self, block: Block, entry_name: str | None = None) -> str: ...
+
+    def save_many(self, items: list[tuple[Block, str]]) -> list[str]:
+        """Save several ``(block, entry_name)`` pairs with a single sync or commit."""
+        ...
+
+    def delete(self, entry_name: str) -> None: ...
+
+    def rename(self, entry_name: str, new_name: str) -> str: ...
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[Block, str]]: ...
+
+    def close(self) -> None: ...
+
+
+class FolderBlockStorage:
+    """The ``<folder>/<name>/block.json`` layout behind :class:`BlockStorage`."""
+
+    def __init__(self, root_folder: Path) -> None:
+        self.location = root_folder
+        self.root_folder = root_folder
+
+    def list_entries(self) -> list[tuple[Block, str]]:
+        return [(block, path.name) for block, path in list_block_folder_entries(self.location)]
+
+    def load(self, entry_name: str) -> Block:
+        return load_block(self.location / entry_name)
+
+    def exists(self, entry_name: str) -> bool:
+        return (self.location / entry_name).exists()
+
+    def save(self, block: Block, entry_name: str | None = None) -> str:
+        entry_name = entry_name or block.name
+        save_block(block, self.location / entry_name)
+        return entry_name
+
+    def save_many(self, items: list[tuple[Block, str]]) -> list[str]:
+        commit_block_files(
+            [write_block_file(block, self.location / entry_name) for block, entry_name in items]
+        )
+        return [entry_name for _block, entry_name in items]
+
+    def delete(self, entry_name: str) -> None:
+        delete_block(self.location / entry_name)
+
+    def rename(self, entry_name: str, new_name: str) -> str:
+        return rename_block_folder(self.location / entry_name, new_name).name
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[Block, str]]:
+        needle = query.casefold()
+        matches = [
+            (block, entry_name)
+            for block, entry_name in self.list_entries()
+            if needle in block.display_text.casefold()
+            or needle in block.input_template.casefold()
+            or needle in block.output_template.casefold()
+        ]
+        return matches[:limit]
+
+    def close(self) -> None:
+        pass
+
+
+def open_block_storage(location: Path, backend: str = "folder") -> BlockStorage:
+    """Open the library at ``location`` with the named backend.
+
+    The SQLite backend keeps its database as ``blocks.sqlite3`` inside the
+    chosen folder, or uses ``location`` directly when it names a file.
+    """
+    if backend == "folder":
+        return FolderBlockStorage(location)
+    if backend == "sqlite":
+        from .sqlite_storage import SqliteBlockStorage
+
+        db_path = location / SQLITE_FILE_NAME if location.is_dir() else location
+        return SqliteBlockStorage(db_path, root_folder=location)
+    raise ValueError(f"未知的儲存方式: {backend}（可用: {', '.join(STORAGE_BACKENDS)}）")
+
+
+__all__ = [
+    "BlockStorage",
+    "FolderBlockStorage",
+    "STORAGE_BACKENDS",
+    "open_block_storage",
+]
@@ -0,0 +1,80 @@
+"""Compile block templates into reusable render plans."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+INPUT_PATTERN = re.compile(r"\{輸入文字\((\d+)\)\}")
+
+_TEMPLATE_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """A template split into literal segments and ``{輸入文字(n)}`` slots.
+
+    ``literals`` always holds ``len(slots) + 1`` entries so a render is the
+    literals interleaved with the slot values.  ``input_ids`` lists every slot
+    once, in order of first appearance, and ``format_string`` is the same plan
+    expressed for :meth:`str.format` with positional fields indexing into
+    ``input_ids``.
+    """
+
+    source: str
+    literals: tuple[str, ...]
+    slots: tuple[int, ...]
+    input_ids: tuple[int, ...]
+    format_string: str
+
+    @property
+    def has_inputs(self) -> bool:
+        return bool(self.slots)
+
+    def render(self, values: dict[int, str]) -> str:
+        if not self.slots:
+            return self.source
+        get = values.get
+        return self.format_string.format(*[get(idx, "") for idx in self.input_ids])
+
+
+def _escape_format(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> CompiledTemplate:
+    """Parse ``template`` once; repeated calls with the same text hit the cache."""
+    parts = INPUT_PATTERN.split(template)
+    literals = tuple(parts[0::2])
+    slots = tuple(int(idx) for idx in parts[1::2])
+    input_ids = tuple(dict.fromkeys(slots))
+    positions = {idx: pos for pos, idx in enumerate(input_ids)}
+
+    pieces = [_escape_format(literals[0])]
+    for slot, literal in zip(slots, literals[1:]):
+        pieces.append(f"{{{positions[slot]}}}")
+        pieces.append(_escape_format(literal))
+
+    return CompiledTemplate(
+        source=template,
+        literals=literals,
+        slots=slots,
+        input_ids=input_ids,
+        format_string="".join(pieces),
+    )
+
+
+def clear_template_cache() -> None:
+    """Drop every cached plan, e.g. after bulk-loading an unrelated library."""
+    compile_template.cache_clear()
+
+
+__all__ = [
+    "CompiledTemplate",
+    "INPUT_PATTERN",
+    "compile_template",
+    "clear_template_cache",
+]
@@ -0,0 +1,122 @@
+"""Turn "replace the whole text" into the few edits that actually differ.
+
+Text widgets pay for every character they delete and insert, and a full
+replace also loses the scroll position, the selection and the undo history.
+:func:`text_edits` trims the common prefix and suffix, then runs a line diff
+over what is left.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+
+# Past this many lines on either side the line diff is skipped and the
+# trimmed middle is replaced in one piece.
+_MAX_DIFF_LINES = 50_000
+
+
+@dataclass(frozen=True)
+class TextEdit:
+    """Replace ``start`` up to ``end`` of the old text with ``text``.
+
+    Positions are ``(line, column)`` pairs, both counted from zero.  Edits
+    are listed back to front, so applying them in order keeps the positions
+    of the remaining ones valid.
+    """
+
+    start: tuple[int, int]
+    end: tuple[int, int]
+    text: str
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix, found by halving slices compared in C."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix_length(a: str, b: str, limit: int | None = None) -> int:
+    """Length of the common suffix, at most ``limit`` characters."""
+    low, high = 0, min(len(a), len(b))
+    if limit is not None:
+        high = min(high, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle : len(a) - low] == b[len(b) - middle : len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _split_lines(text: str) -> list[str]:
+    # ``str.splitlines`` also breaks on ``\r`` and friends; text widgets
+    # only know ``\n``.
+    parts = text.split("\n")
+    lines = [part + "\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def text_edits(old: str, new: str) -> list[TextEdit]:
+    """Return the edits turning ``old`` into ``new``, last edit first."""
+    if old == new:
+        return []
+    prefix = common_prefix_length(old, new)
+    suffix = common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+
+    # Widen the changed middle to whole lines so it can be diffed by line.
+    start = old.rfind("\n", 0, prefix) + 1
+    newline = old.find("\n", len(old) - suffix)
+    old_end = len(old) if newline < 0 else newline + 1
+    new_end = len(new) - (len(old) - old_end)
+    first_line = old.count("\n", 0, start)
+    old_lines = _split_lines(old[start:old_end])
+    new_lines = _split_lines(new[start:new_end])
+
+    def position(line: int) -> tuple[int, int]:
+        # Where old line ``line`` of the middle starts; past a last line
+        # without a newline that is the end of the document.
+        if line == len(old_lines) and old_lines and not old_lines[-1].endswith("\n"):
+            return first_line + line - 1, len(old_lines[-1])
+        return first_line + line, 0
+
+    if len(old_lines) > _MAX_DIFF_LINES or len(new_lines) > _MAX_DIFF_LINES:
+        opcodes = [("replace", 0, len(old_lines), 0, len(new_lines))]
+    else:
+        opcodes = SequenceMatcher(None, old_lines, new_lines).get_opcodes()
+
+    edits: list[TextEdit] = []
+    for tag, i1, i2, j1, j2 in reversed(opcodes):
+        if tag == "equal":
+            continue
+        if i2 - i1 == 1 and j2 - j1 == 1:
+            # One line changed: only touch the characters that differ.
+            before, after = old_lines[i1], new_lines[j1]
+            head = common_prefix_length(before, after)
+            tail = common_suffix_length(before, after, min(len(before), len(after)) - head)
+            line = first_line + i1
+            end = (line, len(before) - tail)
+            if tail == 0 and before.endswith("\n"):
+                end = (line + 1, 0)
+            edits.append(TextEdit((line, head), end, after[head : len(after) - tail]))
+            continue
+        edits.append(TextEdit(position(i1), position(i2), "".join(new_lines[j1:j2])))
+    return edits
+
+
+__all__ = [
+    "TextEdit",
+    "common_prefix_length",
+    "common_suffix_length",
+    "text_edits",
+]
@@ -2,29 +2,100 @@
 
 from __future__ import annotations
 
-import re
+from itertools import chain, islice, repeat
+from typing import Callable, Mapping, Sequence
 
+from . import perf
 from .blocks_model import Block
-
-_INPUT_PATTERN = re.compile(r"\{輸入文字\((\d+)\)\}")
+from .template_compiler import CompiledTemplate, compile_template
 
 
 def extract_input_ids_from_template(template: str) -> list[int]:
-    matches = _INPUT_PATTERN.findall(template or "")
-    return list(dict.fromkeys(int(m) for m in matches))
+    return list(compile_template(template or "").input_ids)
 
 
 def render_template(template: str, values: dict[int, str]) -> str:
-    def replace(match: re.Match[str]) -> str:
-        idx = int(match.group(1))
-        return values.get(idx, "")
-
-    return _INPUT_PATTERN.sub(replace, template or "")
+    return compile_template(template or "").render(values)
 
 
 def render_block_for_input(block: Block, values: dict[int, str]) -> str:
-    return render_template(block.input_template, values)
+    return block.compiled_input_template.render(values)
 
 
 def render_block_for_output(block: Block, values: dict[int, str]) -> str:
-    return render_template(block.output_template, values)
\ No newline at end of file
+    return block.compiled_output_template.render(values)
+
+
+_SINK_CHUNK_ROWS = 4096
+
+
+def _column_length(columns: Mapping[int, Sequence[str]], rows: int | None) -> int:
+    lengths = {len(column) for column in columns.values()}
+    if rows is not None:
+        lengths.add(rows)
+    if len(lengths) > 1:
+        raise ValueError(f"輸入欄位長度不一致: {sorted(lengths)}")
+    return lengths.pop() if lengths else 0
+
+
+def _write_rows(
+    plan: CompiledTemplate,
+    columns: Mapping[int, Sequence[str]],
+    count: int,
+    sink: Callable[[str], object],
+    separator: str,
+) -> None:
+    # Interleave shared literals with the value columns and join whole chunks
+    # at once, so no per-row string is ever built.
+    literals = list(plan.literals)
+    literals[-1] += separator
+    streams = [repeat(literals[0], count)]
+    for slot, literal in zip(plan.slots, literals[1:]):
+        column = columns.get(slot)
+        streams.append(iter(column) if column is not None else repeat("", count))
+        streams.append(repeat(literal, count))
+    rows = zip(*streams)
+    for _ in range(0, count, _SINK_CHUNK_ROWS):
+        sink("".join(chain.from_iterable(islice(rows, _SINK_CHUNK_ROWS))))
+
+
+@perf.timed("render.template_many")
+def render_template_many(
+    template: str,
+    columns: Mapping[int, Sequence[str]],
+    *,
+    rows: int | None = None,
+    sink: Callable[[str], object] | None = None,
+    separator: str = "\n",
+) -> list[str] | None:
+    """Render ``template`` once per row of column-oriented values.
+
+    ``columns`` maps each ``{輸入文字(n)}`` index to one value per row; slots
+    without a column render as empty text.  ``rows`` is only needed when no
+    column is given.  Without ``sink`` the rendered rows are returned as a
+    list.  With ``sink`` (for example ``file.write``) the rows are streamed to
+    it in chunks, each row followed by ``separator``, and nothing is returned.
+    """
+    plan = compile_template(template or "")
+    count = _column_length(columns, rows)
+    if sink is not None:
+        _write_rows(plan, columns, count, sink, separator)
+        return None
+    if not plan.slots:
+        return [plan.source] * count
+    args = [columns.get(idx) or repeat("", count) for idx in plan.input_ids]
+    return list(map(plan.format_string.format, *args))
+
+
+def render_many(
+    block: Block,
+    columns: Mapping[int, Sequence[str]],
+    *,
+    rows: int | None = None,
+    sink: Callable[[str], object] | None = None,
+    separator: str = "\n",
+) -> list[str] | None:
+    """Batch counterpart of :func:`render_block_for_output`."""
+    return render_template_many(
+        block.output_template, columns, rows=rows, sink=sink, separator=separator
+    )
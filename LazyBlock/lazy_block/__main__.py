@@ -0,0 +1,6 @@
+from lazy_block.cli import main
+
+# Worker processes of the parallel transform are spawned and re-import this
+# module; they must not run the command again.
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,264 @@
+"""Headless command line entry point: ``python -m lazy_block``.
+
+Only :mod:`core` and the standard library are imported here, so the commands
+run on machines without a display and start in a few tens of milliseconds.
+
+``transform``
+    Stream B text from stdin or files to C text on stdout, in batches of
+    whole lines so memory stays bounded whatever the input size.
+``render``
+    Render one block for every row of a CSV or JSONL value file.
+
+Both take ``--jobs N`` to spread the work over N processes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import re
+import sys
+from pathlib import Path
+from typing import IO, Iterable, Iterator, Sequence
+
+from core.blocks_storage import BlockEntry, list_block_handles, resolve_block
+from core.document_transformer import DocumentTransformer
+from core.packed_library import PACK_SUFFIX, PackedLibrary
+from core.storage_backend import STORAGE_BACKENDS, open_block_storage
+from core.transform_engine import render_template_many
+
+# Lines are read and transformed in batches of about this many characters.
+_BATCH_CHARS = 1 << 20
+# Value files are rendered this many rows at a time.
+_BATCH_ROWS = 4096
+_COLUMN_PATTERN = re.compile(r"^(?:輸入文字\()?(\d+)\)?$")
+
+
+class CliError(Exception):
+    """A problem worth one line on stderr rather than a traceback."""
+
+
+def load_library(location: Path, backend: str = "folder") -> list[BlockEntry]:
+    """Every block of a block folder, SQLite library or packed library file."""
+    if location.suffix == PACK_SUFFIX:
+        with PackedLibrary(location) as library:
+            return [block for _entry_name, block in library.iter_blocks()]
+    if not location.exists():
+        raise CliError(f"找不到方塊庫: {location}")
+    if backend == "folder":
+        # Handles come from the folder index; templates load on first use.
+        return list(list_block_handles(location))
+    storage = open_block_storage(location, backend)
+    try:
+        return [block for block, _entry_name in storage.list_entries()]
+    finally:
+        storage.close()
+
+
+@contextlib.contextmanager
+def _open_text(path: str, mode: str) -> Iterator[IO[str]]:
+    # newline="" keeps "\r\n" intact on the way through.
+    if path != "-":
+        with open(path, mode, encoding="utf-8", newline="") as file:
+            yield file
+        return
+    stream = io.TextIOWrapper(
+        sys.stdin.buffer if "r" in mode else sys.stdout.buffer, encoding="utf-8", newline=""
+    )
+    try:
+        yield stream
+    finally:
+        # Leave the process's own stdin/stdout open.
+        stream.flush()
+        stream.detach()
+
+
+def iter_line_batches(stream: IO[str], batch_chars: int = _BATCH_CHARS) -> Iterator[str]:
+    """Yield the stream as strings of whole lines, about ``batch_chars`` each."""
+    while True:
+        lines = stream.readlines(batch_chars)
+        if not lines:
+            return
+        yield "".join(lines)
+
+
+def transform_stream(transformer: DocumentTransformer, source: IO[str], output: IO[str]) -> None:
+    # Block tokens never span lines, so whole-line batches transform alone.
+    for batch in iter_line_batches(source):
+        output.write(transformer.transform(batch))
+
+
+def _iter_input_batches(paths: Sequence[str]) -> Iterator[str]:
+    for path in paths:
+        with _open_text(path, "r") as source:
+            yield from iter_line_batches(source)
+
+
+def _column_ids(names: Iterable[str]) -> dict[str, int]:
+    ids: dict[str, int] = {}
+    for name in names:
+        match = _COLUMN_PATTERN.match(str(name).strip())
+        if match is None:
+            raise CliError(f"無法辨識的欄位名稱: {name!r}（請使用 1、2… 或 輸入文字(1)…）")
+        ids[name] = int(match.group(1))
+    return ids
+
+
+def iter_value_rows(path: str, value_format: str) -> Iterator[dict[int, str]]:
+    """Rows of a CSV (header row of input ids) or JSONL (one object per line) file."""
+    with _open_text(path, "r") as stream:
+        if value_format == "csv":
+            reader = csv.DictReader(stream)
+            header = _column_ids(reader.fieldnames or ())
+            for row in reader:
+                yield {header[name]: value or "" for name, value in row.items() if name in header}
+            return
+        ids: dict[str, int] = {}
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise CliError(f"第 {number} 行不是有效的 JSON: {exc}") from exc
+            if not isinstance(record, dict):
+                raise CliError(f"第 {number} 行必須是 JSON 物件")
+            if not ids.keys() >= record.keys():
+                ids.update(_column_ids(record.keys() - ids.keys()))
+            yield {
+                ids[name]: value if isinstance(value, str) else "" if value is None else str(value)
+                for name, value in record.items()
+            }
+
+
+def render_rows(
+    template: str,
+    input_ids: Sequence[int],
+    rows: Iterable[dict[int, str]],
+    output: IO[str],
+    *,
+    jobs: int = 1,
+) -> int:
+    """Render ``template`` for each row in column batches; return the row count."""
+    count = 0
+
+    def batches() -> Iterator[list[dict[int, str]]]:
+        nonlocal count
+        batch: list[dict[int, str]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= _BATCH_ROWS:
+                count += len(batch)
+                yield batch
+                batch = []
+        if batch:
+            count += len(batch)
+            yield batch
+
+    def columns(batch: list[dict[int, str]]) -> dict[int, list[str]]:
+        return {idx: [row.get(idx, "") for row in batch] for idx in input_ids}
+
+    if jobs > 1 and input_ids:
+        # Imported here: process pools pull in multiprocessing, which would
+        # slow down every single-process run.
+        from core.parallel_transform import parallel_render_many
+
+        for text in parallel_render_many(template, map(columns, batches()), workers=jobs):
+            output.write(text)
+        return count
+    for batch in batches():
+        render_template_many(template, columns(batch), rows=len(batch), sink=output.write)
+    return count
+
+
+def _find_block(library: list[BlockEntry], name: str) -> BlockEntry:
+    for entry in library:
+        if entry.name == name or getattr(entry, "entry_name", None) == name:
+            return entry
+    raise CliError(f"找不到方塊: {name}")
+
+
+def _jobs(args: argparse.Namespace) -> int:
+    if args.jobs > 0:
+        return args.jobs
+    from core.parallel_transform import default_workers
+
+    return default_workers()
+
+
+def _command_transform(args: argparse.Namespace) -> int:
+    library = load_library(args.library, args.backend)
+    jobs = _jobs(args)
+    with _open_text(args.output, "w") as output:
+        if jobs > 1:
+            from core.parallel_transform import parallel_transform
+
+            batches = _iter_input_batches(args.inputs or ["-"])
+            for text in parallel_transform(batches, library, workers=jobs):
+                output.write(text)
+            return 0
+        transformer = DocumentTransformer(library)
+        for path in args.inputs or ["-"]:
+            with _open_text(path, "r") as source:
+                transform_stream(transformer, source, output)
+    return 0
+
+
+def _command_render(args: argparse.Namespace) -> int:
+    block = resolve_block(_find_block(load_library(args.library, args.backend), args.block))
+    template = block.input_template if args.template == "input" else block.output_template
+    value_format = args.format or ("csv" if args.values.lower().endswith(".csv") else "jsonl")
+    with _open_text(args.output, "w") as output:
+        rows = iter_value_rows(args.values, value_format)
+        render_rows(template, block.used_inputs, rows, output, jobs=_jobs(args))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m lazy_block", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_library_options(command: argparse.ArgumentParser) -> None:
+        command.add_argument(
+            "--library",
+            type=Path,
+            required=True,
+            help="block folder, SQLite library or .lzbpack file",
+        )
+        command.add_argument("--backend", choices=STORAGE_BACKENDS, default="folder")
+        command.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+        command.add_argument(
+            "-j", "--jobs", type=int, default=1, help="worker processes, 0 for one per CPU (default: 1)"
+        )
+
+    transform = commands.add_parser("transform", help="convert B text to C text")
+    add_library_options(transform)
+    transform.add_argument("inputs", nargs="*", help="input files (default: stdin)")
+    transform.set_defaults(handler=_command_transform)
+
+    render = commands.add_parser("render", help="render one block per row of a value file")
+    add_library_options(render)
+    render.add_argument("--block", required=True, help="block name or folder name")
+    render.add_argument("--values", required=True, help="CSV or JSONL file, '-' for stdin")
+    render.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file suffix")
+    render.add_argument("--template", choices=("input", "output"), default="output")
+    render.set_defaults(handler=_command_render)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. piped into ``head``); that is not an error.
+        return 0
+    except (CliError, OSError, ValueError) as exc:
+        print(f"lazy_block: {exc}", file=sys.stderr)
+        return 2
+
+
+__all__ = ["CliError", "build_parser", "load_library", "main"]
@@ -1,33 +1,52 @@
 """Main entry point for Lazy Block UI demo."""
 from __future__ import annotations
 
+import os
+import time
+from dataclasses import replace
 from pathlib import Path
-from tkinter import messagebox, simpledialog
+from tkinter import filedialog, messagebox, simpledialog
+from typing import TYPE_CHECKING, Callable
 
-from lazy_block.ttk_compat import ttk
+from lazy_block.ttk_compat import theme_available, ttk
 
+from core import perf
 from core.blocks_model import Block
-from core.blocks_storage import (
-    delete_block,
-    list_block_folder_entries,
-    rename_block_folder,
-    save_block,
-)
+from core.blocks_storage import BlockEntry, resolve_block
+from core.document_transformer import DocumentTransformer
+from core.large_document import MappedDocument, stream_transform, stream_transform_chunks
+from core.settings import load_settings, save_settings
+from core.storage_backend import BlockStorage, open_block_storage
 from core.transform_engine import render_block_for_input, render_block_for_output
 from ui.dialog_create_block import show_create_block_dialog
+from ui.live_sync import LiveSync
 from ui.panel_blocks import BlocksPanel
 from ui.panel_editor import EditorPanel
 from ui.panel_output import OutputPanel
 from ui.topbar import TopBar
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
 
-def main() -> None:
-    root = ttk.Window(themename="journal")
-    root.title("Lazy Block")
-    root.geometry("1200x720")
-    style = ttk.Style()
+    from core.block_lint import BlockLinter, LibraryLint, LintJob
+    from core.blocks_loader import FolderLoader, FolderLoadJob
+    from core.blocks_writer import BlockWriter
+    from core.blocks_watcher import BlockChange, BlockFolderWatcher
+    from ui.dialog_perf import PerfWindow
+
+_LOAD_POLL_MS = 16
+_LOAD_FRAME_BUDGET_S = 0.008
+_EDITOR_CHUNK_BYTES = 256 * 1024
+_TRANSFORM_POLL_MS = 100
+_WRITE_POLL_MS = 50
+_LINT_POLL_MS = 100
+# Below this, starting worker processes costs more than it saves.
+_PARALLEL_TRANSFORM_BYTES = 32 * 1024 * 1024
+_DEFAULT_THEME = "journal"
 
-    sample_blocks = [
+
+def _sample_blocks() -> list[Block]:
+    return [
         Block(
             name="upgrade",
             display_text="升級",
@@ -44,64 +63,167 @@ def main() -> None:
         ),
     ]
 
+
+def main(
+    storage_backend: str | None = None,
+    *,
+    on_first_frame: Callable[[ttk.Window], None] | None = None,
+) -> None:
+    """Run the app.
+
+    Only what the first frame needs happens before the window is drawn;
+    seeding the sample blocks and loading the block folder follow once it is
+    mapped, and ``on_first_frame`` (used by the startup benchmark) is called
+    in between.
+    """
+    backend = storage_backend or os.environ.get("LAZY_BLOCK_STORAGE", "folder")
+    settings = load_settings()
+    if settings.theme is not None and not theme_available(settings.theme):
+        # A theme that was removed or renamed would stop the app from starting.
+        print(f"Unknown theme {settings.theme!r}, using {_DEFAULT_THEME!r}")
+        settings = replace(settings, theme=None)
+        try:
+            save_settings(settings)
+        except OSError as exc:
+            print(f"Unable to save settings: {exc}")
+    # Creating the window with the saved theme styles it once, before the
+    # first paint, instead of restyling everything after it.
+    root = ttk.Window(themename=settings.theme or _DEFAULT_THEME)
+    root.title("Lazy Block")
+    root.geometry("1200x720")
+
     project_root = Path(__file__).resolve().parent.parent
     blocks_root = project_root / "blocks"
     default_folder = blocks_root / "samples"
     default_folder.mkdir(parents=True, exist_ok=True)
-    for block in sample_blocks:
-        block_folder = default_folder / block.name
-        block_file = block_folder / "block.json"
-        if not block_file.exists():
-            save_block(block, block_folder)
+    storage: BlockStorage = open_block_storage(default_folder, backend)
 
     current_folder_path = str(default_folder)
-    block_locations: dict[str, Path] = {}
+    block_entries: dict[str, str] = {}
+    block_names_by_entry: dict[str, str] = {}
+    document_transformer = DocumentTransformer()
+    # The loader's thread pool, the watcher and the transform executor pull
+    # in concurrent.futures and ctypes; they are created on first use.
+    folder_watcher: BlockFolderWatcher | None = None
+    folder_loader: FolderLoader | None = None
+    load_job: FolderLoadJob | None = None
+    block_linter: BlockLinter | None = None
+    library_lint: LibraryLint | None = None
+    lint_job: LintJob | None = None
+    # Entries re-checked one by one while the library-wide check runs; its
+    # (older) results for them are ignored.
+    linted_since_start: set[str] = set()
+    transform_executor: ThreadPoolExecutor | None = None
+    transform_future: Future[int] | None = None
+    block_writer: BlockWriter | None = None
+    large_document: MappedDocument | None = None
+    perf_window: PerfWindow | None = None
+    load_started_ns = 0
 
     def handle_category_changed(name: str) -> None:
         print(f"Category changed: {name}")
 
+    def get_block_writer() -> BlockWriter:
+        nonlocal block_writer
+        if block_writer is None:
+            from core.blocks_writer import BlockWriter
+
+            block_writer = BlockWriter(storage)
+        return block_writer
+
+    def close_block_writer() -> None:
+        # Waits for queued writes; they must land before the storage closes.
+        nonlocal block_writer
+        if block_writer is not None:
+            block_writer.close()
+            block_writer = None
+
+    def entry_taken(entry_name: str) -> bool:
+        if entry_name in block_names_by_entry:
+            return True
+        # A queued delete or rename may not have reached storage yet.
+        if block_writer is not None and block_writer.is_pending(entry_name):
+            return False
+        return storage.exists(entry_name)
+
+    def track_write(future: Future, title: str) -> None:
+        """Report a failed background write and reload to undo the optimistic update."""
+        if not future.done():
+            root.after(_WRITE_POLL_MS, track_write, future, title)
+            return
+        error = future.exception()
+        if error is None:
+            return
+        messagebox.showerror(title, str(error), parent=root)
+        load_blocks_from_folder(current_folder_path)
+
     def handle_create_block() -> None:
         if not current_folder_path:
             messagebox.showerror("創建方塊失敗", "請先選擇資料夾。", parent=root)
             return
 
         def _on_submit(block: Block) -> None:
-            folder = Path(current_folder_path)
-            block_folder = folder / block.name
-            if block_folder.exists():
+            if block.name in block_entries or entry_taken(block.name):
                 messagebox.showerror(
                     "創建方塊失敗",
-                    f"資料夾已存在：{block_folder}",
+                    f"方塊已存在：{block.name}",
                     parent=root,
                 )
                 return
-            save_block(block, block_folder)
-            load_blocks_from_folder(current_folder_path)
+            track_write(get_block_writer().save(block), "創建方塊失敗")
+            apply_storage_change("added", block.name, block)
+            graph = document_transformer.graph
+            cycle = graph.find_cycle(block.name) if block.name in graph else None
+            if cycle is not None:
+                messagebox.showwarning(
+                    "方塊引用形成循環",
+                    f"{' → '.join(cycle)}\n請修改其中一個方塊的 {{方塊(名稱)}} 引用。",
+                    parent=root,
+                )
 
         show_create_block_dialog(root, on_submit=_on_submit)
 
     def handle_theme_changed(theme: str) -> None:
+        nonlocal settings
+        style = ttk.Style()
         if hasattr(style, "theme_use"):
             try:
                 style.theme_use(theme)
                 print(f"Theme changed to: {theme}")
             except Exception as exc:  # pragma: no cover - visual aid
                 print(f"Unable to change theme: {exc}")
+                return
+        settings = replace(settings, theme=theme)
+        try:
+            save_settings(settings)
+        except OSError as exc:
+            print(f"Unable to save settings: {exc}")
+
+    def handle_tool_invoked(tool: str) -> None:
+        nonlocal perf_window
+        if tool == "開啟大型文件":
+            open_large_document()
+        elif tool == "性能":
+            from ui.dialog_perf import show_perf_window
+
+            perf_window = show_perf_window(root, perf_window)
 
     tool_catalog = {
         "主要": ("快速輸入", "片語組合"),
-        "功能": ("複製輸出", "清空輸入"),
+        "功能": ("複製輸出", "清空輸入", "開啟大型文件"),
         "美術": tuple(),
-        "其他": ("設定",),
+        "其他": ("設定", "性能"),
     }
 
-    TopBar(
+    top_bar = TopBar(
         root,
         on_category_changed=handle_category_changed,
         on_create_block=handle_create_block,
         tools_by_category=tool_catalog,
         on_theme_changed=handle_theme_changed,
-    ).pack(fill="x")
+        on_tool_invoked=handle_tool_invoked,
+    )
+    top_bar.pack(fill="x")
 
     main_frame = ttk.Frame(root)
     main_frame.pack(fill="both", expand=True)
@@ -112,10 +234,12 @@ def main() -> None:
 
     editor_panel = EditorPanel(main_frame)
     output_panel = OutputPanel(main_frame)
+    live_sync = LiveSync(editor_panel, output_panel, document_transformer.transform)
     blocks_panel: BlocksPanel | None = None
 
-    def prompt_for_inputs(block: Block) -> dict[int, str] | None:
-        input_ids = block.inputs or block.get_used_inputs_from_templates()
+    def prompt_for_inputs(block: Block, nested_inputs: tuple[int, ...]) -> dict[int, str] | None:
+        # Blocks referenced with {方塊(name)} share the parent's inputs.
+        input_ids = sorted(set(block.inputs or block.used_inputs).union(nested_inputs))
         if not input_ids:
             return {}
         values: dict[int, str] = {}
@@ -126,7 +250,16 @@ def main() -> None:
             values[idx] = value
         return values
 
-    def handle_block_clicked(block: Block) -> None:
+    def handle_block_clicked(entry: BlockEntry) -> None:
+        nonlocal transform_future
+        graph = document_transformer.graph
+        try:
+            block = resolve_block(entry)
+            nested = block.name in graph
+            nested_inputs = graph.used_inputs(block.name) if nested else ()
+        except (OSError, ValueError, KeyError) as exc:
+            messagebox.showerror("讀取方塊失敗", str(exc), parent=root)
+            return
         validation = block.validate_inputs()
         if validation.missing_inputs:
             messagebox.showwarning(
@@ -134,36 +267,302 @@ def main() -> None:
                 f"方塊缺少輸入: {', '.join(str(i) for i in validation.missing_inputs)}",
                 parent=root,
             )
-        values = prompt_for_inputs(block)
+        values = prompt_for_inputs(block, nested_inputs)
         if values is None:
             return
-        editor_panel.set_text(render_block_for_input(block, values))
-        output_panel.set_text(render_block_for_output(block, values))
+        try:
+            if nested:
+                input_text = graph.render(block.name, values, side="input")
+                output_text = graph.render(block.name, values, side="output")
+            else:
+                input_text = render_block_for_input(block, values)
+                output_text = render_block_for_output(block, values)
+        except (OSError, ValueError, KeyError) as exc:
+            messagebox.showerror("讀取方塊失敗", str(exc), parent=root)
+            return
+        transform_future = None
+        with perf.span("app.show_block"):
+            editor_panel.set_text(input_text)
+            output_panel.set_text(output_text)
+        live_sync.detach()
 
-    def load_blocks_from_folder(path: str) -> None:
-        folder = Path(path)
+    def open_large_document() -> None:
+        # Large documents skip live sync: panel B is fed in chunks, the full
+        # transform streams to a file on a worker thread, and panel C pages
+        # through that file.
+        nonlocal transform_executor, transform_future, large_document
+        source = filedialog.askopenfilename(title="開啟大型文件", parent=root)
+        if not source:
+            return
+        source_path = Path(source)
+        target = filedialog.asksaveasfilename(
+            title="轉換結果存放位置",
+            initialdir=str(source_path.parent),
+            initialfile=f"{source_path.stem}_轉換{source_path.suffix}",
+            parent=root,
+        )
+        if not target:
+            return
+        try:
+            document = MappedDocument(source_path)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("開啟文件失敗", str(exc), parent=root)
+            return
+        if large_document is not None:
+            large_document.close()
+        large_document = document
+
+        live_sync.pause()
+        output_panel.set_text("轉換中…", diff=False)
+        editor_panel.feed_text(
+            # Only shown, not transformed: any character boundary will do.
+            (text for text, _end in document.iter_chunks(_EDITOR_CHUNK_BYTES, cut=len)),
+            on_done=document.close,
+        )
+        progress = [0, document.size]
+
+        def report(done: int, total: int) -> None:
+            progress[:] = [done, total]
+
+        if transform_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            transform_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="lazy-block-transform"
+            )
+        workers = 1
+        if document.size >= _PARALLEL_TRANSFORM_BYTES:
+            # Imported here: process pools pull in multiprocessing.
+            from core.parallel_transform import default_workers, parallel_transform
+
+            workers = default_workers()
+        # Its own copy: the transform thread also uses it to find where a
+        # very long line can be cut.
+        transformer = document_transformer.copy()
+        if workers > 1:
+            library = transformer.blocks()
+            transform_future = transform_executor.submit(
+                stream_transform_chunks,
+                source_path,
+                Path(target),
+                lambda texts: parallel_transform(texts, library, workers=workers),
+                cut=transformer.safe_cut,
+                on_progress=report,
+            )
+        else:
+            transform_future = transform_executor.submit(
+                stream_transform,
+                source_path,
+                Path(target),
+                transformer.transform,
+                cut=transformer.safe_cut,
+                on_progress=report,
+            )
+        root.after(_TRANSFORM_POLL_MS, poll_transform, transform_future, Path(target), progress)
+
+    def poll_transform(future: Future[int], target: Path, progress: list[int]) -> None:
+        if future is not transform_future:
+            return
+        if not future.done():
+            done, total = progress
+            output_panel.set_text(f"轉換中… {done / max(total, 1):.0%}", diff=False)
+            root.after(_TRANSFORM_POLL_MS, poll_transform, future, target, progress)
+            return
         try:
-            entries = list_block_folder_entries(folder)
+            future.result()
+            output = MappedDocument(target)
         except Exception as exc:
-            messagebox.showerror("讀取方塊失敗", str(exc), parent=root)
+            output_panel.set_text("", diff=False)
+            messagebox.showerror("轉換失敗", str(exc), parent=root)
+            return
+        output_panel.show_document(output)
+
+    def load_blocks_from_folder(path: str) -> None:
+        nonlocal folder_watcher, folder_loader, load_job, lint_job, storage, load_started_ns
+        load_started_ns = time.perf_counter_ns()
+        lint_job = None
+        if library_lint is not None:
+            library_lint.clear()
+        if folder_watcher is not None:
+            folder_watcher.close()
+            folder_watcher = None
+        block_entries.clear()
+        block_names_by_entry.clear()
+        if storage.root_folder != Path(path):
+            close_block_writer()
+            storage.close()
+            storage = open_block_storage(Path(path), backend)
+        if backend != "folder":
+            # Database backends answer in one query and have nobody else
+            # writing behind our back, so there is nothing to stream or watch.
+            load_job = None
+            entries = storage.list_entries()
+            for block, entry_name in entries:
+                block_entries[block.name] = entry_name
+                block_names_by_entry[entry_name] = block.name
+            blocks = [block for block, _ in entries]
+            document_transformer.sync(blocks)
+            live_sync.refresh()
+            if blocks_panel is not None:
+                blocks_panel.set_blocks(blocks)
+            perf.record("app.folder_load", load_started_ns)
+            start_lint([(entry_name, block) for block, entry_name in entries], None)
+            return
+        if blocks_panel is not None:
+            blocks_panel.begin_loading()
+        if folder_loader is None:
+            from core.blocks_loader import FolderLoader
+
+            folder_loader = FolderLoader()
+        load_job = folder_loader.load(Path(path), watch=True)
+        root.after(_LOAD_POLL_MS, pump_folder_load, load_job, [])
+
+    def pump_folder_load(job: FolderLoadJob, blocks: list[BlockEntry]) -> None:
+        # Hand batches to the panel within a per-frame budget so the window
+        # keeps repainting while a large folder streams in.
+        if job is not load_job:
+            return
+        deadline = time.perf_counter() + _LOAD_FRAME_BUDGET_S
+        while time.perf_counter() < deadline:
+            batches = job.drain(limit=1)
+            if not batches:
+                break
+            batch = batches[0]
+            if batch.error is not None:
+                job.cancel()
+                if blocks_panel is not None:
+                    blocks_panel.finish_loading()
+                messagebox.showerror("讀取方塊失敗", str(batch.error), parent=root)
+                return
+            for handle in batch.entries:
+                block_entries[handle.name] = handle.entry_name
+                block_names_by_entry[handle.entry_name] = handle.name
+            blocks.extend(batch.entries)
+            if blocks_panel is not None:
+                blocks_panel.append_blocks(batch.entries)
+                blocks_panel.set_load_progress(batch.loaded, batch.total)
+            if batch.done:
+                finish_folder_load(job, blocks)
+                return
+        root.after(_LOAD_POLL_MS, pump_folder_load, job, blocks)
+
+    def finish_folder_load(job: FolderLoadJob, blocks: list[BlockEntry]) -> None:
+        nonlocal folder_watcher
+        document_transformer.sync(blocks)
+        live_sync.refresh()
+        if blocks_panel is not None:
+            blocks_panel.finish_loading()
+        folder_watcher = job.take_watcher()
+        perf.record("app.folder_load", load_started_ns)
+        print(f"Loaded {len(blocks)} blocks from {job.root_folder}")
+        # Folder loads produce handles, which know their entry names.
+        start_lint([(handle.entry_name, handle) for handle in blocks], job.root_folder)
+
+    def start_lint(entries: list[tuple[str, BlockEntry]], root_folder: Path | None) -> None:
+        nonlocal block_linter, library_lint, lint_job
+        if block_linter is None:
+            from core.block_lint import BlockLinter, LibraryLint
+
+            block_linter = BlockLinter()
+            library_lint = LibraryLint()
+        assert library_lint is not None
+        library_lint.clear()
+        linted_since_start.clear()
+        if blocks_panel is not None:
+            blocks_panel.clear_issues()
+        lint_job = block_linter.check(entries, root_folder)
+        root.after(_LINT_POLL_MS, pump_lint, lint_job)
+
+    def pump_lint(job: LintJob) -> None:
+        if job is not lint_job or library_lint is None:
+            return
+        changed: set[str] = set()
+        done = False
+        error: Exception | None = None
+        for batch in job.drain():
+            for entry_name, name, findings in batch.results:
+                if entry_name not in linted_since_start:
+                    changed |= library_lint.update(entry_name, name, findings)
+            error = error or batch.error
+            done = done or batch.done
+        # Findings already drained stay visible even when the check failed.
+        show_issues(changed)
+        if error is not None:
+            messagebox.showwarning("方塊檢查失敗", f"部分方塊未能檢查：{error}", parent=root)
+        elif not done:
+            root.after(_LINT_POLL_MS, pump_lint, job)
+
+    def lint_change(entry_name: str, block: BlockEntry | None) -> None:
+        if library_lint is None:
             return
-        block_locations.clear()
-        blocks: list[Block] = []
-        for block, block_path in entries:
-            block_locations[block.name] = block_path
-            blocks.append(block)
+        if block is None:
+            changed = library_lint.remove(entry_name)
+        else:
+            from core.block_lint import LintFinding, lint_block
+
+            try:
+                findings = lint_block(resolve_block(block))
+            except (OSError, ValueError, KeyError) as exc:
+                findings = (LintFinding("unreadable", f"無法讀取方塊：{exc}"),)
+            changed = library_lint.update(entry_name, block.name, findings)
+        linted_since_start.add(entry_name)
+        show_issues(changed)
+
+    def show_issues(names: set[str]) -> None:
+        if not names or blocks_panel is None or library_lint is None:
+            return
+        blocks_panel.set_issues(
+            {name: [finding.message for finding in library_lint.findings(name)] for name in names}
+        )
+
+    def apply_block_change(change: BlockChange) -> None:
+        previous = block_names_by_entry.pop(change.entry_name, None)
+        block = change.block
+        if previous is not None and (block is None or block.name != previous):
+            block_entries.pop(previous, None)
+            document_transformer.remove_block(previous)
+            if blocks_panel is not None:
+                blocks_panel.remove_block(previous)
+        lint_change(change.entry_name, block)
+        if block is None:
+            return
+        block_names_by_entry[change.entry_name] = block.name
+        block_entries[block.name] = change.entry_name
+        document_transformer.add_block(block)
         if blocks_panel is not None:
-            blocks_panel.set_blocks(blocks)
-        print(f"Loaded {len(blocks)} blocks from {folder}")
+            blocks_panel.upsert_block(block)
+
+    def apply_folder_changes() -> None:
+        if folder_watcher is None:
+            return
+        changes = folder_watcher.poll()
+        for change in changes:
+            apply_block_change(change)
+        if changes:
+            live_sync.refresh()
+
+    def apply_storage_change(kind: str, entry_name: str, block: Block | None = None) -> None:
+        # Applied before the write lands; the folder watcher reporting it
+        # later changes nothing.
+        from core.blocks_watcher import BlockChange
+
+        folder = storage.location / entry_name if backend == "folder" else None
+        apply_block_change(BlockChange(kind, entry_name, folder, block))
+        live_sync.refresh()
+
+    def watch_folder() -> None:
+        apply_folder_changes()
+        interval = folder_watcher.poll_interval_ms if folder_watcher is not None else 1000
+        root.after(interval, watch_folder)
 
     def handle_folder_changed(path: str) -> None:
         nonlocal current_folder_path
         current_folder_path = path
         load_blocks_from_folder(path)
 
-    def handle_block_delete(block: Block) -> None:
-        path = block_locations.get(block.name)
-        if path is None:
+    def handle_block_delete(block: BlockEntry) -> None:
+        entry_name = block_entries.get(block.name)
+        if entry_name is None:
             return
         confirm = messagebox.askyesno(
             "刪除方塊",
@@ -172,12 +571,12 @@ def main() -> None:
         )
         if not confirm:
             return
-        delete_block(path)
-        load_blocks_from_folder(current_folder_path)
+        track_write(get_block_writer().delete(entry_name), "刪除方塊失敗")
+        apply_storage_change("removed", entry_name)
 
-    def handle_block_rename(block: Block) -> None:
-        path = block_locations.get(block.name)
-        if path is None:
+    def handle_block_rename(block: BlockEntry) -> None:
+        entry_name = block_entries.get(block.name)
+        if entry_name is None:
             return
         new_name = simpledialog.askstring(
             "重新命名方塊",
@@ -185,17 +584,23 @@ def main() -> None:
             initialvalue=block.name,
             parent=root,
         )
-        if not new_name or new_name.strip() == block.name:
+        new_name = (new_name or "").strip()
+        if not new_name or new_name == block.name:
             return
-        try:
-            rename_block_folder(path, new_name.strip())
-        except FileExistsError:
+        if "/" in new_name or "\\" in new_name:
+            messagebox.showerror("重新命名失敗", "資料夾名稱不可包含路徑符號。", parent=root)
+            return
+        if entry_taken(new_name):
             messagebox.showerror("重新命名失敗", "已存在相同名稱的方塊。", parent=root)
             return
-        except Exception as exc:
+        try:
+            renamed = replace(resolve_block(block), name=new_name)
+        except (OSError, ValueError, KeyError) as exc:
             messagebox.showerror("重新命名失敗", str(exc), parent=root)
             return
-        load_blocks_from_folder(current_folder_path)
+        track_write(get_block_writer().rename(entry_name, new_name), "重新命名失敗")
+        apply_storage_change("removed", entry_name)
+        apply_storage_change("added", new_name, renamed)
 
     blocks_panel = BlocksPanel(
         main_frame,
@@ -206,12 +611,45 @@ def main() -> None:
     )
     blocks_panel.grid(row=0, column=0, sticky="nsew", padx=6, pady=6)
     blocks_panel.set_folder_path(str(default_folder))
-    load_blocks_from_folder(str(default_folder))
 
     editor_panel.grid(row=0, column=1, sticky="nsew", padx=6, pady=6)
     output_panel.grid(row=0, column=2, sticky="nsew", padx=6, pady=6)
 
+    def finish_startup() -> None:
+        root.update_idletasks()
+        if on_first_frame is not None:
+            on_first_frame(root)
+        # Written before the first load reads the folder, in one batch.
+        missing = [block for block in _sample_blocks() if not storage.exists(block.name)]
+        if missing:
+            storage.save_many([(block, block.name) for block in missing])
+        load_blocks_from_folder(current_folder_path)
+        watch_folder()
+        top_bar.prewarm()
+
+    def handle_first_map(event) -> None:
+        # <Map> on the toplevel also fires for every child; wait for the
+        # window itself.
+        if event.widget is not root:
+            return
+        root.unbind("<Map>", map_binding)
+        root.after_idle(finish_startup)
+
+    map_binding = root.bind("<Map>", handle_first_map, add="+")
+
     root.mainloop()
+    if folder_loader is not None:
+        folder_loader.shutdown()
+    if block_linter is not None:
+        block_linter.shutdown()
+    if transform_executor is not None:
+        transform_executor.shutdown(wait=False, cancel_futures=True)
+    if large_document is not None:
+        large_document.close()
+    if folder_watcher is not None:
+        folder_watcher.close()
+    close_block_writer()
+    storage.close()
 
 
 if __name__ == "__main__":
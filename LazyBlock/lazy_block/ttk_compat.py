@@ -16,16 +16,35 @@ from __future__ import annotations
 
 from typing import Any
 
+# Themes plain ttk ships with; ttkbootstrap accepts these next to its own.
+_TK_THEMES = frozenset({"alt", "aqua", "clam", "classic", "default", "vista", "winnative", "xpnative"})
+
 try:  # pragma: no cover - exercised indirectly when ttkbootstrap is present
     import ttkbootstrap as ttk  # type: ignore
+    from ttkbootstrap.themes.standard import STANDARD_THEMES  # type: ignore
+    from ttkbootstrap.themes.user import USER_THEMES  # type: ignore
+
+    def theme_available(themename: str) -> bool:
+        """Whether ``ttk.Window(themename=...)`` can apply ``themename``.
+
+        ttkbootstrap raises for a name it does not know, so a saved theme is
+        checked before the window is created.
+        """
+        return themename in STANDARD_THEMES or themename in USER_THEMES or themename in _TK_THEMES
+
 except ModuleNotFoundError:  # pragma: no cover - default path in CI
     import tkinter as tk
     from tkinter import ttk as _ttk
 
     class _Window(tk.Tk):
         def __init__(self, *args: Any, **kwargs: Any) -> None:
-            kwargs.pop("themename", None)
+            themename = kwargs.pop("themename", None)
             super().__init__(*args, **kwargs)
+            # ttkbootstrap's theme names mean nothing here, but a plain ttk
+            # theme chosen earlier (and saved in the settings) still applies.
+            style = _ttk.Style(self)
+            if themename in style.theme_names():
+                style.theme_use(themename)
 
     class _BootstrapShim:
         """Expose a subset of ttkbootstrap's API backed by tkinter.ttk."""
@@ -37,4 +56,9 @@ except ModuleNotFoundError:  # pragma: no cover - default path in CI
 
     ttk = _BootstrapShim()  # type: ignore
 
-__all__ = ["ttk"]
\ No newline at end of file
+    def theme_available(themename: str) -> bool:
+        """Whether ``ttk.Window(themename=...)`` can apply ``themename``."""
+        # The shim's window skips names it does not have instead of raising.
+        return True
+
+__all__ = ["theme_available", "ttk"]
\ No newline at end of file
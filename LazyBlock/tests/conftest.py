@@ -0,0 +1,30 @@
+"""Shared fixtures; also makes ``core`` and ``lazy_block`` importable from anywhere."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Callable, Iterable
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.blocks_model import Block  # noqa: E402
+
+
+@pytest.fixture
+def make_block() -> Callable[..., Block]:
+    """Build a block; the display text defaults to the name."""
+
+    def make(
+        name: str,
+        output: str = "",
+        *,
+        display: str | None = None,
+        input_template: str = "",
+        inputs: Iterable[int] = (),
+    ) -> Block:
+        return Block(name, name if display is None else display, input_template, output, inputs)
+
+    return make
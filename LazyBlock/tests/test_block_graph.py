@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from core.block_graph import BlockCycleError, BlockGraph, block_references
+
+
+def test_block_references_in_order_of_first_appearance():
+    assert block_references("{方塊(b)} {方塊(a)} {方塊(b)}") == ("b", "a")
+
+
+def test_render_expands_references_with_the_same_values(make_block):
+    graph = BlockGraph(
+        [make_block("inner", "[{輸入文字(1)}]"), make_block("outer", "{輸入文字(2)}{方塊(inner)}{方塊(missing)}")]
+    )
+    assert graph.render("outer", {1: "x", 2: "y"}) == "y[x]{方塊(missing)}"
+    assert graph.render("outer", {1: "x", 2: "y"}, side="input") == ""
+
+
+def test_used_inputs_include_referenced_blocks(make_block):
+    graph = BlockGraph([make_block("inner", "{輸入文字(3)}"), make_block("outer", "{輸入文字(1)}{方塊(inner)}")])
+    assert graph.used_inputs("outer", "output") == (1, 3)
+    assert graph.used_inputs("outer") == (1, 3)
+
+
+def test_cycles_are_reported(make_block):
+    graph = BlockGraph([make_block("a", "{方塊(b)}"), make_block("b", "{方塊(c)}"), make_block("c", "{方塊(a)}")])
+    assert graph.find_cycle("a") == ["a", "b", "c", "a"]
+    with pytest.raises(BlockCycleError) as excinfo:
+        graph.render("b", {})
+    assert excinfo.value.cycle == ["b", "c", "a", "b"]
+
+
+def test_changing_a_block_invalidates_its_dependents_only(make_block):
+    graph = BlockGraph(
+        [
+            make_block("leaf", "v1"),
+            make_block("middle", "({方塊(leaf)})"),
+            make_block("top", "[{方塊(middle)}]"),
+            make_block("other", "other"),
+        ]
+    )
+    assert graph.render("top", {}) == "[(v1)]"
+    graph.render("other", {})
+    assert graph.dependents("leaf") == {"middle", "top"}
+    assert graph.add_block(make_block("leaf", "v2")) == {"leaf", "middle", "top"}
+    assert graph.render("top", {}) == "[(v2)]"
+
+
+def test_new_inputs_of_a_child_change_the_parent_cache_key(make_block):
+    graph = BlockGraph([make_block("child", "fixed"), make_block("parent", "{方塊(child)}")])
+    assert graph.render("parent", {1: "a"}) == "fixed"
+    graph.add_block(make_block("child", "{輸入文字(1)}"))
+    assert graph.used_inputs("parent", "output") == (1,)
+    assert graph.render("parent", {1: "a"}) == "a"
+    assert graph.render("parent", {1: "b"}) == "b"
+
+
+def test_removing_a_block_leaves_its_reference_as_written(make_block):
+    graph = BlockGraph([make_block("child", "c"), make_block("parent", "{方塊(child)}")])
+    assert graph.render("parent", {}) == "c"
+    assert graph.remove_block("child") == {"child", "parent"}
+    assert graph.render("parent", {}) == "{方塊(child)}"
+    assert graph.remove_block("child") == set()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from core.block_lint import (
+    BlockLinter,
+    LibraryLint,
+    LintCache,
+    LintFinding,
+    content_digest,
+    lint_block,
+)
+from core.blocks_model import Block
+
+
+def _codes(block: Block) -> list[str]:
+    return [finding.code for finding in lint_block(block)]
+
+
+def test_a_clean_block_has_no_findings():
+    assert lint_block(Block("a", "A", "{輸入文字(1)}", "x {輸入文字(1)} {方塊(b)}", [1])) == ()
+
+
+def test_missing_and_unused_inputs():
+    assert _codes(Block("a", "A", "{輸入文字(1)}", "{輸入文字(2)}", [1, 3])) == [
+        "missing_input",
+        "unused_input",
+    ]
+
+
+def test_near_miss_placeholders_are_flagged():
+    for template in ("{輸入文字(x)}", "{輸入文字（1）}", "{輸入文字(1)", "輸入文字(1)}", "{方塊(b"):
+        assert _codes(Block("a", "A", "text", template)) == ["malformed_placeholder"], template
+
+
+def test_prose_mentioning_placeholders_is_not_flagged():
+    block = Block("a", "A", "text", "請在{輸入文字(1)}後輸入文字(必填)", [1])
+    assert lint_block(block) == ()
+
+
+def test_empty_templates():
+    assert _codes(Block("a", "A", " ", "")) == ["empty_template", "empty_template"]
+
+
+def test_digest_ignores_name_and_display_text():
+    assert content_digest(Block("a", "A", "x", "y")) == content_digest(Block("b", "B", "x", "y"))
+    assert content_digest(Block("a", "A", "x", "y")) != content_digest(Block("a", "A", "x", "z"))
+
+
+def test_library_lint_reports_duplicate_names():
+    lint = LibraryLint()
+    assert lint.update("one", "same", ()) == set()
+    assert lint.update("two", "same", ()) == {"same"}
+    assert [finding.code for finding in lint.findings("same")] == ["duplicate_name"]
+    assert lint.problem_count() == 1
+    assert lint.remove("two") == {"same"}
+    assert lint.findings("same") == [] and lint.problem_count() == 0
+
+
+def test_linter_checks_a_library_in_batches():
+    linter = BlockLinter(max_workers=2, batch_size=2)
+    entries = [(f"e{index}", Block(f"b{index}", "", "", f"{{輸入文字({index})}}")) for index in range(5)]
+    job = linter.check(entries, None)
+    results: list[tuple[str, str, tuple[LintFinding, ...]]] = []
+    deadline = time.monotonic() + 5
+    done = False
+    while not done and time.monotonic() < deadline:
+        for batch in job.drain():
+            assert batch.error is None
+            results.extend(batch.results)
+            done = done or batch.done
+        time.sleep(0.01)
+    linter.shutdown()
+    assert done
+    assert sorted(entry for entry, _name, _findings in results) == [f"e{index}" for index in range(5)]
+    assert all(
+        {finding.code for finding in findings} == {"missing_input", "empty_template"}
+        for _entry, _name, findings in results
+    )
+
+
+def test_a_cancelled_job_does_not_prune_a_shared_cache(tmp_path):
+    cache = LintCache(tmp_path, files={"new": [1, 2, "digest"]}, findings={"digest": ()})
+    cancelled = threading.Event()
+    cancelled.set()
+    assert not cache.retain({"old"}, cancelled)
+    assert cache.lookup("digest") == ()
+    assert cache.retain({"old"})
+    assert cache.lookup("digest") is None
+
+
+def test_a_failed_cache_save_leaves_no_temp_file(tmp_path, monkeypatch):
+    def fail(*_args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    cache = LintCache(tmp_path)
+    cache.store("digest", ())
+    cache.save()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from core.block_search import BlockSearchIndex
+
+
+@pytest.fixture
+def index(make_block) -> BlockSearchIndex:
+    return BlockSearchIndex(
+        [
+            make_block("greeting", display="問候語"),
+            make_block("greet", display="Greet"),
+            make_block("farewell", display="道別問候"),
+            make_block("table", display="表格"),
+        ]
+    )
+
+
+def test_exact_and_prefix_matches_come_before_substrings(index):
+    assert index.search("greet") == ["greet", "greeting"]
+    assert index.search("問候") == ["greeting", "farewell"]
+
+
+def test_substring_matches_rank_earliest_first(make_block):
+    index = BlockSearchIndex(
+        [
+            make_block("b", display="xx方塊"),
+            make_block("a", display="x方塊"),
+            make_block("c", display="方塊yy"),
+        ]
+    )
+    assert index.search("方塊") == ["c", "a", "b"]
+
+
+def test_search_is_case_insensitive_and_respects_the_limit(index):
+    assert index.search("  GREET ") == ["greet", "greeting"]
+    assert index.search("greet", limit=1) == ["greet"]
+    assert index.search("") == []
+
+
+def test_longer_queries_need_the_whole_substring(make_block):
+    index = BlockSearchIndex([make_block("a", display="問候語"), make_block("b", display="問候 候語")])
+    assert index.search("問候語") == ["a"]
+
+
+def test_add_and_remove_update_both_indexes(index, make_block):
+    index.add(make_block("table", display="清單"))
+    assert index.search("表格") == []
+    assert index.search("清單") == ["table"]
+    assert index.remove("table")
+    assert not index.remove("table")
+    assert index.search("清單") == [] and "table" not in index
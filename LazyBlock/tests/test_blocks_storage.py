@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from core import blocks_storage
+from core.blocks_storage import (
+    BlockCache,
+    BlockFolderIndex,
+    block_revision,
+    list_block_folder_entries,
+    list_block_handles,
+    resolve_block,
+    save_block,
+)
+
+
+@pytest.fixture
+def library(tmp_path, make_block):
+    for name in ("alpha", "beta", "gamma"):
+        save_block(make_block(name, f"out {name}", display=f"顯示 {name}"), tmp_path / name)
+    return tmp_path
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Names of the block folders parsed from disk."""
+    seen: list[str] = []
+    load_block = blocks_storage.load_block
+
+    def counting_load_block(folder):
+        seen.append(folder.name)
+        return load_block(folder)
+
+    monkeypatch.setattr(blocks_storage, "load_block", counting_load_block)
+    return seen
+
+
+def _touch(path, make_block, output: str) -> None:
+    # Same size is not enough to hide an edit: move the mtime as well.
+    info = os.stat(path / "block.json")
+    save_block(make_block(path.name, output, display=f"顯示 {path.name}"), path)
+    os.utime(path / "block.json", ns=(info.st_atime_ns, info.st_mtime_ns + 10**9))
+
+
+def test_a_warm_listing_parses_nothing(library, parsed):
+    cold = list_block_handles(library)
+    assert sorted(parsed) == ["alpha", "beta", "gamma"]
+    parsed.clear()
+    warm = list_block_handles(library)
+    assert parsed == []
+    assert sorted(warm, key=lambda handle: handle.entry_name) == sorted(
+        cold, key=lambda handle: handle.entry_name
+    )
+
+
+def test_changed_and_new_blocks_are_read_again(library, parsed, make_block):
+    list_block_handles(library)
+    parsed.clear()
+    _touch(library / "beta", make_block, "changed")
+    save_block(make_block("delta", "new"), library / "delta")
+    handles = {handle.entry_name: handle for handle in list_block_handles(library)}
+    assert sorted(parsed) == ["beta", "delta"]
+    assert handles["delta"].display_text == "delta"
+
+
+def test_removed_blocks_leave_the_index(library):
+    list_block_handles(library)
+    blocks_storage.delete_block(library / "gamma")
+    assert sorted(handle.entry_name for handle in list_block_handles(library)) == ["alpha", "beta"]
+    index = json.loads((library / ".lazy_block_index.json").read_text(encoding="utf-8"))
+    assert sorted(index["entries"]) == ["alpha", "beta"]
+
+
+@pytest.mark.parametrize("content", ["not json", '{"version": 0, "entries": {}}', "[]"])
+def test_a_broken_or_old_index_is_rebuilt(library, parsed, content):
+    (library / ".lazy_block_index.json").write_text(content, encoding="utf-8")
+    assert len(list_block_handles(library)) == 3
+    assert len(parsed) == 3
+    assert BlockFolderIndex.load(library).path.exists()
+
+
+def test_missing_folder_lists_nothing(tmp_path):
+    assert list_block_handles(tmp_path / "missing") == []
+
+
+def test_handles_load_templates_on_demand_through_the_cache(library, parsed):
+    handles = {handle.entry_name: handle for handle in list_block_handles(library)}
+    parsed.clear()
+    handle = handles["alpha"]
+    assert (handle.name, handle.display_text) == ("alpha", "顯示 alpha")
+    assert parsed == []
+    assert handle.load().output_template == "out alpha"
+    assert handle.load() is handle.load()
+    assert parsed == ["alpha"]
+
+
+def test_block_cache_evicts_by_size(library):
+    handles = sorted(list_block_handles(library), key=lambda handle: handle.entry_name)
+    cache = BlockCache(max_bytes=handles[0].size + handles[1].size)
+    for handle in handles:
+        cache.get(handle)
+    assert len(cache) == 2
+    assert cache.bytes_used <= cache.max_bytes
+
+
+def test_revision_follows_the_file(library, make_block):
+    handle = {handle.entry_name: handle for handle in list_block_handles(library)}["beta"]
+    _touch(library / "beta", make_block, "changed")
+    fresh = {handle.entry_name: handle for handle in list_block_handles(library)}["beta"]
+    assert block_revision(fresh) != block_revision(handle)
+    assert resolve_block(fresh).output_template == "changed"
+
+
+def test_folder_entries_share_parsed_blocks(library, parsed):
+    list_block_folder_entries(library)
+    parsed.clear()
+    entries = list_block_folder_entries(library)
+    assert parsed == []
+    assert sorted(folder.name for _block, folder in entries) == ["alpha", "beta", "gamma"]
+    assert all(block.name == folder.name for block, folder in entries)
+
+
+def test_a_failed_index_save_leaves_no_temp_file(library, monkeypatch):
+    def fail(*_args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(blocks_storage.os, "replace", fail)
+    list_block_handles(library)
+    assert not (library / ".lazy_block_index.json").exists()
+    assert not (library / ".lazy_block_index.tmp").exists()
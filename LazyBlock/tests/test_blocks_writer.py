@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+from core.blocks_model import Block
+from core.blocks_writer import BlockWriter
+
+
+class _RecordingStorage:
+    """Records the calls the writer makes; the first save waits for ``release``."""
+
+    location = root_folder = Path(".")
+
+    def __init__(self) -> None:
+        self.calls: list[tuple] = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.fail_rename = False
+
+    def save_many(self, items: list[tuple[Block, str]]) -> list[str]:
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        self.calls.append(("save", [(block.output_template, entry) for block, entry in items]))
+        return [entry for _block, entry in items]
+
+    def rename(self, entry_name: str, new_name: str) -> str:
+        if self.fail_rename:
+            raise FileExistsError(new_name)
+        self.calls.append(("rename", entry_name, new_name))
+        return new_name
+
+    def delete(self, entry_name: str) -> None:
+        self.calls.append(("delete", entry_name))
+
+
+@pytest.fixture
+def storage():
+    return _RecordingStorage()
+
+
+@pytest.fixture
+def writer(storage):
+    writer = BlockWriter(storage, batch_delay_s=0)
+    yield writer
+    storage.release.set()
+    writer.close()
+
+
+def _hold(writer: BlockWriter, storage: _RecordingStorage, make_block) -> None:
+    # Keep the writer thread busy so the next operations queue up together.
+    writer.save(make_block("gate", "gate"))
+    assert storage.entered.wait(5)
+
+
+def test_saves_of_one_entry_coalesce(writer, storage, make_block):
+    _hold(writer, storage, make_block)
+    first = writer.save(make_block("a", "v1"))
+    second = writer.save(make_block("a", "v2"))
+    other = writer.save(make_block("b", "v1"))
+    assert first is second
+    storage.release.set()
+    assert second.result(5) == "a" and other.result(5) == "b"
+    assert storage.calls[1:] == [("save", [("v2", "a"), ("v1", "b")])]
+
+
+def test_rename_and_delete_keep_their_place_in_the_queue(writer, storage, make_block):
+    _hold(writer, storage, make_block)
+    writer.save(make_block("a", "v1"))
+    writer.save(make_block("a", "v2"))
+    renamed = writer.rename("a", "b")
+    writer.save(make_block("a", "v3"))
+    deleted = writer.delete("b")
+    assert writer.is_pending("a") and writer.is_pending("b")
+    storage.release.set()
+    assert renamed.result(5) == "b"
+    assert deleted.result(5) is None
+    assert writer.flush(5)
+    assert not writer.is_pending("a")
+    assert storage.calls[1:] == [
+        ("save", [("v2", "a")]),
+        ("rename", "a", "b"),
+        ("save", [("v3", "a")]),
+        ("delete", "b"),
+    ]
+
+
+def test_a_save_after_a_delete_is_not_merged_into_an_earlier_save(writer, storage, make_block):
+    _hold(writer, storage, make_block)
+    writer.save(make_block("a", "v1"))
+    writer.delete("a")
+    writer.save(make_block("a", "v2"))
+    storage.release.set()
+    assert writer.flush(5)
+    assert storage.calls[1:] == [("save", [("v1", "a")]), ("delete", "a"), ("save", [("v2", "a")])]
+
+
+def test_errors_reach_the_future(writer, storage):
+    storage.fail_rename = True
+    storage.release.set()
+    future = writer.rename("a", "b")
+    with pytest.raises(FileExistsError):
+        future.result(5)
+    assert writer.flush(5)
+
+
+def test_closed_writer_refuses_new_operations(storage, make_block):
+    writer = BlockWriter(storage, batch_delay_s=0)
+    storage.release.set()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.save(make_block("a", "v1"))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import pytest
+
+from core.blocks_storage import save_block
+from core.packed_library import pack_block_folder
+from lazy_block.cli import main
+
+
+@pytest.fixture
+def library(tmp_path, make_block):
+    folder = tmp_path / "blocks"
+    save_block(
+        make_block(
+            "greet",
+            "Hello {輸入文字(1)} from {輸入文字(2)}",
+            display="問候",
+            input_template="你好 {輸入文字(1)}",
+            inputs=[1, 2],
+        ),
+        folder / "greet",
+    )
+    save_block(make_block("sign", "-- signed"), folder / "sign")
+    return folder
+
+
+def _run(*argv: str) -> int:
+    return main([str(arg) for arg in argv])
+
+
+def test_transform_files_to_an_output_file(library, tmp_path):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    first.write_text("[問候]\r\n", encoding="utf-8")
+    second.write_text("x [BLOCK:sign]\n[unknown]", encoding="utf-8")
+    output = tmp_path / "out.txt"
+    assert _run("transform", "--library", library, first, second, "-o", output) == 0
+    assert output.read_bytes().decode("utf-8") == "Hello  from \r\nx -- signed\n[unknown]"
+
+
+def test_transform_reads_a_packed_library(library, tmp_path):
+    pack = tmp_path / "library.lzbpack"
+    pack_block_folder(library, pack)
+    source, output = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("[BLOCK:sign]", encoding="utf-8")
+    assert _run("transform", "--library", pack, source, "-o", output) == 0
+    assert output.read_text(encoding="utf-8") == "-- signed"
+
+
+def test_render_csv_and_jsonl(library, tmp_path):
+    values = tmp_path / "values.csv"
+    values.write_text("1,輸入文字(2)\nAnn,Oslo\nBo,\n", encoding="utf-8")
+    output = tmp_path / "out.txt"
+    assert _run("render", "--library", library, "--block", "greet", "--values", values, "-o", output) == 0
+    assert output.read_text(encoding="utf-8") == "Hello Ann from Oslo\nHello Bo from \n"
+
+    values = tmp_path / "values.jsonl"
+    values.write_text('{"1": "Cy", "2": 3}\n\n{"1": null}\n', encoding="utf-8")
+    argv = ("render", "--library", library, "--block", "greet", "--template", "input")
+    assert _run(*argv, "--values", values, "-o", output) == 0
+    assert output.read_text(encoding="utf-8") == "你好 Cy\n你好 \n"
+
+
+@pytest.mark.parametrize(
+    ("argv", "message"),
+    [
+        (("transform", "--library", "{tmp}/missing"), "找不到方塊庫"),
+        (("render", "--library", "{library}", "--block", "nope", "--values", "{tmp}/v.csv"), "找不到方塊"),
+        (("render", "--library", "{library}", "--block", "greet", "--values", "{tmp}/bad.csv"), "欄位名稱"),
+        (("render", "--library", "{library}", "--block", "greet", "--values", "{tmp}/bad.jsonl"), "第 1 行"),
+    ],
+)
+def test_errors_are_one_line_with_exit_code_2(library, tmp_path, capsys, argv, message):
+    (tmp_path / "v.csv").write_text("1\nx\n", encoding="utf-8")
+    (tmp_path / "bad.csv").write_text("name\nx\n", encoding="utf-8")
+    (tmp_path / "bad.jsonl").write_text("[1]\n", encoding="utf-8")
+    argv = [arg.format(tmp=tmp_path, library=library) for arg in argv]
+    assert _run(*argv) == 2
+    error = capsys.readouterr().err
+    assert error.startswith("lazy_block: ") and message in error
+    assert error.count("\n") == 1
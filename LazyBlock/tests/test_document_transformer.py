@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from core.document_transformer import DocumentTransformer
+
+
+def test_replaces_both_token_forms(make_block):
+    transformer = DocumentTransformer([make_block("greet", "hello", display="問候")])
+    assert transformer.transform("[BLOCK:greet] / [問候] / [other]") == "hello / hello / [other]"
+
+
+def test_overlapping_tokens_resolve_leftmost_longest(make_block):
+    transformer = DocumentTransformer([make_block("a", "A", display="ab"), make_block("b", "B", display="ab]c")])
+    assert transformer.transform("[ab]c] [ab]") == "B A"
+
+
+def test_text_without_tokens_is_returned_unchanged(make_block):
+    text = "plain [text] with {輸入文字(1)}"
+    assert DocumentTransformer([make_block("a", "A")]).transform(text) == text
+
+
+def test_add_and_remove_update_the_automaton(make_block):
+    transformer = DocumentTransformer([make_block("a", "A")])
+    transformer.add_block(make_block("b", "B"))
+    assert transformer.transform("[a][b]") == "AB"
+    assert transformer.remove_block("a")
+    assert not transformer.remove_block("a")
+    assert transformer.transform("[a][b]") == "[a]B"
+
+
+def test_changing_a_child_refreshes_its_parents(make_block):
+    transformer = DocumentTransformer([make_block("child", "old"), make_block("parent", "<{方塊(child)}>")])
+    assert transformer.transform("[parent]") == "<old>"
+    transformer.add_block(make_block("child", "new"))
+    assert transformer.transform("[parent]") == "<new>"
+    transformer.remove_block("child")
+    assert transformer.transform("[parent]") == "<{方塊(child)}>"
+
+
+def test_cycle_renders_a_placeholder(make_block):
+    transformer = DocumentTransformer([make_block("a", "{方塊(b)}"), make_block("b", "{方塊(a)}")])
+    assert transformer.transform("[a]").startswith("[方塊引用形成循環")
+
+
+def test_sync_only_touches_differences(make_block):
+    transformer = DocumentTransformer([make_block("a", "A"), make_block("b", "B")])
+    transformer.sync([make_block("b", "B2"), make_block("c", "C")])
+    assert "a" not in transformer
+    assert transformer.transform("[a][b][c]") == "[a]B2C"
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+from core.incremental_document import IncrementalDocument, OutputPatch
+
+
+def _transform(line: str) -> str:
+    # "[two]" stands for a block whose output spans two lines.
+    return line.replace("[two]", "first\nsecond").upper()
+
+
+def test_reset_transforms_every_line():
+    document = IncrementalDocument(_transform, "a\n[two]\nb")
+    assert document.line_count == 3
+    assert document.output_text() == "A\nFIRST\nSECOND\nB"
+
+
+def test_replace_lines_maps_to_output_lines():
+    document = IncrementalDocument(_transform, "a\n[two]\nb")
+    patch = document.replace_lines(2, 3, ["c", "d"])
+    assert patch == OutputPatch(start_line=3, end_line=4, text="C\nD", at_end=True)
+    assert document.output_text() == "A\nFIRST\nSECOND\nC\nD"
+
+
+def test_replacing_a_multi_line_output_reports_its_whole_height():
+    document = IncrementalDocument(_transform, "a\n[two]\nb")
+    patch = document.replace_lines(1, 2, ["x"])
+    assert (patch.start_line, patch.end_line, patch.at_end) == (1, 3, False)
+    assert document.output_text() == "A\nX\nB"
+
+
+def test_only_edited_lines_are_transformed_again():
+    seen: list[str] = []
+
+    def transform(line: str) -> str:
+        seen.append(line)
+        return line
+
+    document = IncrementalDocument(transform, "a\nb\nc")
+    seen.clear()
+    document.replace_lines(1, 2, ["B"])
+    assert seen == ["B"]
+
+
+def test_invalid_ranges_are_rejected():
+    document = IncrementalDocument(_transform, "a\nb")
+    with pytest.raises(ValueError):
+        document.replace_lines(0, 1, [])
+    with pytest.raises(IndexError):
+        document.replace_lines(1, 3, ["x"])
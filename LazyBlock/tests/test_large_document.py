@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from core.document_transformer import DocumentTransformer
+from core.large_document import MappedDocument, stream_transform
+
+
+def _write(tmp_path, text: str, name: str = "document.txt"):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def test_chunks_end_on_line_breaks_and_cover_the_file(tmp_path):
+    text = "".join(f"第 {index} 行 [BLOCK:x]\n" for index in range(500))
+    with MappedDocument(_write(tmp_path, text)) as document:
+        chunks = list(document.iter_chunks(100))
+    assert "".join(chunk for chunk, _end in chunks) == text
+    assert all(chunk.endswith("\n") for chunk, _end in chunks)
+    assert chunks[-1][1] == len(text.encode("utf-8"))
+    assert len(chunks) > 10
+
+
+def test_read_window_returns_whole_lines(tmp_path):
+    path = _write(tmp_path, "一二三\n四五六\n七八九\n")
+    with MappedDocument(path) as document:
+        window, end = document.read_window(0, 14)
+        assert window == "一二三\n"
+        assert document.read_window(end, 1 << 20) == ("四五六\n七八九\n", document.size)
+        assert document.read_window(document.size, 10) == ("", document.size)
+
+
+def test_empty_files_have_no_chunks(tmp_path):
+    with MappedDocument(_write(tmp_path, "")) as document:
+        assert list(document.iter_chunks()) == []
+
+
+def test_stream_transform_writes_every_chunk_and_reports_progress(tmp_path):
+    text = "".join(f"line {index}\n" for index in range(1000))
+    source, target = _write(tmp_path, text), tmp_path / "out.txt"
+    progress: list[tuple[int, int]] = []
+    written = stream_transform(
+        source, target, str.upper, chunk_bytes=256, on_progress=lambda *done: progress.append(done)
+    )
+    assert target.read_text(encoding="utf-8") == text.upper()
+    assert written == len(text)
+    assert progress[-1] == (len(text), len(text))
+    assert [done for done, _total in progress] == sorted(done for done, _total in progress)
+
+
+def test_a_failed_transform_leaves_the_old_output_alone(tmp_path):
+    source = _write(tmp_path, "a\n" * 1000)
+    target = _write(tmp_path, "previous", name="out.txt")
+
+    def fail(text: str) -> str:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        stream_transform(source, target, fail, chunk_bytes=64)
+    assert target.read_text(encoding="utf-8") == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["document.txt", "out.txt"]
+
+
+@pytest.fixture
+def bracket_transformer(make_block):
+    # Display texts containing "[" and "]" make tempting but wrong cut points.
+    return DocumentTransformer(
+        [
+            make_block("x", "X", display="a[b"),
+            make_block("y", "Y", display="c]d"),
+            make_block("z", "Z", display="方塊[1]"),
+        ]
+    )
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 5, 9, 13, 64])
+def test_long_lines_are_cut_outside_tokens(tmp_path, bracket_transformer, chunk_bytes):
+    text = "zz[a[b]" * 3 + "[c]d]e[方塊[1]]" * 5
+    expected = bracket_transformer.transform(text)
+    with MappedDocument(_write(tmp_path, text)) as document:
+        cut = bracket_transformer.safe_cut
+        chunks = [chunk for chunk, _end in document.iter_chunks(chunk_bytes, cut=cut)]
+    assert "".join(chunks) == text
+    assert "".join(map(bracket_transformer.transform, chunks)) == expected
+    if chunk_bytes >= 13:
+        assert len(chunks) > 1
+
+
+def test_random_long_lines_transform_the_same_in_chunks(tmp_path, bracket_transformer):
+    rng = random.Random(7)
+    pieces = ["[a[b]", "[c]d]", "[方塊[1]]", "[BLOCK:x]", "[", "]", "a", "b", "方", " "]
+    for _ in range(30):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(50, 400)))
+        source, target = _write(tmp_path, text), tmp_path / "out.txt"
+        stream_transform(
+            source,
+            target,
+            bracket_transformer.transform,
+            chunk_bytes=rng.randint(1, 40),
+            cut=bracket_transformer.safe_cut,
+        )
+        assert target.read_text(encoding="utf-8") == bracket_transformer.transform(text)
+
+
+def test_without_cut_a_long_line_stays_whole(tmp_path):
+    text = "x" * 100 + "\n" + "y" * 10
+    with MappedDocument(_write(tmp_path, text)) as document:
+        assert [chunk for chunk, _end in document.iter_chunks(10)] == ["x" * 100 + "\n", "y" * 10]
+        assert [len(chunk) for chunk, _end in document.iter_chunks(10, cut=len)][:3] == [10, 10, 10]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from core.blocks_storage import save_block
+from core.packed_library import (
+    PackedLibrary,
+    pack_block_folder,
+    unpack_to_block_folder,
+    write_packed_library,
+)
+
+
+@pytest.fixture
+def pack(tmp_path, make_block):
+    folder = tmp_path / "blocks"
+    for name in ("問候", "beta", "alpha"):
+        save_block(make_block(name, f"out {name}", inputs=[]), folder / name)
+    pack_path = tmp_path / "library.lzbpack"
+    assert pack_block_folder(folder, pack_path) == 3
+    return folder, pack_path
+
+
+def test_lookup_by_name(pack):
+    _folder, pack_path = pack
+    with PackedLibrary(pack_path) as library:
+        assert len(library) == 3
+        assert library.entry_names() == sorted(["問候", "beta", "alpha"], key=str.encode)
+        assert "問候" in library and "missing" not in library
+        assert library.load("beta").output_template == "out beta"
+        with pytest.raises(KeyError):
+            library.read_raw("missing")
+
+
+def test_pack_and_unpack_are_lossless(pack, tmp_path):
+    folder, pack_path = pack
+    target = tmp_path / "unpacked"
+    assert unpack_to_block_folder(pack_path, target) == 3
+    for name in ("問候", "beta", "alpha"):
+        assert (target / name / "block.json").read_bytes() == (folder / name / "block.json").read_bytes()
+
+
+def test_iter_blocks_decodes_every_record(pack):
+    _folder, pack_path = pack
+    with PackedLibrary(pack_path) as library:
+        assert {name: block.name for name, block in library.iter_blocks()} == {
+            "問候": "問候",
+            "beta": "beta",
+            "alpha": "alpha",
+        }
+
+
+def test_unsafe_entry_names_are_refused_on_unpack(tmp_path):
+    pack_path = tmp_path / "evil.lzbpack"
+    write_packed_library(pack_path, [("../escape", b"{}")])
+    with pytest.raises(ValueError):
+        unpack_to_block_folder(pack_path, tmp_path / "out")
+    assert not (tmp_path / "escape").exists()
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "other.lzbpack"
+    path.write_bytes(b"NOTAPACK" + bytes(64))
+    with pytest.raises(ValueError):
+        PackedLibrary(path)
+
+
+@pytest.mark.parametrize("size", [0, 3, 23])
+def test_truncated_headers_are_rejected(tmp_path, size):
+    path = tmp_path / "short.lzbpack"
+    path.write_bytes(b"LZBPACK\0\1\0\0\0"[:size])
+    with pytest.raises(ValueError):
+        PackedLibrary(path)
+
+
+def test_an_index_past_the_end_is_rejected(pack):
+    _folder, pack_path = pack
+    data = pack_path.read_bytes()
+    pack_path.write_bytes(data[: len(data) - 40])
+    with pytest.raises(ValueError, match="不完整"):
+        PackedLibrary(pack_path)
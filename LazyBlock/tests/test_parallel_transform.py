@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pytest
+
+from core.document_transformer import DocumentTransformer
+from core.large_document import stream_transform_chunks
+from core.parallel_transform import parallel_render_many, parallel_transform
+from core.transform_engine import render_template_many
+
+
+@pytest.fixture
+def blocks(make_block):
+    return [
+        make_block("x", "<X>", display="a[b"),
+        make_block("y", "<Y {輸入文字(1)}>", display="c]d"),
+        make_block("z", "<{方塊(x)}{方塊(y)}>", display="z"),
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_long_lines_match_the_serial_transform(tmp_path, blocks, workers):
+    text = ("zz[a[b][c]d]" * 40 + "[z]" + "\n") * 3 + "[a[b]x" * 300
+    source, target = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text(text, encoding="utf-8")
+    transformer = DocumentTransformer(blocks)
+    stream_transform_chunks(
+        source,
+        target,
+        lambda texts: parallel_transform(texts, blocks, workers=workers),
+        chunk_bytes=50,
+        cut=transformer.safe_cut,
+    )
+    assert target.read_text(encoding="utf-8") == transformer.transform(text)
+
+
+def test_chunks_come_back_in_order(blocks):
+    chunks = [f"{index} [z]\n" for index in range(40)]
+    expected = [DocumentTransformer(blocks).transform(chunk) for chunk in chunks]
+    assert list(parallel_transform(iter(chunks), blocks, workers=2)) == expected
+
+
+def test_parallel_render_many_matches_one_batch():
+    template = "{輸入文字(1)}={輸入文字(2)}"
+    batches = [{1: [f"{batch}-{row}" for row in range(50)], 2: ["v"] * 50} for batch in range(6)]
+    expected = ["".join(f"{row}\n" for row in render_template_many(template, batch)) for batch in batches]
+    assert list(parallel_render_many(template, batches, workers=2)) == expected
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from core.blocks_model import Block
+from core.sqlite_storage import SqliteBlockStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SqliteBlockStorage(tmp_path / "blocks.sqlite3")
+    storage.save_many(
+        [
+            (Block("greet", "問候語", "你好 {輸入文字(1)}", "Hello {輸入文字(1)}", [1]), "greet"),
+            (Block("table", "表格", "a_b 100%", "| a | b |"), "table"),
+        ]
+    )
+    yield storage
+    storage.close()
+
+
+def _names(results) -> list[str]:
+    return sorted(entry_name for _block, entry_name in results)
+
+
+def test_round_trip(storage, tmp_path):
+    block = storage.load("greet")
+    assert block == Block("greet", "問候語", "你好 {輸入文字(1)}", "Hello {輸入文字(1)}", [1])
+    assert [entry for _block, entry in storage.list_entries()] == ["greet", "table"]
+    assert storage.root_folder == tmp_path
+    with pytest.raises(FileNotFoundError):
+        storage.load("missing")
+
+
+def test_save_replaces_an_existing_entry(storage):
+    storage.save(Block("greet", "問候", "x", "y"))
+    assert storage.load("greet").display_text == "問候"
+    assert len(storage.list_entries()) == 2
+
+
+def test_search_uses_full_text_for_longer_queries(storage):
+    assert _names(storage.search("Hello")) == ["greet"]
+    assert _names(storage.search("問候語")) == ["greet"]
+    assert _names(storage.search('"quoted" text')) == []
+
+
+def test_short_queries_fall_back_to_like(storage):
+    assert _names(storage.search("表格")) == ["table"]
+    assert _names(storage.search("你好")) == ["greet"]
+    assert _names(storage.search("%")) == ["table"]
+    assert _names(storage.search("_")) == ["table"]
+    assert storage.search("  ") == []
+
+
+def test_search_without_fts_scans(storage):
+    storage._has_fts = False
+    assert _names(storage.search("Hello")) == ["greet"]
+
+
+def test_search_follows_updates_and_deletes(storage):
+    storage.save(Block("greet", "問候語", "", "Goodbye"))
+    assert _names(storage.search("Hello")) == []
+    assert _names(storage.search("Goodbye")) == ["greet"]
+    storage.delete("greet")
+    assert _names(storage.search("Goodbye")) == []
+    assert not storage.exists("greet")
+
+
+def test_rename(storage):
+    assert storage.rename("greet", "hello") == "hello"
+    assert storage.load("hello").name == "hello"
+    assert not storage.exists("greet")
+    with pytest.raises(FileExistsError):
+        storage.rename("hello", "table")
+    with pytest.raises(FileNotFoundError):
+        storage.rename("missing", "other")
+    with pytest.raises(ValueError):
+        storage.rename("hello", "a/b")
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from core.template_compiler import compile_template
+from core.transform_engine import extract_input_ids_from_template, render_template
+
+
+def test_plan_splits_literals_and_slots():
+    plan = compile_template("a{輸入文字(2)}b{輸入文字(1)}c{輸入文字(2)}")
+    assert plan.literals == ("a", "b", "c", "")
+    assert plan.slots == (2, 1, 2)
+    assert plan.input_ids == (2, 1)
+    assert plan.has_inputs
+
+
+def test_render_fills_slots_and_leaves_missing_values_empty():
+    plan = compile_template("{輸入文字(1)} + {輸入文字(2)} = {輸入文字(1)}")
+    assert plan.render({1: "x", 2: "y"}) == "x + y = x"
+    assert plan.render({1: "x"}) == "x +  = x"
+
+
+def test_literal_braces_survive_rendering():
+    template = "{literal} {{double}} {輸入文字(1)} {方塊(b)} {輸入文字(x)}"
+    assert render_template(template, {1: "v"}) == "{literal} {{double}} v {方塊(b)} {輸入文字(x)}"
+
+
+def test_values_are_inserted_verbatim():
+    assert render_template("<{輸入文字(1)}>", {1: "{0} {輸入文字(1)}"}) == "<{0} {輸入文字(1)}>"
+
+
+def test_templates_without_slots_render_as_is():
+    plan = compile_template("plain {text}")
+    assert not plan.has_inputs
+    assert plan.render({1: "ignored"}) == "plain {text}"
+
+
+def test_plans_are_cached():
+    assert compile_template("x{輸入文字(1)}") is compile_template("x{輸入文字(1)}")
+    assert extract_input_ids_from_template("{輸入文字(3)}{輸入文字(1)}{輸入文字(3)}") == [3, 1]
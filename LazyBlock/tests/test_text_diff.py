@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from core.text_diff import TextEdit, common_prefix_length, common_suffix_length, text_edits
+
+
+def _apply(text: str, edits: list[TextEdit]) -> str:
+    lines = text.split("\n")
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    for edit in edits:
+        start = offsets[edit.start[0]] + edit.start[1]
+        end = offsets[edit.end[0]] + edit.end[1]
+        text = text[:start] + edit.text + text[end:]
+    return text
+
+
+def test_common_prefix_and_suffix():
+    assert common_prefix_length("abcdef", "abcxef") == 3
+    assert common_suffix_length("abcdef", "abcxef") == 2
+    assert common_suffix_length("aaaa", "aaaa", limit=1) == 1
+    assert common_prefix_length("", "abc") == 0
+
+
+def test_equal_texts_need_no_edits():
+    assert text_edits("same\ntext", "same\ntext") == []
+
+
+def test_one_changed_line_touches_only_the_differing_characters():
+    assert text_edits("one\ntwo\nthree", "one\ntwX\nthree") == [TextEdit((1, 2), (1, 3), "X")]
+
+
+def test_edits_are_listed_back_to_front():
+    edits = text_edits("a\nb\nc\nd\ne", "A\nb\nc\nd\nE")
+    assert [edit.start for edit in edits] == sorted((edit.start for edit in edits), reverse=True)
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        ("a\nb\nc", "a\nc"),
+        ("a\nb\nc", "a\nb\nb2\nc"),
+        ("a\nb", "a\nb\n"),
+        ("a\nb\n", "a\nb"),
+        ("", "new\ntext"),
+        ("old\ntext", ""),
+        ("x\ny\nz\n", "y\nx\nz\nw"),
+        ("中文\n方塊", "中文\n方塊二"),
+    ],
+)
+def test_applying_the_edits_gives_the_new_text(old, new):
+    assert _apply(old, text_edits(old, new)) == new
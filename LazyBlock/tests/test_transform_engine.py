@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import pytest
+
+from core.transform_engine import render_many, render_template, render_template_many
+
+
+def test_rows_match_rendering_one_at_a_time():
+    template = "{輸入文字(1)}-{輸入文字(2)}-{輸入文字(1)} {x}"
+    columns = {1: ["a", "b", "c"], 2: ["1", "2", "3"]}
+    expected = [render_template(template, {1: a, 2: b}) for a, b in zip(columns[1], columns[2])]
+    assert render_template_many(template, columns) == expected
+
+
+def test_missing_columns_render_empty_and_rows_sets_the_count():
+    assert render_template_many("[{輸入文字(1)}|{輸入文字(2)}]", {1: ["a", "b"]}) == ["[a|]", "[b|]"]
+    assert render_template_many("fixed", {}, rows=2) == ["fixed", "fixed"]
+    assert render_template_many("fixed", {}) == []
+
+
+def test_columns_of_different_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        render_template_many("{輸入文字(1)}{輸入文字(2)}", {1: ["a"], 2: ["b", "c"]})
+    with pytest.raises(ValueError):
+        render_template_many("{輸入文字(1)}", {1: ["a"]}, rows=2)
+
+
+def test_sink_receives_every_row_with_its_separator():
+    pieces: list[str] = []
+    columns = {1: [str(index) for index in range(10_000)]}
+    assert render_template_many("<{輸入文字(1)}>", columns, sink=pieces.append, separator=";") is None
+    assert len(pieces) > 1
+    assert "".join(pieces) == "".join(f"<{index}>;" for index in range(10_000))
+
+
+def test_render_many_uses_the_output_template(make_block):
+    block = make_block("b", "out {輸入文字(1)}", input_template="in {輸入文字(1)}", inputs=[1])
+    assert render_many(block, {1: ["x", "y"]}) == ["out x", "out y"]
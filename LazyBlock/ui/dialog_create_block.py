@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import tkinter as tk
+from dataclasses import replace
 from tkinter import messagebox, simpledialog
 from typing import Callable
 
@@ -67,6 +68,11 @@ class CreateBlockDialog:
             text="{填入文字()}",
             command=self._insert_input_placeholder,
         ).grid(row=0, column=0, padx=4, pady=4)
+        ttk.Button(
+            tools_frame,
+            text="{方塊()}",
+            command=self._insert_block_reference,
+        ).grid(row=0, column=1, padx=4, pady=4)
 
         buttons = ttk.Frame(content)
         buttons.grid(row=6, column=0, sticky="e")
@@ -91,6 +97,22 @@ class CreateBlockDialog:
             return
         text_widget.insert(tk.INSERT, f"{{輸入文字({idx})}}")
 
+    def _insert_block_reference(self) -> None:
+        text_widget = self._focused_text or self._input_text
+        if text_widget is None:
+            return
+        name = simpledialog.askstring(
+            "插入方塊",
+            "請輸入要引用的方塊名稱：",
+            parent=self._window,
+        )
+        if not name or not name.strip():
+            return
+        if any(char in name for char in "(){}\n"):
+            messagebox.showerror("錯誤", "方塊名稱不可包含括號或換行。", parent=self._window)
+            return
+        text_widget.insert(tk.INSERT, f"{{方塊({name.strip()})}}")
+
     def _cancel(self) -> None:
         self._window.grab_release()
         self._window.destroy()
@@ -124,9 +146,8 @@ class CreateBlockDialog:
             display_text=display_text,
             input_template=input_template,
             output_template=output_template,
-            inputs=[],
         )
-        block.inputs = block.get_used_inputs_from_templates()
+        block = replace(block, inputs=block.used_inputs)
         self._on_submit(block)
         self._cancel()
 
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import tkinter as tk
+from pathlib import Path
+from tkinter import filedialog, messagebox
+
+from lazy_block.ttk_compat import ttk
+
+from core import perf
+
+
+def _format_bytes(value: int | None) -> str:
+    return "—" if value is None else f"{value / (1024 * 1024):.1f} MB"
+
+
+class PerfWindow:
+    """Non-modal window with rolling p50/p99 timings, counters and memory use."""
+
+    def __init__(self, master: tk.Misc, *, refresh_ms: int = 1000) -> None:
+        self._refresh_ms = refresh_ms
+        self._window = tk.Toplevel(master)
+        self._window.title("性能")
+        self._window.geometry("640x420")
+        self._enabled_var = tk.BooleanVar(value=perf.is_enabled())
+        self._memory_var = tk.StringVar()
+        self._rows: dict[str, str] = {}
+        self._after_id: str | None = None
+        self._tree: ttk.Treeview | None = None
+
+        self._build_ui()
+        self._window.protocol("WM_DELETE_WINDOW", self.close)
+        self._refresh()
+
+    def _build_ui(self) -> None:
+        content = ttk.Frame(self._window, padding=8)
+        content.pack(fill="both", expand=True)
+
+        controls = ttk.Frame(content)
+        controls.pack(fill="x", pady=(0, 6))
+        ttk.Checkbutton(
+            controls, text="記錄計時", variable=self._enabled_var, command=self._toggle
+        ).pack(side="left")
+        ttk.Button(controls, text="匯出追蹤檔…", command=self._dump_trace).pack(side="right")
+        ttk.Button(controls, text="清除", command=self._reset).pack(side="right", padx=(0, 6))
+
+        tree = ttk.Treeview(content, columns=("count", "p50", "p99", "total"), height=14)
+        tree.heading("#0", text="名稱")
+        tree.heading("count", text="次數")
+        tree.heading("p50", text="p50 (ms)")
+        tree.heading("p99", text="p99 (ms)")
+        tree.heading("total", text="總計 (ms)")
+        tree.column("#0", width=240)
+        for column in ("count", "p50", "p99", "total"):
+            tree.column(column, width=90, anchor="e")
+        tree.pack(fill="both", expand=True)
+        self._tree = tree
+
+        ttk.Label(content, textvariable=self._memory_var).pack(anchor="w", pady=(6, 0))
+
+    def _toggle(self) -> None:
+        perf.enable(self._enabled_var.get())
+
+    def _reset(self) -> None:
+        perf.reset()
+        if self._tree is not None:
+            self._tree.delete(*self._rows.values())
+        self._rows.clear()
+
+    def _dump_trace(self) -> None:
+        target = filedialog.asksaveasfilename(
+            title="匯出追蹤檔",
+            defaultextension=".json",
+            initialfile="lazy_block_trace.json",
+            filetypes=[("Chrome trace", "*.json")],
+            parent=self._window,
+        )
+        if not target:
+            return
+        try:
+            events = perf.dump_trace(Path(target))
+        except OSError as exc:
+            messagebox.showerror("匯出失敗", str(exc), parent=self._window)
+            return
+        messagebox.showinfo("匯出完成", f"已寫入 {events} 筆紀錄：{target}", parent=self._window)
+
+    def _set_row(self, name: str, values: tuple) -> None:
+        assert self._tree is not None
+        iid = self._rows.get(name)
+        if iid is None:
+            self._rows[name] = self._tree.insert("", "end", text=name, values=values)
+        else:
+            self._tree.item(iid, values=values)
+
+    def _refresh(self) -> None:
+        stats, counters = perf.snapshot()
+        for timer in stats:
+            self._set_row(
+                timer.name,
+                (timer.count, f"{timer.p50_ms:.3f}", f"{timer.p99_ms:.3f}", f"{timer.total_ms:.1f}"),
+            )
+        for name, value in sorted(counters.items()):
+            self._set_row(name, (value, "", "", ""))
+        memory = perf.memory_usage()
+        state = "記錄中" if perf.is_enabled() else "未記錄"
+        self._memory_var.set(
+            f"記憶體：{_format_bytes(memory.rss_bytes)}（峰值 {_format_bytes(memory.peak_bytes)}）｜{state}"
+        )
+        self._after_id = self._window.after(self._refresh_ms, self._refresh)
+
+    def exists(self) -> bool:
+        return bool(self._window.winfo_exists())
+
+    def focus(self) -> None:
+        self._window.deiconify()
+        self._window.lift()
+
+    def close(self) -> None:
+        if self._after_id is not None:
+            self._window.after_cancel(self._after_id)
+            self._after_id = None
+        self._window.destroy()
+
+
+def show_perf_window(master: tk.Misc, current: PerfWindow | None = None) -> PerfWindow:
+    """Bring ``current`` to the front if it is still open, else open a new window."""
+    if current is not None and current.exists():
+        current.focus()
+        return current
+    return PerfWindow(master)
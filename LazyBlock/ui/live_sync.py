@@ -0,0 +1,69 @@
+"""Keep panel C in step with panel B as the user types."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from core.incremental_document import IncrementalDocument
+
+from .panel_editor import EditorPanel, LineEdit
+from .panel_output import OutputPanel
+
+
+class LiveSync:
+    """Re-transform the lines EditorPanel reports as changed and patch OutputPanel.
+
+    After :meth:`detach` panel C is left alone (for example while it shows a
+    clicked block's output) until the next edit in panel B, which triggers
+    one full render before incremental patching resumes.  :meth:`pause` stops
+    listening altogether, for documents too large to re-render on an edit.
+    """
+
+    def __init__(
+        self,
+        editor: EditorPanel,
+        output: OutputPanel,
+        transform: Callable[[str], str],
+    ) -> None:
+        self._editor = editor
+        self._output = output
+        self._transform = transform
+        self._document: IncrementalDocument | None = None
+        editor.set_on_lines_changed(self._handle_lines_changed)
+
+    def detach(self) -> None:
+        """Leave panel C as it is until the next edit; this also ends a pause."""
+        self._document = None
+        self._editor.set_on_lines_changed(self._handle_lines_changed)
+        self._editor.discard_pending_changes()
+
+    def pause(self) -> None:
+        self._document = None
+        self._editor.set_on_lines_changed(None)
+
+    def refresh(self) -> None:
+        """Render panel C again from scratch, e.g. after the library changed."""
+        if self._document is None:
+            return
+        self._render_all(self._editor.get_document_text())
+
+    def _render_all(self, text: str) -> None:
+        self._document = IncrementalDocument(self._transform, text)
+        self._output.set_text(self._document.output_text())
+
+    def _handle_lines_changed(self, edit: LineEdit) -> None:
+        if edit.old_end is None:
+            self._render_all("\n".join(edit.lines))
+            return
+        if self._document is None:
+            self._render_all(self._editor.get_document_text())
+            return
+        try:
+            patch = self._document.replace_lines(edit.start, edit.old_end, edit.lines)
+        except IndexError:
+            self._render_all(self._editor.get_document_text())
+            return
+        self._output.apply_patch(patch)
+
+
+__all__ = ["LiveSync"]
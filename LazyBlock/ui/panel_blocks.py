@@ -1,23 +1,45 @@
 from __future__ import annotations
 
 import tkinter as tk
+from collections import Counter
 from tkinter import filedialog
-from typing import Callable, Iterable
+from typing import Callable, Iterable, Mapping, Sequence
 
 from lazy_block.ttk_compat import ttk
 
-from core.blocks_model import Block
+from core import perf
+from core.block_search import BlockSearchIndex
+from core.blocks_storage import BlockEntry, block_revision
+
+
+_ROW_HEIGHT = 34
+_ROW_PADDING = 4
 
 
 class BlocksPanel(ttk.Frame):
+    """Panel A: the folder picker, a search box and the list of block buttons.
+
+    The panel keeps every block it was given and shows either all of them or,
+    while the search box holds text, the best ``search_limit`` matches.
+    Small libraries get one packed button per block.  Once a folder holds more
+    than ``virtual_threshold`` blocks the list switches to a virtualized view
+    that keeps only enough recycled buttons to fill the viewport and rebinds
+    them to blocks as the user scrolls.
+
+    Blocks with problems (see :meth:`set_issues`) get a ⚠ badge, and their
+    context menu lists the problems.
+    """
+
     def __init__(
         self,
         master: tk.Misc | None = None,
         *,
         on_folder_changed: Callable[[str], None],
-        on_block_clicked: Callable[[Block], None],
-        on_block_delete: Callable[[Block], None] | None = None,
-        on_block_rename: Callable[[Block], None] | None = None,
+        on_block_clicked: Callable[[BlockEntry], None],
+        on_block_delete: Callable[[BlockEntry], None] | None = None,
+        on_block_rename: Callable[[BlockEntry], None] | None = None,
+        virtual_threshold: int = 200,
+        search_limit: int = 500,
         **kwargs,
     ) -> None:
         super().__init__(master, **kwargs)
@@ -25,11 +47,23 @@ class BlocksPanel(ttk.Frame):
         self._on_block_clicked = on_block_clicked
         self._on_block_delete = on_block_delete
         self._on_block_rename = on_block_rename
-        self._blocks: list[Block] = []
+        self._virtual_threshold = virtual_threshold
+        self._search_limit = search_limit
+        self._library: dict[str, BlockEntry] = {}
+        self._issues: dict[str, tuple[str, ...]] = {}
+        self._search_index = BlockSearchIndex()
+        self._blocks: list[BlockEntry] = []
         self._block_buttons: list[ttk.Button] = []
+        self._virtual = False
+        self._virtual_rows: list[ttk.Button] = []
+        self._virtual_texts: list[str | None] = []
+        self._virtual_offset = 0
+        self._widget_ops: Counter[str] = Counter()
         self._folder_var = tk.StringVar()
+        self._search_var = tk.StringVar()
 
         self._build_ui()
+        self._search_var.trace_add("write", lambda *_args: self._apply_search())
 
     def _build_ui(self) -> None:
         top_frame = ttk.Frame(self)
@@ -42,9 +76,17 @@ class BlocksPanel(ttk.Frame):
         browse_btn = ttk.Button(top_frame, text="選擇資料夾", command=self._handle_browse)
         browse_btn.grid(row=0, column=1)
 
+        search_frame = ttk.Frame(self)
+        search_frame.grid(row=1, column=0, sticky="ew", padx=8, pady=(0, 8))
+        search_frame.columnconfigure(1, weight=1)
+        ttk.Label(search_frame, text="搜尋").grid(row=0, column=0, padx=(0, 6))
+        search_entry = ttk.Entry(search_frame, textvariable=self._search_var)
+        search_entry.grid(row=0, column=1, sticky="ew")
+        search_entry.bind("<Escape>", lambda _event: self._search_var.set(""))
+
         container = ttk.Frame(self)
-        container.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 8))
-        self.rowconfigure(1, weight=1)
+        container.grid(row=2, column=0, sticky="nsew", padx=8, pady=(0, 8))
+        self.rowconfigure(2, weight=1)
         self.columnconfigure(0, weight=1)
 
         canvas = tk.Canvas(container, highlightthickness=0)
@@ -54,6 +96,8 @@ class BlocksPanel(ttk.Frame):
         scrollbar.grid(row=0, column=1, sticky="ns")
         container.rowconfigure(0, weight=1)
         container.columnconfigure(0, weight=1)
+        self._canvas = canvas
+        self._scrollbar = scrollbar
 
         self._blocks_frame = ttk.Frame(canvas)
         self._blocks_frame.bind(
@@ -62,6 +106,19 @@ class BlocksPanel(ttk.Frame):
         )
         canvas.create_window((0, 0), window=self._blocks_frame, anchor="nw")
 
+        self._virtual_frame = ttk.Frame(container)
+        self._virtual_frame.grid(row=0, column=0, sticky="nsew")
+        self._virtual_frame.grid_remove()
+        self._virtual_frame.bind("<Configure>", lambda _event: self._layout_virtual_rows())
+        self._bind_wheel(self._virtual_frame)
+
+        self._progress_var = tk.DoubleVar(value=0.0)
+        self._progress = ttk.Progressbar(
+            self, orient="horizontal", mode="determinate", variable=self._progress_var
+        )
+        self._progress.grid(row=3, column=0, sticky="ew", padx=8, pady=(0, 8))
+        self._progress.grid_remove()
+
     def _handle_browse(self) -> None:
         directory = filedialog.askdirectory()
         if directory:
@@ -73,28 +130,324 @@ class BlocksPanel(ttk.Frame):
         if notify and callable(self._on_folder_changed):
             self._on_folder_changed(directory)
 
-    def set_blocks(self, blocks: Iterable[Block]) -> None:
+    @property
+    def last_refresh_stats(self) -> dict[str, int]:
+        """Widget operations (created/updated/moved/destroyed) of the last ``set_blocks``."""
+        return dict(self._widget_ops)
+
+    @perf.timed("ui.blocks.set_blocks")
+    def set_blocks(self, blocks: Iterable[BlockEntry]) -> None:
+        """Replace the panel's blocks, reusing the rows of blocks that did not change.
+
+        Rows are keyed by block name; a row is only rebound when the block's
+        content hash differs, and only moved when its position changed, so the
+        scroll position survives a refresh.
+        """
+        library = {block.name: block for block in blocks}
+        for name in self._library.keys() - library.keys():
+            self._search_index.remove(name)
+        self._search_index.update(library.values())
+        self._library = library
+        self._show_blocks(self._visible_blocks())
+
+    @property
+    def search_query(self) -> str:
+        return self._search_var.get().strip()
+
+    def set_search_query(self, query: str) -> None:
+        self._search_var.set(query)
+
+    def _visible_blocks(self) -> list[BlockEntry]:
+        query = self.search_query
+        if not query:
+            return list(self._library.values())
+        names = self._search_index.search(query, self._search_limit)
+        return [self._library[name] for name in names]
+
+    def _apply_search(self) -> None:
+        self._show_blocks(self._visible_blocks())
+
+    def _show_blocks(self, blocks: list[BlockEntry]) -> None:
+        self._widget_ops = Counter()
+        if self._virtual or len(blocks) > self._virtual_threshold:
+            self._blocks = blocks
+            self._refresh_rows(len(self._block_buttons))
+            return
+        self._reconcile_buttons(blocks)
+
+    def _reconcile_buttons(self, blocks: list[BlockEntry]) -> None:
+        existing: dict[str, tuple[BlockEntry, ttk.Button]] = {}
+        for block, button in zip(self._blocks, self._block_buttons):
+            existing.setdefault(block.name, (block, button))
+        reused = {id(button) for _block, button in existing.values()}
+        for button in self._block_buttons:
+            if id(button) not in reused:
+                button.destroy()
+                self._widget_ops["destroyed"] += 1
+
+        buttons: list[ttk.Button] = []
+        for block in blocks:
+            previous = existing.pop(block.name, None)
+            if previous is None:
+                button = self._create_button(block)
+                self._widget_ops["created"] += 1
+            else:
+                old_block, button = previous
+                if block_revision(old_block) != block_revision(block):
+                    self._bind_button(button, block)
+                    self._widget_ops["updated"] += 1
+            buttons.append(button)
+        for _block, button in existing.values():
+            button.destroy()
+            self._widget_ops["destroyed"] += 1
+
+        packed = [widget for widget in self._blocks_frame.pack_slaves() if widget in buttons]
+        for position, button in enumerate(buttons):
+            if position < len(packed) and packed[position] is button:
+                continue
+            if position == 0:
+                if packed:
+                    button.pack_configure(before=packed[0])
+            else:
+                button.pack_configure(after=buttons[position - 1])
+            if button in packed:
+                packed.remove(button)
+            packed.insert(position, button)
+            self._widget_ops["moved"] += 1
+
+        self._blocks = blocks
+        self._block_buttons = buttons
+
+    def append_blocks(self, blocks: Iterable[BlockEntry]) -> None:
+        """Add rows at the end, e.g. for a batch streamed in by a folder load."""
+        blocks = list(blocks)
+        for block in blocks:
+            self._library[block.name] = block
+        self._search_index.update(blocks)
+        if self.search_query:
+            self._apply_search()
+            return
+        start = len(self._blocks)
+        self._blocks.extend(blocks)
+        self._refresh_rows(start)
+
+    def set_issues(self, issues: Mapping[str, Sequence[str]]) -> None:
+        """Set the problems of the named blocks; an empty list clears a block's badge."""
+        for name, messages in issues.items():
+            if messages:
+                self._issues[name] = tuple(messages)
+            else:
+                self._issues.pop(name, None)
+        if self._virtual:
+            self._layout_virtual_rows()
+            return
+        for block, button in zip(self._blocks, self._block_buttons):
+            if block.name in issues:
+                button.configure(text=self._row_text(block))
+
+    def clear_issues(self) -> None:
+        self.set_issues({name: () for name in self._issues})
+
+    def begin_loading(self) -> None:
+        """Clear the list and show the progress bar for a new folder load."""
+        self._issues.clear()
+        self.set_blocks([])
+        self._virtual_offset = 0
+        self._progress_var.set(0.0)
+        self._progress.configure(mode="indeterminate")
+        self._progress.grid()
+        self._progress.start(50)
+
+    def set_load_progress(self, loaded: int, total: int | None) -> None:
+        if not total:
+            return
+        if str(self._progress.cget("mode")) != "determinate":
+            self._progress.stop()
+            self._progress.configure(mode="determinate", maximum=total)
+        self._progress_var.set(loaded)
+
+    def finish_loading(self) -> None:
+        self._progress.stop()
+        self._progress.grid_remove()
+
+    def upsert_block(self, block: BlockEntry) -> None:
+        """Add ``block`` or refresh the row of the block with the same name."""
+        self._library[block.name] = block
+        self._search_index.add(block)
+        if self.search_query:
+            self._apply_search()
+            return
+        for position, current in enumerate(self._blocks):
+            if current.name == block.name:
+                self._blocks[position] = block
+                if self._virtual:
+                    self._layout_virtual_rows()
+                else:
+                    self._bind_button(self._block_buttons[position], block)
+                return
+        self.append_blocks([block])
+
+    def remove_block(self, name: str) -> None:
+        self._library.pop(name, None)
+        self._search_index.remove(name)
+        for position, current in enumerate(self._blocks):
+            if current.name == name:
+                del self._blocks[position]
+                if position < len(self._block_buttons):
+                    self._block_buttons.pop(position).destroy()
+                self._refresh_rows(len(self._blocks))
+                return
+
+    def _refresh_rows(self, start: int = 0) -> None:
+        """Show rows from ``start`` on, switching list modes when needed."""
+        virtual = len(self._blocks) > self._virtual_threshold
+        if virtual != self._virtual:
+            self._set_virtual(virtual)
+            start = 0
+        if self._virtual:
+            self._layout_virtual_rows()
+            return
+        for block in self._blocks[start:]:
+            self._block_buttons.append(self._create_button(block))
+
+    def _set_virtual(self, virtual: bool) -> None:
+        self._virtual = virtual
         for button in self._block_buttons:
             button.destroy()
         self._block_buttons.clear()
-        self._blocks = list(blocks)
+        if virtual:
+            self._canvas.grid_remove()
+            self._virtual_frame.grid()
+            self._scrollbar.configure(command=self._virtual_yview)
+        else:
+            self._virtual_frame.grid_remove()
+            self._canvas.grid()
+            self._scrollbar.configure(command=self._canvas.yview)
+            self._canvas.yview_moveto(0)
+
+    def _create_button(self, block: BlockEntry) -> ttk.Button:
+        button = ttk.Button(self._blocks_frame)
+        button.pack(fill="x", padx=4, pady=2)
+        self._bind_button(button, block)
+        return button
+
+    def _row_text(self, block: BlockEntry) -> str:
+        issues = self._issues.get(block.name)
+        return f"⚠ {len(issues)}  {block.display_text}" if issues else block.display_text
+
+    def _bind_button(self, button: ttk.Button, block: BlockEntry) -> None:
+        button.configure(
+            text=self._row_text(block),
+            command=lambda b=block: self._on_block_clicked(b),
+        )
+        button.bind("<Button-3>", lambda event, b=block: self._show_context_menu(event, b))
+        button.bind("<Button-2>", lambda event, b=block: self._show_context_menu(event, b))
+
+    # Virtualized list: pooled buttons are positioned with ``place`` and
+    # rebound by row index, so the widget count depends on the viewport only.
+
+    def _bind_wheel(self, widget: tk.Misc) -> None:
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self._handle_wheel)
+
+    def _handle_wheel(self, event: tk.Event) -> None:
+        upward = event.num == 4 or getattr(event, "delta", 0) > 0
+        self._scroll_virtual(-3 if upward else 3, "units")
 
-        for block in self._blocks:
-            button = ttk.Button(
-                self._blocks_frame,
-                text=block.display_text,
-                command=lambda b=block: self._on_block_clicked(b),
+    def _create_virtual_row(self, slot: int) -> ttk.Button:
+        button = ttk.Button(self._virtual_frame, command=lambda s=slot: self._activate_slot(s))
+        button.bind("<Button-3>", lambda event, s=slot: self._slot_context_menu(event, s))
+        button.bind("<Button-2>", lambda event, s=slot: self._slot_context_menu(event, s))
+        self._bind_wheel(button)
+        return button
+
+    def _block_at_slot(self, slot: int) -> BlockEntry | None:
+        position = self._virtual_offset // _ROW_HEIGHT + slot
+        if 0 <= position < len(self._blocks):
+            return self._blocks[position]
+        return None
+
+    def _activate_slot(self, slot: int) -> None:
+        block = self._block_at_slot(slot)
+        if block is not None:
+            self._on_block_clicked(block)
+
+    def _slot_context_menu(self, event: tk.Event, slot: int) -> None:
+        block = self._block_at_slot(slot)
+        if block is not None:
+            self._show_context_menu(event, block)
+
+    def _max_virtual_offset(self) -> int:
+        viewport = self._virtual_frame.winfo_height()
+        return max(0, len(self._blocks) * _ROW_HEIGHT - viewport)
+
+    def _scroll_virtual(self, amount: int, unit: str) -> None:
+        if not self._virtual:
+            return
+        viewport = max(self._virtual_frame.winfo_height(), _ROW_HEIGHT)
+        step = _ROW_HEIGHT if unit == "units" else viewport
+        self._virtual_offset = min(
+            max(0, self._virtual_offset + amount * step), self._max_virtual_offset()
+        )
+        self._layout_virtual_rows()
+
+    def _virtual_yview(self, *args: str) -> None:
+        if args and args[0] == "moveto":
+            total = len(self._blocks) * _ROW_HEIGHT
+            self._virtual_offset = min(
+                max(0, int(float(args[1]) * total)), self._max_virtual_offset()
             )
-            button.pack(fill="x", padx=4, pady=2)
-            button.bind("<Button-3>", lambda event, b=block: self._show_context_menu(event, b))
-            button.bind("<Button-2>", lambda event, b=block: self._show_context_menu(event, b))
-            self._block_buttons.append(button)
+            self._layout_virtual_rows()
+        elif args and args[0] == "scroll":
+            self._scroll_virtual(int(args[1]), args[2])
+
+    def _layout_virtual_rows(self) -> None:
+        if not self._virtual:
+            return
+        viewport = max(self._virtual_frame.winfo_height(), _ROW_HEIGHT)
+        self._virtual_offset = min(self._virtual_offset, self._max_virtual_offset())
+        needed = viewport // _ROW_HEIGHT + 2
+        while len(self._virtual_rows) < needed:
+            self._virtual_rows.append(self._create_virtual_row(len(self._virtual_rows)))
+            self._virtual_texts.append(None)
+            self._widget_ops["created"] += 1
+
+        first, shift = divmod(self._virtual_offset, _ROW_HEIGHT)
+        for slot, button in enumerate(self._virtual_rows):
+            position = first + slot
+            if slot >= needed or position >= len(self._blocks):
+                button.place_forget()
+                self._virtual_texts[slot] = None
+                continue
+            text = self._row_text(self._blocks[position])
+            if self._virtual_texts[slot] != text:
+                button.configure(text=text)
+                self._virtual_texts[slot] = text
+                self._widget_ops["updated"] += 1
+            button.place(
+                x=_ROW_PADDING,
+                y=slot * _ROW_HEIGHT - shift,
+                relwidth=1.0,
+                width=-2 * _ROW_PADDING,
+                height=_ROW_HEIGHT - _ROW_PADDING,
+            )
+
+        total = max(len(self._blocks) * _ROW_HEIGHT, 1)
+        self._scrollbar.set(
+            self._virtual_offset / total,
+            min(1.0, (self._virtual_offset + viewport) / total),
+        )
 
-    def _show_context_menu(self, event: tk.Event, block: Block) -> None:
-        if self._on_block_delete is None and self._on_block_rename is None:
+    def _show_context_menu(self, event: tk.Event, block: BlockEntry) -> None:
+        issues = self._issues.get(block.name, ())
+        if self._on_block_delete is None and self._on_block_rename is None and not issues:
             return
 
         menu = tk.Menu(self, tearoff=False)
+        for message in issues:
+            menu.add_command(label=f"⚠ {message}", state="disabled")
+        if issues:
+            menu.add_separator()
         if self._on_block_rename is not None:
             menu.add_command(label="重新命名", command=lambda b=block: self._on_block_rename(b))
         if self._on_block_delete is not None:
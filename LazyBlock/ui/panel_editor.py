@@ -1,14 +1,52 @@
 from __future__ import annotations
 
 import tkinter as tk
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
 
 from lazy_block.ttk_compat import ttk
 
+from core import perf
+
+from .text_edits import replace_text
+
+
+# Documents longer than this are replaced wholesale when their text is not
+# mirrored: reading them back from Tk just to diff would cost more.
+_DIFF_MAX_LINES = 50_000
+
+
+@dataclass(frozen=True)
+class LineEdit:
+    """Lines ``[start, old_end)`` of the previous text became ``lines``.
+
+    ``old_end`` is ``None`` when the change could not be tracked (undo/redo)
+    and ``lines`` then holds the whole document.
+    """
+
+    start: int
+    old_end: int | None
+    lines: list[str]
+
 
 class EditorPanel(ttk.Frame):
-    def __init__(self, master: tk.Misc | None = None, **kwargs) -> None:
+    def __init__(
+        self,
+        master: tk.Misc | None = None,
+        *,
+        on_lines_changed: Callable[[LineEdit], None] | None = None,
+        **kwargs,
+    ) -> None:
         super().__init__(master, **kwargs)
         self._text_widget: tk.Text | None = None
+        self._on_lines_changed = on_lines_changed
+        self._tk_command = ""
+        self._flush_pending = False
+        # Copy of the document while it is known to match the widget; any
+        # edit that goes through the proxy drops it.
+        self._mirror: str | None = ""
+        self._feed_job: str | None = None
+        self._reset_dirty_lines()
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -35,19 +73,190 @@ class EditorPanel(ttk.Frame):
         scrollbar.grid(row=0, column=1, sticky="ns")
 
         self._text_widget = text
+        self._install_change_tracking(text)
+        text.bind("<<Modified>>", self._handle_modified, add="+")
 
     def _text(self) -> tk.Text:
         if self._text_widget is None:
             raise RuntimeError("Text widget is not initialized.")
         return self._text_widget
 
+    # -- change tracking -------------------------------------------------
+    #
+    # The Tcl widget command is renamed and replaced by a Python proxy so every
+    # insert/delete reports which lines it touched.  Only the number of
+    # untouched lines at the head and tail of the document is remembered;
+    # whatever lies between them is the dirty region handed to listeners on
+    # the next <<Modified>>.
+
+    def _install_change_tracking(self, widget: tk.Text) -> None:
+        self._tk_command = f"{widget._w}_tracked"
+        widget.tk.call("rename", widget._w, self._tk_command)
+        widget.tk.createcommand(widget._w, self._proxy_command)
+
+    def _reset_dirty_lines(self) -> None:
+        self._dirty_head: int | None = None
+        self._dirty_tail = 0
+        self._lines_before = 0
+        self._dirty_all = False
+
+    def _call(self, *args: str) -> str:
+        return self._text().tk.call(self._tk_command, *args)
+
+    def _line_count(self) -> int:
+        return int(str(self._call("index", "end-1c")).split(".")[0])
+
+    def _line_of(self, index: str) -> int:
+        return min(int(str(self._call("index", index)).split(".")[0]), self._line_count())
+
+    def _proxy_command(self, command: str, *args: str):
+        if command in ("insert", "delete", "replace") or (
+            command == "edit" and args and args[0] in ("undo", "redo")
+        ):
+            self._mirror = None
+        if command == "insert" and args:
+            first = self._line_of(args[0])
+            added = sum(chars.count("\n") for chars in args[1::2])
+            before = self._line_count()
+            result = self._call(command, *args)
+            self._mark_dirty(first, first + added, before)
+            return result
+        if command == "delete" and args:
+            first = self._line_of(args[0])
+            before = self._line_count()
+            result = self._call(command, *args)
+            self._mark_dirty(first, first, before)
+            return result
+        if command == "replace" and len(args) >= 3:
+            first = self._line_of(args[0])
+            added = sum(chars.count("\n") for chars in args[2::2])
+            before = self._line_count()
+            result = self._call(command, *args)
+            self._mark_dirty(first, first + added, before)
+            return result
+        if command == "edit" and args and args[0] in ("undo", "redo"):
+            self._dirty_all = True
+        return self._call(command, *args)
+
+    def _mark_dirty(self, first: int, last: int, lines_before: int) -> None:
+        if self._dirty_head is None:
+            self._dirty_head = first - 1
+            self._dirty_tail = lines_before
+            self._lines_before = lines_before
+        lines_after = self._line_count()
+        self._dirty_head = min(self._dirty_head, first - 1)
+        self._dirty_tail = min(self._dirty_tail, lines_after - min(last, lines_after))
+
+    def _handle_modified(self, _event: tk.Event) -> None:
+        widget = self._text()
+        if not widget.edit_modified() or self._flush_pending:
+            return
+        self._flush_pending = True
+        widget.after_idle(self._flush_line_changes)
+
+    def _flush_line_changes(self) -> None:
+        self._flush_pending = False
+        widget = self._text()
+        head, tail = self._dirty_head, self._dirty_tail
+        lines_before, dirty_all = self._lines_before, self._dirty_all
+        self._reset_dirty_lines()
+        widget.edit_modified(False)
+        if self._on_lines_changed is None or (head is None and not dirty_all):
+            return
+        if dirty_all:
+            self._on_lines_changed(LineEdit(0, None, self.get_document_text().split("\n")))
+            return
+        lines_now = self._line_count()
+        new_end = lines_now - tail
+        changed = widget.get(f"{head + 1}.0", f"{new_end}.end")
+        self._on_lines_changed(LineEdit(head, lines_before - tail, changed.split("\n")))
+
+    # -- public API --------------------------------------------------------
+
+    def set_on_lines_changed(self, callback: Callable[[LineEdit], None] | None) -> None:
+        self._on_lines_changed = callback
+
+    def discard_pending_changes(self) -> None:
+        """Forget edits not yet reported to ``on_lines_changed``."""
+        self._reset_dirty_lines()
+        self._text().edit_modified(False)
+
+    def get_document_text(self) -> str:
+        """Return the exact content, trailing blank lines included."""
+        if self._mirror is None:
+            self._mirror = self._text().get("1.0", "end-1c")
+        return self._mirror
+
     def get_text(self) -> str:
-        return self._text().get("1.0", tk.END).rstrip("\n")
+        return self.get_document_text().rstrip("\n")
 
-    def set_text(self, text: str) -> None:
+    @perf.timed("ui.editor.set_text")
+    def set_text(self, text: str, *, diff: bool = True) -> None:
+        """Replace the content; with ``diff`` only the changed ranges are rewritten.
+
+        Diffing keeps the cursor, selection and scroll position wherever the
+        text did not change, and leaves small entries on the undo stack.
+        """
         widget = self._text()
+        self.cancel_feed()
+        if diff and (self._mirror is not None or self._line_count() <= _DIFF_MAX_LINES):
+            replace_text(widget, self.get_document_text(), text)
+        else:
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", text)
+        self._mirror = text
+
+    @property
+    def feeding(self) -> bool:
+        return self._feed_job is not None
+
+    def feed_text(
+        self,
+        chunks: Iterable[str],
+        *,
+        on_progress: Callable[[], None] | None = None,
+        on_done: Callable[[], None] | None = None,
+    ) -> None:
+        """Replace the content with ``chunks``, appending one per idle turn.
+
+        The window stays responsive while a very large document streams in.
+        Undo is off while feeding so Tk does not keep a second copy of the
+        whole text.
+        """
+        widget = self._text()
+        self.cancel_feed()
+        widget.configure(undo=False)
         widget.delete("1.0", tk.END)
-        widget.insert("1.0", text)
+        self._feed_job = widget.after_idle(self._feed_next, iter(chunks), on_progress, on_done)
+
+    def _feed_next(
+        self,
+        chunks: Iterator[str],
+        on_progress: Callable[[], None] | None,
+        on_done: Callable[[], None] | None,
+    ) -> None:
+        widget = self._text()
+        chunk = next(chunks, None)
+        if chunk is None:
+            self._finish_feed()
+            if on_done is not None:
+                on_done()
+            return
+        widget.insert("end-1c", chunk)
+        if on_progress is not None:
+            on_progress()
+        self._feed_job = widget.after(1, self._feed_next, chunks, on_progress, on_done)
+
+    def _finish_feed(self) -> None:
+        widget = self._text()
+        self._feed_job = None
+        widget.configure(undo=True)
+        widget.edit_reset()
+
+    def cancel_feed(self) -> None:
+        if self._feed_job is not None:
+            self._text().after_cancel(self._feed_job)
+            self._finish_feed()
 
     def insert_text_at_cursor(self, text: str) -> None:
         self._text().insert(tk.INSERT, text)
@@ -5,13 +5,32 @@ from __future__ import annotations
 import tkinter as tk
 from lazy_block.ttk_compat import ttk
 
+from core import perf
+from core.incremental_document import OutputPatch
+from core.large_document import MappedDocument
+
+from .text_edits import replace_text
+
 
 class OutputPanel(ttk.Frame):
-    """Panel dedicated to display conversion results."""
+    """Panel dedicated to display conversion results.
+
+    The panel keeps a mirror of what the widget shows, so reading the output
+    never goes back to Tk and new text can be diffed against the old.  Output
+    too large for the widget is shown one window at a time from a mapped
+    file, see :meth:`show_document`.
+    """
 
     def __init__(self, master: tk.Misc | None = None, **kwargs) -> None:
         super().__init__(master, **kwargs)
         self._text_widget: tk.Text | None = None
+        self._lines: list[str] = [""]
+        self._mirror: str | None = ""
+        self._document: MappedDocument | None = None
+        self._window_bytes = 0
+        self._window_starts: list[int] = []
+        self._window_end = 0
+        self._window_var = tk.StringVar()
         self._build_ui()
 
     def _build_ui(self) -> None:
@@ -38,21 +57,117 @@ class OutputPanel(ttk.Frame):
         scrollbar.grid(row=0, column=1, sticky="ns")
         self._text_widget = text
 
+        window_bar = ttk.Frame(self)
+        window_bar.grid(row=2, column=0, sticky="ew", padx=8, pady=(0, 8))
+        window_bar.columnconfigure(0, weight=1)
+        ttk.Label(window_bar, textvariable=self._window_var).grid(row=0, column=0, sticky="w")
+        self._prev_button = ttk.Button(window_bar, text="上一頁", command=self._previous_window)
+        self._prev_button.grid(row=0, column=1, padx=(6, 0))
+        self._next_button = ttk.Button(window_bar, text="下一頁", command=self._next_window)
+        self._next_button.grid(row=0, column=2, padx=(6, 0))
+        window_bar.grid_remove()
+        self._window_bar = window_bar
+
     def _text(self) -> tk.Text:
         if self._text_widget is None:
             raise RuntimeError("Text widget has not been initialized.")
         return self._text_widget
 
-    def set_text(self, text: str) -> None:
+    def _document_text(self) -> str:
+        if self._mirror is None:
+            self._mirror = "\n".join(self._lines)
+        return self._mirror
+
+    @perf.timed("ui.output.set_text")
+    def set_text(self, text: str, *, diff: bool = True) -> None:
+        """Show ``text``; with ``diff`` only the changed ranges are rewritten."""
+        self._close_document()
         widget = self._text()
         widget.configure(state="normal")
-        widget.delete("1.0", tk.END)
-        widget.insert("1.0", text)
+        if diff:
+            replace_text(widget, self._document_text(), text)
+        else:
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", text)
+        widget.configure(state="disabled")
+        self._lines = text.split("\n")
+        self._mirror = text
+
+    @perf.timed("ui.output.apply_patch")
+    def apply_patch(self, patch: OutputPatch) -> None:
+        """Replace only the output lines covered by ``patch``."""
+        if self._document is not None:
+            return
+        widget = self._text()
+        widget.configure(state="normal")
+        lines = patch.text.split("\n")
+        if patch.at_end and patch.start_line == 0:
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", patch.text)
+            self._lines = lines
+        elif patch.at_end:
+            # The last line has no newline of its own, so take over the one
+            # ending the line before the patch.
+            widget.delete(f"{patch.start_line}.end", "end-1c")
+            widget.insert(f"{patch.start_line}.end", "\n" + patch.text)
+            self._lines[patch.start_line :] = lines
+        else:
+            widget.delete(f"{patch.start_line + 1}.0", f"{patch.end_line + 1}.0")
+            widget.insert(f"{patch.start_line + 1}.0", patch.text + "\n")
+            self._lines[patch.start_line : patch.end_line] = lines
         widget.configure(state="disabled")
+        self._mirror = None
 
     def get_text(self) -> str:
+        return self._document_text().rstrip("\n")
+
+    # -- windowed view -----------------------------------------------------
+
+    def show_document(self, document: MappedDocument, *, window_bytes: int = 256 * 1024) -> None:
+        """Page through ``document`` ``window_bytes`` at a time; the panel closes it."""
+        self.set_text("", diff=False)
+        self._document = document
+        self._window_bytes = window_bytes
+        self._window_starts = []
+        self._window_bar.grid()
+        self._show_window(0)
+
+    def _show_window(self, start: int) -> None:
+        document = self._document
+        if document is None:
+            return
+        text, end = document.read_window(start, self._window_bytes)
+        if not self._window_starts or self._window_starts[-1] != start:
+            self._window_starts.append(start)
+        self._window_end = end
         widget = self._text()
         widget.configure(state="normal")
-        value = widget.get("1.0", tk.END).rstrip("\n")
+        widget.delete("1.0", tk.END)
+        widget.insert("1.0", text)
         widget.configure(state="disabled")
-        return value
\ No newline at end of file
+        self._lines = text.split("\n")
+        self._mirror = text
+        self._window_var.set(
+            f"{document.path.name}：第 {len(self._window_starts)} 頁"
+            f"（{end / max(document.size, 1):.0%}，共 {document.size / 1e6:.1f} MB）"
+        )
+        self._prev_button.configure(state="normal" if len(self._window_starts) > 1 else "disabled")
+        self._next_button.configure(state="normal" if end < document.size else "disabled")
+
+    def _next_window(self) -> None:
+        if self._document is not None and self._window_end < self._document.size:
+            self._show_window(self._window_end)
+
+    def _previous_window(self) -> None:
+        if len(self._window_starts) > 1:
+            self._window_starts.pop()
+            self._show_window(self._window_starts[-1])
+
+    def _close_document(self) -> None:
+        if self._document is None:
+            return
+        self._document.close()
+        self._document = None
+        self._window_starts = []
+        self._window_var.set("")
+        self._window_bar.grid_remove()
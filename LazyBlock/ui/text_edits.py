@@ -0,0 +1,33 @@
+"""Apply :mod:`core.text_diff` edits to a ``tk.Text``."""
+
+from __future__ import annotations
+
+import re
+import tkinter as tk
+
+from core.text_diff import TextEdit, text_edits
+
+# Tk 8.6 counts characters outside the BMP as two index positions, so
+# column offsets computed in Python would drift past them.
+_ASTRAL = re.compile("[\U00010000-\U0010ffff]")
+
+
+def replace_text(widget: tk.Text, old: str, new: str) -> None:
+    """Turn the widget's content ``old`` into ``new`` touching only what differs."""
+    if tk.TkVersion < 8.7 and (_ASTRAL.search(old) or _ASTRAL.search(new)):
+        widget.delete("1.0", tk.END)
+        widget.insert("1.0", new)
+        return
+    apply_text_edits(widget, text_edits(old, new))
+
+
+def apply_text_edits(widget: tk.Text, edits: list[TextEdit]) -> None:
+    for edit in edits:
+        start = f"{edit.start[0] + 1}.{edit.start[1]}"
+        if edit.end != edit.start:
+            widget.delete(start, f"{edit.end[0] + 1}.{edit.end[1]}")
+        if edit.text:
+            widget.insert(start, edit.text)
+
+
+__all__ = ["apply_text_edits", "replace_text"]
@@ -19,17 +19,19 @@ class TopBar(ttk.Frame):
         categories: Sequence[str] | None = None,
         tools_by_category: Mapping[str, Iterable[str]] | None = None,
         on_theme_changed: Callable[[str], None] | None = None,
+        on_tool_invoked: Callable[[str], None] | None = None,
         **kwargs,
     ) -> None:
         super().__init__(master, **kwargs)
         self._on_category_changed = on_category_changed
         self._on_create_block = on_create_block
         self._on_theme_changed = on_theme_changed
+        self._on_tool_invoked = on_tool_invoked
         self._category_var = tk.StringVar()
-        self._style = ttk.Style()
-        self._available_themes = tuple(self._style.theme_names())
-        current_theme = self._style.theme_use() if hasattr(self._style, "theme_use") else ""
-        self._theme_var = tk.StringVar(value=current_theme)
+        # Themes are enumerated the first time 美術 is opened, not at startup.
+        self._style: ttk.Style | None = None
+        self._available_themes: tuple[str, ...] | None = None
+        self._theme_var = tk.StringVar()
 
         category_names = list(categories or ("主要", "功能", "美術", "其他"))
         if not category_names:
@@ -53,32 +55,74 @@ class TopBar(ttk.Frame):
 
         tools_row = ttk.Frame(self)
         tools_row.pack(fill="x", padx=6, pady=(3, 6))
-        self._tools_frame = ttk.Frame(tools_row)
-        self._tools_frame.pack(side="left", fill="x", expand=True)
         ttk.Button(tools_row, text="創建", command=self._create_block).pack(side="right")
+        self._tools_row = tools_row
+        # One frame of tool buttons per category, built on first use and
+        # swapped with pack/pack_forget afterwards.
+        self._tool_frames: dict[str, ttk.Frame] = {}
+        self._shown_tools: ttk.Frame | None = None
 
         self._render_tools(self._category_var.get())
 
-    def _render_tools(self, category: str) -> None:
-        for child in self._tools_frame.winfo_children():
-            child.destroy()
-
+    def _tool_frame(self, category: str) -> ttk.Frame:
+        frame = self._tool_frames.get(category)
+        if frame is not None:
+            return frame
+        frame = ttk.Frame(self._tools_row)
+        self._tool_frames[category] = frame
         if category == "美術":
-            self._render_theme_selector()
-            return
+            self._render_theme_selector(frame)
+            return frame
 
         tools = self._tools_by_category.get(category) or ("工具1", "工具2", "工具3")
         for tool in tools:
-            ttk.Button(self._tools_frame, text=tool).pack(side="left", padx=3)
+            ttk.Button(
+                frame, text=tool, command=lambda t=tool: self._invoke_tool(t)
+            ).pack(side="left", padx=3)
+        return frame
 
-    def _render_theme_selector(self) -> None:
+    def _render_tools(self, category: str) -> None:
+        frame = self._tool_frame(category)
+        if frame is self._shown_tools:
+            return
+        if self._shown_tools is not None:
+            self._shown_tools.pack_forget()
+        frame.pack(side="left", fill="x", expand=True)
+        self._shown_tools = frame
+
+    def prewarm(self, *, step_ms: int = 50) -> None:
+        """Build the tool rows of the other categories, one per idle moment.
+
+        This includes the 美術 row and with it the theme list, so the first
+        switch to any category only packs an existing frame.
+        """
+        pending = [name for name in self._tools_by_category if name not in self._tool_frames]
+
+        def build_next() -> None:
+            if not pending or not self.winfo_exists():
+                return
+            self._tool_frame(pending.pop(0))
+            self.after(step_ms, lambda: self.after_idle(build_next))
+
+        self.after_idle(build_next)
+
+    def _get_style(self) -> ttk.Style:
+        if self._style is None:
+            self._style = ttk.Style()
+        return self._style
+
+    def _render_theme_selector(self, frame: ttk.Frame) -> None:
+        if self._available_themes is None:
+            style = self._get_style()
+            self._available_themes = tuple(style.theme_names())
+            self._theme_var.set(style.theme_use() if hasattr(style, "theme_use") else "")
         if not self._available_themes:
-            ttk.Label(self._tools_frame, text="無可用主題").pack(side="left", padx=3)
+            ttk.Label(frame, text="無可用主題").pack(side="left", padx=3)
             return
 
-        ttk.Label(self._tools_frame, text="視窗主題").pack(side="left", padx=(0, 6))
+        ttk.Label(frame, text="視窗主題").pack(side="left", padx=(0, 6))
         combo = ttk.Combobox(
-            self._tools_frame,
+            frame,
             state="readonly",
             values=self._available_themes,
             textvariable=self._theme_var,
@@ -90,12 +134,16 @@ class TopBar(ttk.Frame):
         theme = self._theme_var.get()
         if callable(self._on_theme_changed):
             self._on_theme_changed(theme)
-        elif hasattr(self._style, "theme_use"):
+        elif hasattr(self._get_style(), "theme_use"):
             try:
-                self._style.theme_use(theme)
+                self._get_style().theme_use(theme)
             except Exception:
                 pass
 
+    def _invoke_tool(self, tool: str) -> None:
+        if callable(self._on_tool_invoked):
+            self._on_tool_invoked(tool)
+
     def _change_category(self, name: str) -> None:
         self._category_var.set(name)
         self._render_tools(name)